@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class KirovyConfig(AppConfig):
+    name = "kirovy"
+
+    def ready(self) -> None:
+        # Connects the signal receivers that keep caches and denormalized data in sync.
+        from kirovy import signals  # noqa: F401
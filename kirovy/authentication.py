@@ -1,6 +1,5 @@
 import json
 
-import requests
 from django.http import HttpRequest
 from rest_framework import status
 from rest_framework.authentication import BaseAuthentication
@@ -10,6 +9,9 @@ from kirovy import exceptions
 
 from kirovy import typing as t, constants, objects
 from kirovy.models import CncUser
+from kirovy.services.cncnet_jwt_service import cncnet_jwt_verifier
+from kirovy.services.cncnet_ladder_service import cncnet_ladder
+from kirovy.services.cncnet_token_cache_service import cncnet_token_cache
 
 
 class _CncNetAuthenticator:
@@ -21,12 +23,17 @@ class _CncNetAuthenticator:
 
     @classmethod
     def authenticate_with_cncnet(
-        cls, request: HttpRequest
+        cls, request: HttpRequest, token: str
     ) -> t.Tuple[CncUser, t.Optional[objects.CncnetUserInfo]]:
         """Authenticate a request's JWT with CnCNet.
 
+        Tokens are verified locally with the ladder's public keys when they carry the user's info in their claims.
+        See :class:`kirovy.services.cncnet_jwt_service.CncNetJwtVerifier`. Otherwise, we ask CnCNet.
+
         :param request:
             The request to Kirovy. We will send its header to CnCNet.
+        :param token:
+            The JWT from the request's ``Authorization`` header.
         :return:
             [0] - The Kirovy user object that represents the CncNet user
             [1] - The raw user data returned from CnCNet, if you need it.
@@ -35,8 +42,10 @@ class _CncNetAuthenticator:
             Raised if we don't receive a ``200`` from CnCNet.
         :raises AuthenticationFailed:
             Raised if we successfully authenticate with CnCNet, but can't parse the user info.
+        :raises exceptions.InvalidTokenError:
+            Raised if the token fails local verification.
         """
-        user_dto = cls.request_user_info(request)
+        user_dto = cncnet_jwt_verifier.user_info(token) or cls.request_user_info(request)
         kirovy_user = CncUser.create_or_update_from_cncnet(user_dto)
 
         return kirovy_user, user_dto
@@ -54,11 +63,14 @@ class _CncNetAuthenticator:
 
         :raises exceptions.CncNetAuthFailed:
             Raised if we don't receive a ``200`` from CnCNet.
+        :raises exceptions.CncNetUnavailable:
+            Raised if CnCNet is down, too slow, or its circuit breaker is open.
         :raises AuthenticationFailed:
             Raised if we successfully authenticate with CnCNet, but can't parse the user info.
         """
-        cncnet_response = requests.get(
-            constants.CNCNET_USER_URL, headers=request.headers
+        # Only the token. Cookies, forwarded IPs, etc. are none of the ladder's business.
+        cncnet_response = cncnet_ladder.get(
+            constants.CNCNET_USER_URL, headers={"Authorization": request.headers["Authorization"]}
         )
         if cncnet_response.status_code != status.HTTP_200_OK:
             raise exceptions.CncNetAuthFailed(
@@ -84,6 +96,9 @@ class CncNetAuthentication(BaseAuthentication):
         Extracts the JWT from ``request.headers`` then forwards that to CnCNet.
         If the JWT authenticates, then get, or create, the Kirovy user object for the CnCNet user.
 
+        Verified tokens are cached in :data:`kirovy.services.cncnet_token_cache_service.cncnet_token_cache`,
+        so CnCNet is only called, and the user only updated, the first time we see a token.
+        While CnCNet is unavailable, tokens we've verified before keep working until the stale timeout.
 
         If you don't want to deal with token headers in tests, then monkeypatch this function to return
         whichever value you need for testing endpoint permissions.
@@ -102,4 +117,14 @@ class CncNetAuthentication(BaseAuthentication):
         if len(token) != 2 or token[0].lower() != "bearer":
             raise exceptions.MalformedTokenError()
 
-        return _CncNetAuthenticator.authenticate_with_cncnet(request)
+        if cached := cncnet_token_cache.get(token[1]):
+            return cached
+
+        try:
+            kirovy_user, user_dto = _CncNetAuthenticator.authenticate_with_cncnet(request, token[1])
+        except exceptions.CncNetUnavailable:
+            if stale := cncnet_token_cache.get(token[1], allow_stale=True):
+                return stale
+            raise
+        cncnet_token_cache.set(token[1], kirovy_user, user_dto)
+        return kirovy_user, user_dto
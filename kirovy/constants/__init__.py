@@ -165,3 +165,23 @@ class GameEngines:
         GameSlugs.battle_for_middle_earth_2,
     }
     sage_gen_2 = {GameSlugs.tiberium_wars, GameSlugs.red_alert_3}
+
+
+class MapSizeBuckets(str, enum.Enum):
+    """Size buckets for map search filters and facets, by the number of cells in the latest map file.
+
+    See :attr:`kirovy.models.cnc_map.CncMap.width` and :attr:`kirovy.models.cnc_map.CncMap.height`.
+    """
+
+    small = "small"
+    medium = "medium"
+    large = "large"
+    huge = "huge"
+
+
+MAP_SIZE_BUCKET_MAX_CELLS: t.Dict[MapSizeBuckets, int] = {
+    MapSizeBuckets.small: 100 * 100,
+    MapSizeBuckets.medium: 150 * 150,
+    MapSizeBuckets.large: 200 * 200,
+}
+"""attr: The largest ``width * height`` in each size bucket, smallest first. Anything bigger is ``huge``."""
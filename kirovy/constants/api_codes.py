@@ -37,3 +37,10 @@ class FileUploadApiCodes(enum.StrEnum):
 class GenericApiCodes(enum.StrEnum):
     CANNOT_UPDATE_FIELD = "field-cannot-be-updated-after-creation"
     """attr: Some fields are not allowed to be edited via any API endpoint."""
+    INVALID_QUERY_PARAM = "invalid-query-param"
+    """attr: A query param couldn't be parsed. ``additional.param`` is the name of the bad param."""
+
+
+class DownloadApiCodes(enum.StrEnum):
+    TOO_MANY_MAPS = "too-many-maps-for-bulk-download"
+    """attr: The bulk download filters matched more than ``settings.MAX_MAPS_PER_BULK_DOWNLOAD`` maps."""
@@ -1,6 +1,6 @@
 from rest_framework import exceptions as drf_exceptions, status
 
-__all__ = ["MalformedTokenError", "CncNetAuthFailed"]
+__all__ = ["MalformedTokenError", "CncNetAuthFailed", "InvalidTokenError", "CncNetUnavailable"]
 
 
 class MalformedTokenError(drf_exceptions.AuthenticationFailed):
@@ -18,3 +18,21 @@ class CncNetAuthFailed(drf_exceptions.AuthenticationFailed):
 
     default_detail = ""
     default_code = status.HTTP_401_UNAUTHORIZED
+
+
+class InvalidTokenError(drf_exceptions.AuthenticationFailed):
+    """Raised when a token's signature or expiry fails local verification against the ladder's public keys."""
+
+    default_detail = "invalid-token"
+    default_code = status.HTTP_401_UNAUTHORIZED
+
+
+class CncNetUnavailable(drf_exceptions.APIException):
+    """Raised when the CnCNet ladder API times out, errors, or is skipped because its circuit breaker is open.
+
+    See :class:`kirovy.services.cncnet_ladder_service.CncNetLadderClient`.
+    """
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "cncnet-unavailable"
+    default_code = "cncnet-unavailable"
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from kirovy.services.download_counter_service import recompute_trending_scores
+
+
+class Command(BaseCommand):
+    help = "Recompute the trending score for every map, so that maps nobody downloads any more decay too. Run daily."
+
+    def handle(self, *args, **options) -> None:
+        updated = recompute_trending_scores()
+        self.stdout.write(f"Updated the trending score for {updated} maps.")
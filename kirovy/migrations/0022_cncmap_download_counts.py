@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kirovy", "0021_remove_cncmapfile_kirovy_cncm_cnc_map_a1e8af_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cncmap",
+            name="download_count",
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="cncmap",
+            name="trending_score",
+            field=models.FloatField(db_index=True, default=0.0, editable=False),
+        ),
+        migrations.CreateModel(
+            name="CncMapDailyDownloads",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("downloads", models.PositiveBigIntegerField(default=0)),
+                ("cnc_map", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="kirovy.cncmap")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["date"], name="kirovy_cncm_date_f91e2c_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="cncmapdailydownloads",
+            constraint=models.UniqueConstraint(fields=("cnc_map", "date"), name="unique_map_download_date"),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.backends.postgresql.schema import DatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from kirovy import typing
+from kirovy.models import CncMap as _Map
+
+
+def _forward(apps: StateApps, schema_editor: DatabaseSchemaEditor):
+    """Backfill the search documents for existing maps.
+
+    This duplicates :func:`kirovy.models.cnc_map.CncMap.search_vector_expression` on purpose, so that later changes
+    to the model can't change what this migration does.
+    """
+    CncMap: typing.Type[_Map] = apps.get_model("kirovy", "CncMap")
+    config = "english"
+    vectors = (
+        CncMap.objects.filter(id=OuterRef("id"))
+        .annotate(
+            document=SearchVector("map_name", weight="A", config=config)
+            + SearchVector(StringAgg("categories__name", " ", default=Value("")), weight="B", config=config)
+            + SearchVector(Coalesce("cnc_user__username", Value("")), weight="B", config=config)
+            + SearchVector("description", weight="C", config=config)
+        )
+        .values("document")[:1]
+    )
+    CncMap.objects.update(search_vector=Subquery(vectors))
+
+
+def _backward(apps: StateApps, schema_editor: DatabaseSchemaEditor):
+    """The column is dropped by reversing ``AddField``."""
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kirovy", "0022_cncmap_download_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cncmap",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="cncmap_search_vector_gin"),
+        ),
+        migrations.RunPython(_forward, reverse_code=_backward, elidable=False),
+    ]
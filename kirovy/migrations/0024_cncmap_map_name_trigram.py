@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:24
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kirovy", "0023_cncmap_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["map_name"], name="cncmap_map_name_trgm_gin", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
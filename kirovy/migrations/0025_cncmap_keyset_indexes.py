@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kirovy", "0024_cncmap_map_name_trigram"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cncmap",
+            name="download_count",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="cncmap",
+            name="trending_score",
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(fields=["created", "id"], name="cncmap_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(fields=["map_name", "id"], name="cncmap_map_name_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(fields=["download_count", "id"], name="cncmap_download_count_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(fields=["trending_score", "id"], name="cncmap_trending_score_id_idx"),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:31
+
+from django.db import migrations, models
+from django.db.backends.postgresql.schema import DatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from kirovy import typing
+from kirovy.models import CncMap as _Map
+
+
+def _forward(apps: StateApps, schema_editor: DatabaseSchemaEditor):
+    """Backfill the latest file columns and file counts for existing maps.
+
+    This duplicates :func:`kirovy.models.cnc_map.CncMap.refresh_file_stats` on purpose, so that later changes
+    to the model can't change what this migration does.
+    """
+    CncMap: typing.Type[_Map] = apps.get_model("kirovy", "CncMap")
+    CncMapFile = apps.get_model("kirovy", "CncMapFile")
+    CncMapImageFile = apps.get_model("kirovy", "CncMapImageFile")
+    latest_file = CncMapFile.objects.filter(cnc_map_id=OuterRef("id")).order_by("-version")
+
+    def _count(model) -> Coalesce:
+        counts = (
+            model.objects.filter(cnc_map_id=OuterRef("id"))
+            .order_by()
+            .values("cnc_map_id")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        return Coalesce(Subquery(counts), 0)
+
+    CncMap.objects.update(
+        latest_file_created=Subquery(latest_file.values("created")[:1]),
+        width=Subquery(latest_file.values("width")[:1]),
+        height=Subquery(latest_file.values("height")[:1]),
+        file_count=_count(CncMapFile),
+        image_count=_count(CncMapImageFile),
+    )
+
+
+def _backward(apps: StateApps, schema_editor: DatabaseSchemaEditor):
+    """The columns are dropped by reversing ``AddField``."""
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kirovy", "0025_cncmap_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cncmap",
+            name="file_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="cncmap",
+            name="height",
+            field=models.IntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="cncmap",
+            name="image_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="cncmap",
+            name="latest_file_created",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="cncmap",
+            name="width",
+            field=models.IntegerField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(fields=["latest_file_created", "id"], name="cncmap_latest_file_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(fields=["width", "id"], name="cncmap_width_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(fields=["height", "id"], name="cncmap_height_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(fields=["file_count", "id"], name="cncmap_file_count_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(fields=["image_count", "id"], name="cncmap_image_count_id_idx"),
+        ),
+        migrations.RunPython(_forward, reverse_code=_backward, elidable=False),
+    ]
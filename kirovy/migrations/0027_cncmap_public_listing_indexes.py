@@ -0,0 +1,119 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kirovy", "0026_cncmap_file_stats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(
+                condition=models.Q(
+                    models.Q(
+                        ("incomplete_upload", False),
+                        ("is_banned", False),
+                        ("is_published", True),
+                        ("is_temporary", False),
+                    ),
+                    ("is_legacy", True),
+                    ("is_mapdb1_compatible", True),
+                    _connector="OR",
+                ),
+                fields=["created", "id"],
+                name="cncmap_public_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(
+                condition=models.Q(
+                    models.Q(
+                        ("incomplete_upload", False),
+                        ("is_banned", False),
+                        ("is_published", True),
+                        ("is_temporary", False),
+                    ),
+                    ("is_legacy", True),
+                    ("is_mapdb1_compatible", True),
+                    _connector="OR",
+                ),
+                fields=["cnc_game", "created", "id"],
+                name="cncmap_public_game_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(
+                condition=models.Q(
+                    models.Q(
+                        ("incomplete_upload", False),
+                        ("is_banned", False),
+                        ("is_published", True),
+                        ("is_temporary", False),
+                    ),
+                    ("is_legacy", True),
+                    ("is_mapdb1_compatible", True),
+                    _connector="OR",
+                ),
+                fields=["map_name", "id"],
+                name="cncmap_public_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(
+                condition=models.Q(
+                    models.Q(
+                        ("incomplete_upload", False),
+                        ("is_banned", False),
+                        ("is_published", True),
+                        ("is_temporary", False),
+                    ),
+                    ("is_legacy", True),
+                    ("is_mapdb1_compatible", True),
+                    _connector="OR",
+                ),
+                fields=["download_count", "id"],
+                name="cncmap_public_downloads_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(
+                condition=models.Q(
+                    models.Q(
+                        ("incomplete_upload", False),
+                        ("is_banned", False),
+                        ("is_published", True),
+                        ("is_temporary", False),
+                    ),
+                    ("is_legacy", True),
+                    ("is_mapdb1_compatible", True),
+                    _connector="OR",
+                ),
+                fields=["trending_score", "id"],
+                name="cncmap_public_trending_idx",
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="cncmap",
+            name="cncmap_created_id_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="cncmap",
+            name="cncmap_map_name_id_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="cncmap",
+            name="cncmap_download_count_id_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="cncmap",
+            name="cncmap_trending_score_id_idx",
+        ),
+    ]
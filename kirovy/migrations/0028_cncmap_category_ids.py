@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:01
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import migrations, models
+from django.db.backends.postgresql.schema import DatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+from django.db.models import OuterRef, Subquery
+
+from kirovy import typing
+from kirovy.models import CncMap as _Map
+
+
+def _forward(apps: StateApps, schema_editor: DatabaseSchemaEditor):
+    """Backfill ``category_ids`` for maps that have categories. Maps without categories keep the default.
+
+    This duplicates :func:`kirovy.models.cnc_map.CncMap.refresh_category_ids` on purpose, so that later changes
+    to the model can't change what this migration does.
+    """
+    CncMap: typing.Type[_Map] = apps.get_model("kirovy", "CncMap")
+    through = CncMap.categories.through
+    category_ids = (
+        through.objects.filter(cncmap_id=OuterRef("id"))
+        .order_by()
+        .values("cncmap_id")
+        .annotate(ids=ArrayAgg("mapcategory_id", ordering=("mapcategory__name", "mapcategory_id")))
+        .values("ids")
+    )
+    CncMap.objects.filter(id__in=through.objects.values("cncmap_id")).update(category_ids=Subquery(category_ids))
+
+
+def _backward(apps: StateApps, schema_editor: DatabaseSchemaEditor):
+    """The column is dropped by reversing ``AddField``."""
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kirovy", "0027_cncmap_public_listing_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cncmap",
+            name="category_ids",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.UUIDField(), blank=True, default=list, editable=False, size=None
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["category_ids"], name="cncmap_category_ids_gin"),
+        ),
+        migrations.RunPython(_forward, reverse_code=_backward, elidable=False),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:04
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kirovy", "0028_cncmap_category_ids"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cncmap",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Lower("map_name"), name="text_pattern_ops"
+                ),
+                condition=models.Q(
+                    models.Q(
+                        ("incomplete_upload", False),
+                        ("is_banned", False),
+                        ("is_published", True),
+                        ("is_temporary", False),
+                    ),
+                    ("is_legacy", True),
+                    ("is_mapdb1_compatible", True),
+                    _connector="OR",
+                ),
+                name="cncmap_public_name_prefix_idx",
+            ),
+        ),
+    ]
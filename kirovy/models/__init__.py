@@ -3,7 +3,7 @@ import typing
 from django.db.models import Model
 
 from .cnc_game import CncGame, CncFileExtension
-from .cnc_map import CncMap, CncMapFile, MapCategory
+from .cnc_map import CncMap, CncMapFile, MapCategory, CncMapDailyDownloads
 from .cnc_user import CncUser
 from .file_base import CncNetFileBaseModel
 from .map_preview import MapPreview
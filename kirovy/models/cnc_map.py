@@ -1,8 +1,16 @@
+import datetime
 import pathlib
 from uuid import UUID
 
 from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg, StringAgg
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.cache import cache
 from django.db import models
+from django.db.models import OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Lower
 from django.utils import text as text_utils
 
 from kirovy.models import file_base
@@ -48,6 +56,41 @@ class MapCategory(CncNetBaseModel):
         super().save(force_insert, force_update, using, update_fields)
 
 
+PUBLICLY_LISTED_MAPS = (
+    Q(is_banned=False, is_published=True, incomplete_upload=False, is_temporary=False)
+    | Q(is_legacy=True)
+    | Q(is_mapdb1_compatible=True)
+)
+"""attr: Maps that show up in the public map list. Also used as the condition of the partial indexes on ``CncMap``.
+
+Postgres only uses a partial index when the query repeats the index condition, so always filter with this object
+rather than rewriting the predicate. See :func:`kirovy.views.cnc_map_views.MapListView.get_queryset`.
+"""
+
+
+class CncMapQuerySet(models.QuerySet["CncMap"]):
+    def with_latest_file(self) -> "CncMapQuerySet":
+        """Annotate each map with its latest file version's ``latest_file_hash`` and ``latest_file_path``.
+
+        Used by list views so that serializing a page doesn't run a query per map to find the latest file.
+        See :func:`kirovy.serializers.cnc_map_serializers.CncMapBaseSerializer.get_latest_map_file_hash`.
+        """
+        latest_file = CncMapFile.objects.filter(cnc_map_id=OuterRef("id")).order_by("-version")
+        return self.annotate(
+            latest_file_hash=Subquery(latest_file.values("hash_sha1")[:1]),
+            latest_file_path=Subquery(latest_file.values("file")[:1]),
+        )
+
+    def with_primary_image(self) -> "CncMapQuerySet":
+        """Annotate each map with ``primary_image_path``, the storage path of the image shown on map cards.
+
+        Lets list views show one thumbnail per map without prefetching every image.
+        See :attr:`kirovy.models.cnc_map.CncMapImageFile.image_order`.
+        """
+        primary_image = CncMapImageFile.objects.filter(cnc_map_id=OuterRef("id")).order_by("image_order", "created")
+        return self.annotate(primary_image_path=Subquery(primary_image.values("file")[:1]))
+
+
 class CncMap(GameScopedUserOwnedModel, Moderabile):
     """The Logical representation of a map for a Command & Conquer game.
 
@@ -59,6 +102,8 @@ class CncMap(GameScopedUserOwnedModel, Moderabile):
     Gets ``cnc_user`` from :class:`~kirovy.models.cnc_user.CncNetUserOwnedModel`.
     """
 
+    objects = CncMapQuerySet.as_manager()
+
     map_name = models.CharField(max_length=128, null=False, blank=False)
     description = models.CharField(max_length=4096, null=False, blank=False)
     is_legacy = models.BooleanField(
@@ -115,6 +160,96 @@ class CncMap(GameScopedUserOwnedModel, Moderabile):
     This should never be set for maps uploaded via the web UI.
     """
 
+    download_count = models.PositiveBigIntegerField(default=0, editable=False)
+    """attr: Total downloads. Incremented in batches by :class:`kirovy.services.download_counter_service.DownloadCounter`.
+
+    Used for the ``popular`` ordering on the map list, so that we never aggregate download rows at query time.
+    """
+
+    trending_score = models.FloatField(default=0.0, editable=False)
+    """attr: Recent downloads, decayed by age. Used for the ``trending`` ordering on the map list.
+
+    Recomputed from :class:`~kirovy.models.cnc_map.CncMapDailyDownloads` when counters are flushed, and for every
+    map by ``manage.py recompute_trending_scores`` so that maps nobody downloads any more decay too.
+    """
+
+    search_vector = SearchVectorField(null=True, editable=False)
+    """attr: Weighted full-text search document for the map list search.
+
+    Built from the map name, category names, author name, and description by
+    :func:`~kirovy.models.cnc_map.CncMap.refresh_search_vectors`. Kept up to date by :mod:`kirovy.signals`.
+    """
+
+    latest_file_created = models.DateTimeField(null=True, editable=False)
+    """attr: When the latest map file version was uploaded. Used to find maps with new file versions.
+
+    This, :attr:`~kirovy.models.cnc_map.CncMap.width`, :attr:`~kirovy.models.cnc_map.CncMap.height`,
+    and the file counts are copied from the map's files by :func:`~kirovy.models.cnc_map.CncMap.refresh_file_stats`
+    so that the map list can sort on them without joining, and de-duplicating, the file tables.
+    Kept up to date by :mod:`kirovy.signals`.
+    """
+
+    width = models.IntegerField(null=True, editable=False)
+    """attr: The width of the latest map file version."""
+
+    height = models.IntegerField(null=True, editable=False)
+    """attr: The height of the latest map file version."""
+
+    file_count = models.PositiveIntegerField(default=0, editable=False)
+    """attr: The number of map file versions."""
+
+    image_count = models.PositiveIntegerField(default=0, editable=False)
+    """attr: The number of preview images."""
+
+    category_ids = ArrayField(models.UUIDField(), default=list, blank=True, editable=False)
+    """attr: The ids of :attr:`~kirovy.models.cnc_map.CncMap.categories`, sorted by category name.
+
+    Category filters use the GIN index with ``&&`` and ``@>``, rather than joining, and de-duplicating, the
+    many-to-many table. Rebuilt by :func:`~kirovy.models.cnc_map.CncMap.refresh_category_ids`, and kept up to date by
+    :mod:`kirovy.signals`.
+    """
+
+    SEARCH_CONFIG: t.ClassVar[str] = "english"
+    """attr: The Postgres text search config. Queries must use the same config as the stored vectors."""
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="cncmap_search_vector_gin"),
+            # For fuzzy map name search when full-text search finds nothing.
+            GinIndex(fields=["map_name"], name="cncmap_map_name_trgm_gin", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["category_ids"], name="cncmap_category_ids_gin"),
+            # Keyset pagination seeks on ``(sort_key, id)``. See :class:`kirovy.views.base_views.KirovyCursorPagination`.
+            # ``created``, ``map_name``, ``download_count``, and ``trending_score`` only have the public partial
+            # indexes below, because the map list always filters to public maps.
+            models.Index(fields=["latest_file_created", "id"], name="cncmap_latest_file_id_idx"),
+            models.Index(fields=["width", "id"], name="cncmap_width_id_idx"),
+            models.Index(fields=["height", "id"], name="cncmap_height_id_idx"),
+            models.Index(fields=["file_count", "id"], name="cncmap_file_count_id_idx"),
+            models.Index(fields=["image_count", "id"], name="cncmap_image_count_id_idx"),
+            # Partial indexes for the public map list, so that pages of public maps don't need to skip the
+            # unpublished, temporary, and banned rows.
+            models.Index(fields=["created", "id"], condition=PUBLICLY_LISTED_MAPS, name="cncmap_public_created_idx"),
+            models.Index(
+                fields=["cnc_game", "created", "id"],
+                condition=PUBLICLY_LISTED_MAPS,
+                name="cncmap_public_game_created_idx",
+            ),
+            models.Index(fields=["map_name", "id"], condition=PUBLICLY_LISTED_MAPS, name="cncmap_public_name_idx"),
+            models.Index(
+                fields=["download_count", "id"], condition=PUBLICLY_LISTED_MAPS, name="cncmap_public_downloads_idx"
+            ),
+            models.Index(
+                fields=["trending_score", "id"], condition=PUBLICLY_LISTED_MAPS, name="cncmap_public_trending_idx"
+            ),
+            # Case-insensitive ``LIKE 'prefix%'`` for map name autocomplete.
+            # ``text_pattern_ops`` makes ``LIKE`` prefixes indexable regardless of the database collation.
+            models.Index(
+                OpClass(Lower("map_name"), name="text_pattern_ops"),
+                condition=PUBLICLY_LISTED_MAPS,
+                name="cncmap_public_name_prefix_idx",
+            ),
+        ]
+
     def next_version_number(self) -> int:
         """Generate the next version to use for a map file.
 
@@ -153,16 +288,175 @@ class CncMap(GameScopedUserOwnedModel, Moderabile):
         if self.is_legacy:
             raise exceptions.BanException("legacy-maps-cannot-be-banned")
 
+    @classmethod
+    def search_vector_expression(cls) -> SearchVector:
+        """The weighted search document for a map. Needs the map row, so use it in a subquery per map.
+
+        Map names rank highest, then categories and the author, then the description.
+        """
+        return (
+            SearchVector("map_name", weight="A", config=cls.SEARCH_CONFIG)
+            + SearchVector(StringAgg("categories__name", " ", default=Value("")), weight="B", config=cls.SEARCH_CONFIG)
+            + SearchVector(Coalesce("cnc_user__username", Value("")), weight="B", config=cls.SEARCH_CONFIG)
+            + SearchVector("description", weight="C", config=cls.SEARCH_CONFIG)
+        )
+
+    @classmethod
+    def refresh_search_vectors(cls, map_filter: Q) -> int:
+        """Rebuild :attr:`~kirovy.models.cnc_map.CncMap.search_vector` for the maps matching ``map_filter``.
+
+        Runs as a single ``UPDATE``, so it doesn't send ``post_save``.
+
+        :param map_filter:
+            Which maps to rebuild, e.g. ``Q(id=cnc_map.id)`` or ``Q(categories=category)``.
+        :return:
+            The number of maps updated.
+        """
+        vectors = (
+            cls.objects.filter(id=OuterRef("id"))
+            .annotate(document=cls.search_vector_expression())
+            .values("document")[:1]
+        )
+        return cls.objects.filter(id__in=cls.objects.filter(map_filter).values("id")).update(
+            search_vector=Subquery(vectors)
+        )
+
+    @classmethod
+    def refresh_category_ids(cls, map_filter: Q) -> int:
+        """Copy the category many-to-many onto :attr:`~kirovy.models.cnc_map.CncMap.category_ids`.
+
+        Runs as a single ``UPDATE``, so it doesn't send ``post_save``.
+
+        :param map_filter:
+            Which maps to refresh, e.g. ``Q(id=cnc_map.id)`` or ``Q(category_ids__contains=[category.id])``.
+        :return:
+            The number of maps updated.
+        """
+        through = cls.categories.through
+        category_ids = (
+            through.objects.filter(cncmap_id=OuterRef("id"))
+            .order_by()
+            .values("cncmap_id")
+            .annotate(ids=ArrayAgg("mapcategory_id", ordering=("mapcategory__name", "mapcategory_id")))
+            .values("ids")
+        )
+        return cls.objects.filter(id__in=cls.objects.filter(map_filter).values("id")).update(
+            category_ids=Coalesce(Subquery(category_ids), Value([], output_field=ArrayField(models.UUIDField())))
+        )
+
+    @classmethod
+    def refresh_file_stats(cls, map_filter: Q) -> int:
+        """Copy the latest file's details, and the file counts, onto the maps matching ``map_filter``.
+
+        Runs as a single ``UPDATE``, so it doesn't send ``post_save``.
+
+        :param map_filter:
+            Which maps to refresh, e.g. ``Q(id=map_file.cnc_map_id)``.
+        :return:
+            The number of maps updated.
+        """
+        latest_file = CncMapFile.objects.filter(cnc_map_id=OuterRef("id")).order_by("-version")
+
+        def _count(model: t.Type[file_base.CncNetFileBaseModel]) -> Coalesce:
+            counts = (
+                model.objects.filter(cnc_map_id=OuterRef("id"))
+                .order_by()
+                .values("cnc_map_id")
+                .annotate(total=models.Count("id"))
+                .values("total")
+            )
+            return Coalesce(Subquery(counts), 0)
+
+        return cls.objects.filter(map_filter).update(
+            latest_file_created=Subquery(latest_file.values("created")[:1]),
+            width=Subquery(latest_file.values("width")[:1]),
+            height=Subquery(latest_file.values("height")[:1]),
+            file_count=_count(CncMapFile),
+            image_count=_count(CncMapImageFile),
+        )
+
+
+class CncMapDailyDownloads(models.Model):
+    """Download counts for a map, bucketed by day.
+
+    Rows are written with batched upserts by :class:`kirovy.services.download_counter_service.DownloadCounter`,
+    never one row per download.
+    """
+
+    cnc_map = models.ForeignKey(CncMap, on_delete=models.CASCADE, null=False)
+    date = models.DateField(null=False)
+    downloads = models.PositiveBigIntegerField(default=0, null=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cnc_map", "date"], name="unique_map_download_date"),
+        ]
+        indexes = [models.Index(fields=["date"])]
+
+
+class LegacyMapDownload(t.NamedTuple):
+    """The data needed to serve a backwards compatible ``/{game_slug}/{sha1}`` download without opening the file."""
+
+    storage_path: str
+    """attr: The path of the map file relative to ``settings.MEDIA_ROOT``."""
+    hash_sha1: str
+    cnc_map_id: UUID
+    """attr: Used to count the download."""
+    created: t.Optional[datetime.datetime]
+    """attr: When the map file was uploaded. Used for ``Last-Modified``."""
+
 
 class CncMapFileManager(models.Manager["CncMapFile"]):
+    _LEGACY_LOOKUP_MISS: t.Final[str] = ""
+    """attr: Cached for sha1 lookups that didn't find a file, so that misses don't hit the database either."""
+
     def find_legacy_map_by_sha1(self, sha1: str, game_id: UUID) -> t.Union["CncMapFile", None]:
         return (
             super()
             .get_queryset()
-            .filter(hash_sha1=sha1, cnc_game_id=game_id, cnc_map__is_mapdb1_compatible=True)
+            .filter(hash_sha1=sha1, cnc_game_id=game_id, cnc_map__is_mapdb1_compatible=True, cnc_map__is_banned=False)
             .first()
         )
 
+    def find_legacy_map_download(self, sha1: str, game_id: UUID) -> t.Optional[LegacyMapDownload]:
+        """Cached version of :func:`~kirovy.models.cnc_map.CncMapFileManager.find_legacy_map_by_sha1`.
+
+        CnCNet lobbies request ``/{game_slug}/{sha1}`` for every map in rotation, so both hits and misses are cached.
+        Entries are deleted by :mod:`kirovy.signals` when map files are saved, or when their map is saved or banned.
+
+        :param sha1:
+            The sha1 hash of the map file.
+        :param game_id:
+            The game that the backwards compatible URL belongs to.
+        :return:
+            The storage path and cache validators for the map file, or ``None`` if there is no map for the hash.
+        """
+        cache_key = self.legacy_lookup_cache_key(sha1, game_id)
+        cached: LegacyMapDownload | str | None = cache.get(cache_key)
+        if cached is not None:
+            return cached or None
+
+        map_file = self.find_legacy_map_by_sha1(sha1, game_id)
+        if map_file:
+            download = LegacyMapDownload(map_file.file.name, map_file.hash_sha1, map_file.cnc_map_id, map_file.created)
+            cache.set(cache_key, download, timeout=settings.LEGACY_MAP_LOOKUP_CACHE_TIMEOUT)
+            return download
+
+        cache.set(cache_key, self._LEGACY_LOOKUP_MISS, timeout=settings.LEGACY_MAP_LOOKUP_MISS_CACHE_TIMEOUT)
+        return None
+
+    @staticmethod
+    def legacy_lookup_cache_key(sha1: str, game_id: t.UuidStrOrUUID) -> str:
+        return f"legacy-sha1-lookup:{game_id}:{sha1}"
+
+    def invalidate_legacy_lookups(self, file_keys: t.Iterable[t.Tuple[str, t.UuidStrOrUUID]]) -> None:
+        """Delete cached sha1 lookups.
+
+        :param file_keys:
+            ``(hash_sha1, cnc_game_id)`` pairs for the map files that changed.
+        """
+        cache.delete_many([self.legacy_lookup_cache_key(sha1, game_id) for sha1, game_id in file_keys if sha1])
+
 
 class CncMapFile(file_base.CncNetFileBaseModel):
     """Represents the actual map file that a Command & Conquer game reads.
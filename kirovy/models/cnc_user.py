@@ -7,7 +7,7 @@ from kirovy import typing as t, constants
 from kirovy.models.cnc_base_model import CncNetBaseModel
 from kirovy.models.moderabile import Moderabile
 
-from kirovy.objects import CncnetUserInfo
+from kirovy.objects import CncnetUserInfo, UserPermissions
 
 __all__ = ["CncUser"]
 
@@ -118,6 +118,25 @@ class CncUser(AbstractBaseUser, Moderabile):
         self.set_unusable_password()
         super().save(*args, **kwargs)
 
+    def load_permissions(self) -> UserPermissions:
+        """Refresh the user's group and flags, in one query, and snapshot what they're allowed to do.
+
+        Views, permissions, and serializers should use :attr:`kirovy.request.KirovyRequest.user_permissions`, which
+        is loaded once per request, instead of the properties below.
+
+        :return:
+            The user's permissions as of now.
+        """
+        self.refresh_from_db(fields=["group", "verified_map_uploader", "verified_email", "is_banned"])
+        is_staff = self.CncnetUserGroup.is_staff(self.group)
+        return UserPermissions(
+            is_authenticated=True,
+            is_staff=is_staff,
+            is_admin=self.CncnetUserGroup.is_admin(self.group),
+            is_banned=self.is_banned,
+            can_upload=(self.verified_map_uploader or self.verified_email or is_staff) and not self.is_banned,
+        )
+
     @property
     def can_upload(self) -> bool:
         """Check if a user can upload and is not banned.
@@ -127,19 +146,15 @@ class CncUser(AbstractBaseUser, Moderabile):
         :return:
             True if user can upload maps / mixes / big, or edit their existing uploads.
         """
-        self.refresh_from_db(fields=["verified_map_uploader", "verified_email", "is_banned"])
-        can_upload = self.verified_map_uploader or self.verified_email or self.is_staff
-        return can_upload and not self.is_banned
+        return self.load_permissions().can_upload
 
     @property
     def is_staff(self) -> bool:
-        self.refresh_from_db(fields=["group"])
-        return self.CncnetUserGroup.is_staff(self.group)
+        return self.load_permissions().is_staff
 
     @property
     def is_admin(self) -> bool:
-        self.refresh_from_db(fields=["group"])
-        return self.CncnetUserGroup.is_admin(self.group)
+        return self.load_permissions().is_admin
 
     @staticmethod
     def create_or_update_from_cncnet(user_dto: CncnetUserInfo) -> "CncUser":
@@ -165,10 +180,14 @@ class CncUser(AbstractBaseUser, Moderabile):
             )
             kirovy_user.save()
         else:
+            update_fields = ["verified_email", "group"]
+            # A new username rebuilds the search documents of all of their maps, see ``kirovy.signals``.
+            if kirovy_user.username != user_dto.name:
+                update_fields.append("username")
             kirovy_user.verified_email = user_dto.email_verified
             kirovy_user.username = user_dto.name
             kirovy_user.group = user_dto.group
-            kirovy_user.save(update_fields=["verified_email", "username", "group"])
+            kirovy_user.save(update_fields=update_fields)
 
         return kirovy_user
 
@@ -43,3 +43,19 @@ class CncnetUserInfo:
             setattr(self, user_field.name, bool(value))
         else:
             setattr(self, user_field.name, value)
+
+
+@dataclass(frozen=True)
+class UserPermissions:
+    """An immutable snapshot of what a user is allowed to do.
+
+    Requests load this once, see :attr:`kirovy.request.KirovyRequest.user_permissions`. The defaults are for
+    anonymous users.
+    """
+
+    is_authenticated: bool = False
+    is_staff: bool = False
+    is_admin: bool = False
+    is_banned: bool = False
+    can_upload: bool = False
+    """attr: See :attr:`kirovy.models.cnc_user.CncUser.can_upload`."""
@@ -53,11 +53,20 @@ class BanData(pydantic.BaseModel):
 
 
 class PaginationMetadata(TypedDict):
-    """Metadata returned to the UI with paginated responses."""
+    """Metadata returned to the UI with paginated responses.
 
-    offset: int
+    Cursor paginated responses have ``next_cursor`` instead of ``offset``, and only have ``remaining_count`` if
+    the UI asked for it with ``?count=true`` or ``?count=estimate``. This includes the first page: only requests with
+    ``?offset=`` get ``offset`` and ``remaining_count`` on every page.
+    """
+
+    offset: NotRequired[int]
     limit: NotRequired[int]
     remaining_count: NotRequired[int]
+    remaining_count_is_estimated: NotRequired[bool]
+    """attr: Set if ``remaining_count`` is the database's estimate, from ``?count=estimate``."""
+    next_cursor: NotRequired[str | None]
+    """attr: Pass as ``?cursor=`` to get the next page. ``None`` on the last page."""
 
 
 class BaseResponseData(TypedDict):
@@ -91,6 +100,29 @@ class ResultResponseData(BaseResponseData):
     result: DictStrAny
 
 
+class FacetCount(TypedDict):
+    """How many maps in a search have one value of a filter."""
+
+    value: str
+    """attr: The value to pass to the filter, e.g. a category ID."""
+    label: str
+    """attr: The human-readable name of the value, e.g. a category name."""
+    count: int
+
+
+class MapFacets(TypedDict):
+    """Map counts for each filter value, for the maps matching a search.
+
+    - View: :class:`kirovy.views.cnc_map_views.MapFacetsView`
+    - URL: ``/maps/facets/``
+    """
+
+    total: int
+    games: List[FacetCount]
+    categories: List[FacetCount]
+    sizes: List[FacetCount]
+
+
 class ErrorResponseData(BaseResponseData):
     """Basic response that returns a dictionary of additional data related to an error."""
 
@@ -163,3 +195,27 @@ class UiPermissions:
             ui_permissions[ui_name] = permission_cls().has_permission(request, view)
 
         return ui_permissions
+
+
+class MapNameSuggestion(TypedDict):
+    """A map name suggested for a search box prefix.
+
+    - View: :class:`kirovy.views.cnc_map_views.MapAutocompleteView`
+    - URL: ``/maps/autocomplete/``
+    """
+
+    id: str
+    map_name: str
+    game_slug: str
+
+
+class LegacySearchPage(TypedDict):
+    """One page of results for the legacy HTML map search.
+
+    - View: :class:`kirovy.views.cnc_map_views.MapLegacySearchUI`
+    - URL: ``/search``
+    """
+
+    results: List[t.DictStrAny]
+    next_url: str | None
+    is_invalid: bool
@@ -0,0 +1,18 @@
+import orjson
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+
+from kirovy import typing as t
+
+
+class KirovyJSONParser(parsers.JSONParser):
+    """Parses JSON request bodies with ``orjson``. Pairs with :class:`kirovy.renderers.KirovyJSONRenderer`.
+
+    ``orjson`` only reads UTF-8, which is the only encoding JSON is allowed to be sent in.
+    """
+
+    def parse(self, stream, media_type: t.Optional[str] = None, parser_context=None) -> t.Any:
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as e:
+            raise ParseError(f"JSON parse error - {e}")
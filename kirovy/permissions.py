@@ -28,7 +28,7 @@ class CanUpload(permissions.IsAuthenticated):
     def has_permission(self, request: KirovyRequest, view: View) -> bool:
         if not super().has_permission(request, view):
             return False
-        return request.user.can_upload or request.user.is_staff
+        return request.user_permissions.can_upload or request.user_permissions.is_staff
 
 
 class ReadOnly(permissions.BasePermission):
@@ -61,7 +61,7 @@ class CanEdit(CanUpload):
     """
 
     def has_object_permission(self, request: KirovyRequest, view: View, obj: models.Model) -> bool:
-        if request.user.is_staff:
+        if request.user_permissions.is_staff:
             return True
 
         # Check if this model type is owned by users.
@@ -76,9 +76,13 @@ class CanEdit(CanUpload):
 class CanDelete(permissions.IsAdminUser):
     """Check if a user can delete an object."""
 
+    def has_permission(self, request: KirovyRequest, view: View) -> bool:
+        # DRF checks ``request.user.is_staff``, which queries the user again.
+        return bool(request.user and request.user.is_authenticated and request.user_permissions.is_staff)
+
     def has_object_permission(self, request: KirovyRequest, view: View, obj: models.Model) -> bool:
         # for now, only staff can delete.
-        return request.user.is_staff
+        return request.user_permissions.is_staff
 
 
 class IsStaff(permissions.IsAuthenticated):
@@ -88,7 +92,7 @@ class IsStaff(permissions.IsAuthenticated):
     """
 
     def has_permission(self, request: KirovyRequest, view: View) -> bool:
-        return super().has_permission(request, view) and request.user.is_staff
+        return super().has_permission(request, view) and request.user_permissions.is_staff
 
 
 class IsAdmin(permissions.IsAuthenticated):
@@ -96,4 +100,4 @@ class IsAdmin(permissions.IsAuthenticated):
 
     def has_permission(self, request: KirovyRequest, view: View) -> bool:
 
-        return super().has_permission(request, view) and request.user.is_admin
+        return super().has_permission(request, view) and request.user_permissions.is_admin
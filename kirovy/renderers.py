@@ -0,0 +1,38 @@
+import orjson
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+from kirovy import typing as t
+
+
+class KirovyJSONRenderer(renderers.JSONRenderer):
+    """Renders JSON with ``orjson`` instead of the stdlib ``json`` module.
+
+    ``orjson`` encodes UUIDs, datetimes, and the dicts and lists behind :class:`kirovy.response.KirovyResponse`
+    natively, in C. Anything else, e.g. ``Decimal`` or lazy translation strings, falls back to the same encoder
+    that DRF's :class:`rest_framework.renderers.JSONRenderer` uses, so the output matches.
+
+    ``orjson`` can only indent by two spaces, so any ``; indent=`` in the ``Accept`` header indents by two.
+    Raw datetimes keep their microseconds, where DRF's encoder truncates them to milliseconds. Serializers already
+    format their datetimes as strings, so this only affects datetimes put in response data by hand.
+    """
+
+    _fallback_encoder: t.ClassVar[encoders.JSONEncoder] = encoders.JSONEncoder()
+    options: t.ClassVar[int] = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    """attr: UTC datetimes end in ``Z``, like they do with DRF's encoder.
+
+    Non-string keys are turned into strings, like DRF's encoder does. e.g. ``ListField`` validation errors are keyed
+    by the index of the bad item.
+    """
+
+    def render(self, data: t.Any, accepted_media_type: t.Optional[str] = None, renderer_context=None) -> bytes:
+        if data is None:
+            return b""
+
+        options = self.options
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+
+        rendered = orjson.dumps(data, default=self._fallback_encoder.default, option=options)
+        # Escape the line and paragraph separators, like DRF, so the JSON is a strict javascript subset.
+        return rendered.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
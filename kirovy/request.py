@@ -14,9 +14,19 @@ class KirovyRequest(_DRFRequest):
     user: t.Optional[models.CncUser]
     auth: t.Optional[objects.CncnetUserInfo]
 
+    @cached_property
+    def user_permissions(self) -> objects.UserPermissions:
+        """What the user is allowed to do, loaded once per request.
+
+        Use this instead of :attr:`kirovy.models.cnc_user.CncUser.is_staff` and friends, which query on every access.
+        """
+        if not (self.user and self.user.is_authenticated):
+            return objects.UserPermissions()
+        return self.user.load_permissions()
+
     @cached_property
     def client_ip_address(self) -> str:
-        if self.user.is_staff:
+        if self.user_permissions.is_staff:
             return "staff"
         x_forwarded_for: str | None = self.META.get("HTTP_X_FORWARDED_FOR")
         if x_forwarded_for:
@@ -26,6 +26,8 @@ class KirovySerializer(serializers.Serializer):
     class Meta:
         exclude = ["last_modified_by"]
         editable_fields: t.ClassVar[set[str]] = set()
+        field_sets: t.ClassVar[t.Dict[str, t.Set[str]]] = {}
+        """attr: Named groups of fields that can be requested with ``?fields=``, e.g. ``?fields=card``."""
 
     @cached_property
     def permissioned_readable_fields(self):
@@ -33,14 +35,62 @@ class KirovySerializer(serializers.Serializer):
 
         Removes admin-only fields for non-admin requests. Will always remove the fields if the serializer doesn't
         have context.
+
+        Also removes fields that weren't requested, if the view put the requested fields in ``context["fields"]``.
+        See :func:`~kirovy.serializers.KirovySerializer.requested_fields`.
         """
         fields = self.fields
         request: t.Optional[KirovyRequest] = self.context.get("request")
-        if not (request and request.user.is_authenticated and request.user.is_staff):
+        if not (request and request.user_permissions.is_staff):
             fields.pop("last_modified_by_id", None)
             fields.pop("ip_address", None)
+
+        requested_fields: t.Optional[t.Set[str]] = self.context.get("fields")
+        # Nested serializers share the context, but ``?fields=`` only applies to the top level objects.
+        is_top_level = self.parent is None or (
+            isinstance(self.parent, serializers.ListSerializer) and self.parent.parent is None
+        )
+        if requested_fields is not None and is_top_level:
+            for field_name in list(fields.keys()):
+                if field_name not in requested_fields:
+                    fields.pop(field_name)
         return fields
 
+    @classmethod
+    def requested_fields(
+        cls, fields: t.List[str], expand: t.List[str], default: t.Optional[t.Set[str]] = None
+    ) -> t.Optional[t.Set[str]]:
+        """Resolve ``?fields=`` and ``?expand=`` into the set of fields to return.
+
+        :param fields:
+            Field names, or names from :attr:`~kirovy.serializers.KirovySerializer.Meta.field_sets`.
+            Empty means ``default``.
+        :param expand:
+            Field names to return in addition to ``fields``, e.g. ``?fields=card&expand=files``.
+        :param default:
+            The fields to return if ``fields`` is empty. ``None`` returns every field.
+        :return:
+            The field names to return, or ``None`` for every field.
+        :raises KirovyValidationError:
+            Raised for unknown field names.
+        """
+        field_sets = getattr(cls.Meta, "field_sets", {})
+        requested: t.Optional[t.Set[str]] = set(default) if default is not None else None
+        if fields:
+            requested = set()
+            for name in fields:
+                requested |= field_sets.get(name, {name})
+        if requested is not None:
+            requested |= set(expand)
+
+        if unknown := (requested or set(expand)) - set(cls._declared_fields):
+            raise KirovyValidationError(
+                "Unknown fields requested",
+                api_codes.GenericApiCodes.INVALID_QUERY_PARAM,
+                additional={"param": "fields", "unknown": sorted(unknown)},
+            )
+        return requested
+
     @property
     def _readable_fields(self):
         for field in self.permissioned_readable_fields.values():
@@ -1,5 +1,9 @@
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch
+
 from kirovy.exceptions.view_exceptions import KirovyValidationError
 from kirovy.serializers import KirovySerializer, CncNetUserOwnedModelSerializer
+from kirovy.serializers.projections import ValuesProjection
 from rest_framework import serializers
 from kirovy import typing as t
 from kirovy.models import cnc_map, CncGame, MapCategory, CncFileExtension, CncUser
@@ -201,12 +205,8 @@ class CncMapBaseSerializer(CncNetUserOwnedModelSerializer):
         queryset=CncGame.objects.all(),
         pk_field=serializers.UUIDField(),
     )
-    category_ids = serializers.PrimaryKeyRelatedField(
-        source="categories",
-        pk_field=serializers.UUIDField(),
-        many=True,
-        read_only=True,  # Set it manually.
-    )
+    # Read from the denormalized array, not the many-to-many table. Set the categories manually.
+    category_ids = serializers.ListField(child=serializers.UUIDField(), read_only=True)
     is_published = serializers.BooleanField(
         default=False,
     )
@@ -227,6 +227,16 @@ class CncMapBaseSerializer(CncNetUserOwnedModelSerializer):
         default=False,
     )
 
+    # Counted by the server.
+    download_count = serializers.IntegerField(read_only=True)
+
+    # Copied from the map's files by the server. See :func:`kirovy.models.cnc_map.CncMap.refresh_file_stats`.
+    latest_file_created = serializers.DateTimeField(read_only=True)
+    width = serializers.IntegerField(read_only=True)
+    height = serializers.IntegerField(read_only=True)
+    file_count = serializers.IntegerField(read_only=True)
+    image_count = serializers.IntegerField(read_only=True)
+
     parent_id = serializers.PrimaryKeyRelatedField(
         source="parent",
         queryset=cnc_map.CncMap.objects.all(),
@@ -241,8 +251,9 @@ class CncMapBaseSerializer(CncNetUserOwnedModelSerializer):
     images = CncMapImageFileSerializer(many=True, read_only=True, source="cncmapimagefile_set")
 
     # TODO: These serializer method fields really ought to be sub serializers
-    # TODO: Make sure queries are optimized in the views for listing maps.
     latest_map_file_hash = serializers.SerializerMethodField()
+    latest_map_file_url = serializers.SerializerMethodField()
+    primary_image_url = serializers.SerializerMethodField()
     game_slug = serializers.SerializerMethodField()
     created_date = serializers.DateTimeField("%Y-%m-%d", source="created", read_only=True)
 
@@ -251,12 +262,107 @@ class CncMapBaseSerializer(CncNetUserOwnedModelSerializer):
         # We return the ID instead of the whole object.
         exclude = ["cnc_game", "categories", "parent", "cnc_map_files"]
         fields = "__all__"
+        field_sets = {
+            # Just enough for a map in the search grid. Skips the file and image relations.
+            "card": {
+                "id",
+                "map_name",
+                "cnc_game_id",
+                "game_slug",
+                "primary_image_url",
+                "latest_map_file_hash",
+                "created_date",
+                "download_count",
+                "width",
+                "height",
+            },
+        }
+        related_ordering = {
+            "cncmapfile_set": ("-version",),
+            "cncmapimagefile_set": ("image_order", "created"),
+        }
+        """attr: The order of nested lists. Shared by the prefetches and :class:`CncMapListProjection`."""
+
+    @classmethod
+    def optimize_queryset(
+        cls, queryset: "cnc_map.CncMapQuerySet", fields: t.Optional[t.Set[str]], ordering: t.Iterable[t.Any] = ()
+    ) -> "cnc_map.CncMapQuerySet":
+        """Load only what the requested fields need, so that small projections skip columns, joins, and prefetches.
+
+        :param queryset:
+            The map queryset that will be serialized.
+        :param fields:
+            The fields that will be serialized. ``None`` for every field.
+            See :func:`kirovy.serializers.KirovySerializer.requested_fields`.
+        :param ordering:
+            The queryset ordering. Sort keys are loaded because cursor pagination reads them from the last row.
+        :return:
+            The queryset with ``only()``, ``select_related``, ``prefetch_related``, and annotations for ``fields``.
+        """
+        fields = set(cls._declared_fields) if fields is None else fields
+        model_meta = cnc_map.CncMap._meta
+        model_field_names = {field.name for field in model_meta.concrete_fields}
+        sort_keys = {name.lstrip("-") for name in ordering if isinstance(name, str)}
+        columns = {"id", "created"} | (sort_keys & model_field_names)
+        related_models = {rel.get_accessor_name(): rel.related_model for rel in model_meta.related_objects}
+        related_models.update({m2m.name: m2m.related_model for m2m in model_meta.many_to_many})
+        prefetches = []
+        for name in fields:
+            field = cls._declared_fields[name]
+            if isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+                related_ordering = cls.Meta.related_ordering.get(field.source, ())
+                prefetches.append(
+                    Prefetch(field.source, queryset=related_models[field.source].objects.order_by(*related_ordering))
+                )
+            elif (field.source or name) in model_field_names:
+                columns.add(field.source or name)
+
+        if "latest_map_file_hash" in fields or "latest_map_file_url" in fields:
+            queryset = queryset.with_latest_file()
+        if "primary_image_url" in fields:
+            queryset = queryset.with_primary_image()
+        if "game_slug" in fields:
+            queryset = queryset.select_related("cnc_game")
+            columns |= {"cnc_game", "cnc_game__slug"}
+        return queryset.only(*columns).prefetch_related(*prefetches)
+
+    def _storage_url(self, storage_path: t.Optional[str]) -> t.Optional[str]:
+        if not storage_path:
+            return None
+        url = default_storage.url(storage_path)
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
 
     def get_latest_map_file_hash(self, obj: cnc_map.CncMap) -> t.Optional[str]:
+        """Get the sha1 of the latest map file version.
+
+        Reads the annotation from :func:`kirovy.models.cnc_map.CncMapQuerySet.with_latest_file` when the view
+        used it, so that a page of maps doesn't run one query per map.
+        """
+        if hasattr(obj, "latest_file_hash"):
+            return obj.latest_file_hash
         if latest := obj.cncmapfile_set.order_by("-version").first():
             return latest.hash_sha1
         return None
 
+    def get_latest_map_file_url(self, obj: cnc_map.CncMap) -> t.Optional[str]:
+        """Get the download URL of the latest map file version. Uses the same annotation as the hash."""
+        if hasattr(obj, "latest_file_path"):
+            return self._storage_url(obj.latest_file_path)
+        latest = obj.cncmapfile_set.order_by("-version").first()
+        return self._storage_url(latest.file.name if latest else None)
+
+    def get_primary_image_url(self, obj: cnc_map.CncMap) -> t.Optional[str]:
+        """Get the URL of the image to show on map cards.
+
+        Reads the annotation from :func:`kirovy.models.cnc_map.CncMapQuerySet.with_primary_image` when the view
+        used it.
+        """
+        if hasattr(obj, "primary_image_path"):
+            return self._storage_url(obj.primary_image_path)
+        image = obj.cncmapimagefile_set.order_by("image_order", "created").first()
+        return self._storage_url(image.file.name if image else None)
+
     def get_game_slug(self, obj: cnc_map.CncMap) -> str:
         return obj.cnc_game.slug
 
@@ -264,3 +370,17 @@ class CncMapBaseSerializer(CncNetUserOwnedModelSerializer):
         cnc_map_instance = cnc_map.CncMap(**validated_data)
         cnc_map_instance.save()
         return cnc_map_instance
+
+
+class CncMapListProjection(ValuesProjection):
+    """Builds :class:`CncMapBaseSerializer` output from ``.values()`` rows for the map list.
+
+    The method fields read the annotations added by :func:`CncMapBaseSerializer.optimize_queryset`.
+    """
+
+    method_field_lookups = {
+        "latest_map_file_hash": ("latest_file_hash", False),
+        "latest_map_file_url": ("latest_file_path", True),
+        "primary_image_url": ("primary_image_path", True),
+        "game_slug": ("cnc_game__slug", False),
+    }
@@ -0,0 +1,192 @@
+from django.core.files.storage import default_storage, Storage
+from django.db import models
+from django.db.models import QuerySet
+from rest_framework import serializers
+
+from kirovy import typing as t
+from kirovy.request import KirovyRequest
+
+_Getter = t.Callable[[t.DictStrAny, t.Dict[str, t.Dict[t.Any, t.List[t.Any]]]], t.Any]
+_RelatedRows = t.Callable[[t.List[t.Any]], t.Dict[t.Any, t.List[t.Any]]]
+
+
+class UnsupportedProjectionField(Exception):
+    """Raised while compiling a projection for a serializer field that can't be read from ``.values()``."""
+
+
+class ProjectedColumn(t.NamedTuple):
+    """A serializer field that comes straight from one ``.values()`` key."""
+
+    lookup: str
+    to_representation: t.Callable[[t.Any], t.Any]
+
+
+class ValuesProjection:
+    """Builds the read-only output of a :class:`kirovy.serializers.KirovySerializer` from ``.values()`` rows.
+
+    Serializing a page of model instances runs every field's ``get_attribute`` and ``to_representation``, and
+    builds a serializer per nested row. This projection reads the same fields from plain dicts instead:
+    one ``.values()`` query for the page, plus one grouped query per nested list, e.g. all files for every map on
+    the page.
+
+    The projection is compiled from the serializer's readable fields, so ``?fields=`` and the staff-only fields
+    behave exactly the same. Fields it can't project, e.g. an unknown ``SerializerMethodField``, set
+    :attr:`~kirovy.serializers.projections.ValuesProjection.is_supported` to ``False`` and the view should fall back
+    to the serializer.
+
+    Nested lists are ordered by ``Meta.related_ordering`` on the serializer, which the serializer's prefetches must
+    also use for the output to match.
+    """
+
+    method_field_lookups: t.ClassVar[t.Dict[str, t.Tuple[str, bool]]] = {}
+    """attr: Maps a ``SerializerMethodField`` to the ``.values()`` lookup holding its value, and whether that value is
+    a storage path to turn into a URL."""
+
+    def __init__(self, serializer_class: t.Type[serializers.Serializer], context: t.DictStrAny) -> None:
+        self.serializer_class = serializer_class
+        self.model: t.Type[models.Model] = serializer_class.Meta.model
+        self.request: t.Optional[KirovyRequest] = context.get("request")
+        self.related_ordering: t.Dict[str, t.Sequence[str]] = getattr(serializer_class.Meta, "related_ordering", {})
+        self.lookups: t.Dict[str, None] = {"id": None}
+        self.getters: t.List[t.Tuple[str, _Getter]] = []
+        self.related_rows: t.Dict[str, _RelatedRows] = {}
+        try:
+            for field in serializer_class(context=context)._readable_fields:
+                self.getters.append((field.field_name, self._compile_field(field)))
+            self.is_supported = True
+        except UnsupportedProjectionField:
+            self.is_supported = False
+
+    def values_queryset(self, queryset: QuerySet) -> QuerySet:
+        """Turn the view's queryset into the ``.values()`` queryset to paginate.
+
+        Sort keys are selected too, because cursor pagination reads them from the last row.
+        """
+        sort_keys = [name.lstrip("-") for name in queryset.query.order_by if isinstance(name, str) and name != "?"]
+        lookups = dict.fromkeys([*self.lookups, "created", *sort_keys])
+        return queryset.prefetch_related(None).values(*lookups)
+
+    def project(self, rows: t.List[t.DictStrAny]) -> t.List[t.DictStrAny]:
+        """Build the serializer's output for ``rows`` from :func:`values_queryset`."""
+        ids = [row["id"] for row in rows]
+        grouped = {name: fetch(ids) for name, fetch in self.related_rows.items()} if ids else {}
+        return [{name: getter(row, grouped) for name, getter in self.getters} for row in rows]
+
+    def _compile_field(self, field: serializers.Field) -> _Getter:
+        if isinstance(field, serializers.ListSerializer):
+            self.related_rows[field.field_name] = self._compile_reverse_relation(field)
+            return _related_getter(field.field_name)
+        if isinstance(field, serializers.ManyRelatedField):
+            self.related_rows[field.field_name] = self._compile_many_to_many(field)
+            return _related_getter(field.field_name)
+
+        column = self._compile_column(self.model, field)
+        self.lookups[column.lookup] = None
+        return _column_getter(column)
+
+    def _compile_column(self, model: t.Type[models.Model], field: serializers.Field) -> ProjectedColumn:
+        if isinstance(field, serializers.SerializerMethodField):
+            if field.field_name not in self.method_field_lookups:
+                raise UnsupportedProjectionField(field.field_name)
+            lookup, is_storage_path = self.method_field_lookups[field.field_name]
+            return ProjectedColumn(lookup, self._storage_url if is_storage_path else _identity)
+
+        if field.source == "*" or "." in field.source:
+            raise UnsupportedProjectionField(field.field_name)
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # ``.values("fk")`` returns the primary key of the related row.
+            return ProjectedColumn(field.source, field.pk_field.to_representation if field.pk_field else _identity)
+        if isinstance(field, serializers.FileField):
+            storage = model._meta.get_field(field.source).storage
+            return ProjectedColumn(field.source, lambda path: self._storage_url(path, storage))
+        if isinstance(field, serializers.UUIDField):
+            return ProjectedColumn(field.source, str)
+        if isinstance(field, (serializers.CharField, serializers.IntegerField, serializers.BooleanField)):
+            # The database already returns the types these fields would convert to.
+            return ProjectedColumn(field.source, _identity)
+        if isinstance(field, (serializers.RelatedField, serializers.Serializer)):
+            raise UnsupportedProjectionField(field.field_name)
+        return ProjectedColumn(field.source, field.to_representation)
+
+    def _compile_reverse_relation(self, field: serializers.ListSerializer) -> _RelatedRows:
+        """Compile a nested list of a reverse foreign key, e.g. ``files = CncMapFileSerializer(many=True)``."""
+        relation = next(
+            (x for x in self.model._meta.related_objects if x.get_accessor_name() == field.source),
+            None,
+        )
+        if relation is None or relation.many_to_many:
+            raise UnsupportedProjectionField(field.field_name)
+
+        related_model = relation.related_model
+        foreign_key = relation.field.attname
+        columns: t.List[t.Tuple[str, ProjectedColumn]] = []
+        for child_field in field.child._readable_fields:
+            if isinstance(child_field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+                raise UnsupportedProjectionField(f"{field.field_name}.{child_field.field_name}")
+            columns.append((child_field.field_name, self._compile_column(related_model, child_field)))
+        ordering = self.related_ordering.get(field.source, ())
+
+        def fetch(ids: t.List[t.Any]) -> t.Dict[t.Any, t.List[t.DictStrAny]]:
+            lookups = dict.fromkeys([foreign_key, *(column.lookup for _, column in columns)])
+            rows = related_model.objects.filter(**{f"{foreign_key}__in": ids}).order_by(*ordering).values(*lookups)
+            grouped: t.Dict[t.Any, t.List[t.DictStrAny]] = {}
+            for row in rows:
+                grouped.setdefault(row[foreign_key], []).append(
+                    {name: _column_value(row, column) for name, column in columns}
+                )
+            return grouped
+
+        return fetch
+
+    def _compile_many_to_many(self, field: serializers.ManyRelatedField) -> _RelatedRows:
+        """Compile a list of primary keys for a many-to-many, from the through table."""
+        model_field = self.model._meta.get_field(field.source)
+        child = field.child_relation
+        if not isinstance(model_field, models.ManyToManyField) or not isinstance(
+            child, serializers.PrimaryKeyRelatedField
+        ):
+            raise UnsupportedProjectionField(field.field_name)
+
+        through = model_field.remote_field.through
+        source_key = f"{model_field.m2m_field_name()}_id"
+        target_name = model_field.m2m_reverse_field_name()
+        to_representation = child.pk_field.to_representation if child.pk_field else _identity
+        ordering = [f"{target_name}__{name}" for name in self.related_ordering.get(field.source, ())]
+
+        def fetch(ids: t.List[t.Any]) -> t.Dict[t.Any, t.List[t.Any]]:
+            rows = (
+                through.objects.filter(**{f"{source_key}__in": ids})
+                .order_by(*ordering)
+                .values_list(source_key, f"{target_name}_id")
+            )
+            grouped: t.Dict[t.Any, t.List[t.Any]] = {}
+            for source_id, target_id in rows:
+                grouped.setdefault(source_id, []).append(to_representation(target_id))
+            return grouped
+
+        return fetch
+
+    def _storage_url(self, path: t.Optional[str], storage: Storage = default_storage) -> t.Optional[str]:
+        """Match ``FileField(use_url=True)``: an absolute URL when there's a request, ``None`` for no file."""
+        if not path:
+            return None
+        url = storage.url(path)
+        return self.request.build_absolute_uri(url) if self.request else url
+
+
+def _identity(value: t.Any) -> t.Any:
+    return value
+
+
+def _column_value(row: t.DictStrAny, column: ProjectedColumn) -> t.Any:
+    # Serializers skip ``to_representation`` for ``None``.
+    value = row[column.lookup]
+    return None if value is None else column.to_representation(value)
+
+
+def _column_getter(column: ProjectedColumn) -> _Getter:
+    return lambda row, grouped: _column_value(row, column)
+
+
+def _related_getter(name: str) -> _Getter:
+    return lambda row, grouped: grouped[name].get(row["id"], [])
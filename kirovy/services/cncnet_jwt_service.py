@@ -0,0 +1,106 @@
+import threading
+
+import jwt
+from django.conf import settings
+
+from kirovy import exceptions, typing as t
+from kirovy.objects import CncnetUserInfo
+
+
+class CncNetJwtVerifier:
+    """Verifies ladder JWTs locally, with the signing keys the ladder publishes as a JWKS.
+
+    Checking a signature takes microseconds, where asking the ladder API about a token is an HTTP round trip.
+
+    -   The key set at :attr:`kirovy.settings._base.CNCNET_JWKS_URL` is fetched once and cached for
+        :attr:`kirovy.settings._base.CNCNET_JWKS_CACHE_TIMEOUT`.
+    -   A token signed with a ``kid`` that isn't in the cached set refetches it, so the ladder can rotate keys
+        without us restarting. ``PyJWKClient`` only refetches once per ``cooldown_duration``, so a flood of made up
+        key IDs can't make us hammer the ladder.
+    -   Tokens that don't carry the claims in :attr:`~CncNetJwtVerifier.user_info_claims`, or that aren't
+        signed with one of :attr:`kirovy.settings._base.CNCNET_JWT_ALGORITHMS`, still need the ladder's user info.
+
+    Local verification is off while ``CNCNET_JWKS_URL`` is unset.
+
+    Use the module level :data:`kirovy.services.cncnet_jwt_service.cncnet_jwt_verifier`.
+    """
+
+    user_info_claims: t.Tuple[str, ...] = ("sub", "name", "group", "email_verified")
+    """attr: The claims a token needs for us to skip asking the ladder API for the user's info."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._jwk_client: t.Optional[jwt.PyJWKClient] = None
+        self._jwks_url: t.Optional[str] = None
+
+    @property
+    def is_enabled(self) -> bool:
+        return bool(settings.CNCNET_JWKS_URL)
+
+    def jwk_client(self) -> jwt.PyJWKClient:
+        """Get the key set client. It keeps the fetched key set between requests."""
+        with self._lock:
+            if self._jwk_client is None or self._jwks_url != settings.CNCNET_JWKS_URL:
+                self._jwks_url = settings.CNCNET_JWKS_URL
+                self._jwk_client = jwt.PyJWKClient(
+                    self._jwks_url,
+                    cache_jwk_set=True,
+                    lifespan=settings.CNCNET_JWKS_CACHE_TIMEOUT,
+                    timeout=settings.CNCNET_JWKS_FETCH_TIMEOUT,
+                )
+            return self._jwk_client
+
+    def verify(self, token: str) -> t.Optional[t.DictStrAny]:
+        """Verify a token's signature and expiry, without calling the ladder API.
+
+        :param token:
+            The raw JWT from the ``Authorization`` header.
+        :return:
+            The token's claims. ``None`` if the token can't be verified locally, e.g. because local verification is
+            off, the token uses an algorithm we don't have keys for, or the key set couldn't be fetched.
+        :raises exceptions.InvalidTokenError:
+            Raised if the token is expired, or its signature doesn't match the ladder's keys.
+        """
+        if not self.is_enabled:
+            return None
+        try:
+            if jwt.get_unverified_header(token).get("alg") not in settings.CNCNET_JWT_ALGORITHMS:
+                return None
+            signing_key = self.jwk_client().get_signing_key_from_jwt(token)
+            return jwt.decode(
+                token,
+                signing_key.key,
+                algorithms=settings.CNCNET_JWT_ALGORITHMS,
+                issuer=settings.CNCNET_JWT_ISSUER,
+                options={"require": ["exp", "sub"]},
+            )
+        except jwt.PyJWKClientConnectionError:
+            return None
+        except jwt.PyJWTError as e:
+            raise exceptions.InvalidTokenError() from e
+
+    def user_info(self, token: str) -> t.Optional[CncnetUserInfo]:
+        """Build the user info from a verified token's claims.
+
+        :return:
+            The user info, or ``None`` if the ladder API needs to be asked, e.g. because claims are missing.
+        :raises exceptions.InvalidTokenError:
+            Raised if the token fails verification.
+        """
+        claims = self.verify(token)
+        if not claims or any(claims.get(claim) is None for claim in self.user_info_claims):
+            return None
+        if not str(claims["sub"]).isdigit():
+            return None
+
+        return CncnetUserInfo(
+            id=int(claims["sub"]),
+            name=claims["name"],
+            email=claims.get("email"),
+            group=claims["group"],
+            email_verified=claims["email_verified"],
+        )
+
+
+cncnet_jwt_verifier = CncNetJwtVerifier()
+"""attr: Verifies ladder JWTs with the ladder's cached public keys."""
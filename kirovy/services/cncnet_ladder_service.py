@@ -0,0 +1,183 @@
+import enum
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from kirovy import exceptions, logging, typing as t
+
+_LOGGER = logging.get_logger(__name__)
+
+
+class CircuitState(enum.StrEnum):
+    CLOSED = "closed"
+    """attr: The ladder is healthy. Requests go through."""
+    OPEN = "open"
+    """attr: The ladder is failing. Requests fail immediately until the reset timeout passes."""
+    HALF_OPEN = "half_open"
+    """attr: The reset timeout passed. One trial request goes through to see if the ladder recovered."""
+
+
+class LadderStats(t.TypedDict):
+    """Ladder API health for a :class:`~kirovy.services.cncnet_ladder_service.CncNetLadderClient` in this process."""
+
+    circuit_state: str
+    consecutive_failures: int
+    requests: int
+    failures: int
+    short_circuited: int
+    average_latency_ms: float
+    max_latency_ms: float
+
+
+class CircuitBreaker:
+    """Stops calling a failing service, so a degraded ladder doesn't hold every worker hostage.
+
+    After :attr:`kirovy.settings._base.CNCNET_LADDER_BREAKER_FAILURE_THRESHOLD` failures in a row, the circuit opens
+    and calls fail immediately. After :attr:`kirovy.settings._base.CNCNET_LADDER_BREAKER_RESET_TIMEOUT` seconds, one
+    trial call is let through. Its success closes the circuit, and its failure opens it again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+            if self.state == CircuitState.OPEN:
+                if time.monotonic() - self._opened_at < settings.CNCNET_LADDER_BREAKER_RESET_TIMEOUT:
+                    return False
+                self.state = CircuitState.HALF_OPEN
+                return True
+            # Half open, and the trial request is still running.
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CircuitState.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            threshold = settings.CNCNET_LADDER_BREAKER_FAILURE_THRESHOLD
+            if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= threshold:
+                if self.state != CircuitState.OPEN:
+                    _LOGGER.warning("cncnet_ladder_circuit_opened", consecutive_failures=self.consecutive_failures)
+                self.state = CircuitState.OPEN
+                self._opened_at = time.monotonic()
+
+
+class CncNetLadderClient:
+    """Calls the CnCNet ladder API through one keep-alive connection pool per worker process.
+
+    -   Every call has the connect and read timeouts from :attr:`kirovy.settings._base.CNCNET_LADDER_CONNECT_TIMEOUT`
+        and :attr:`kirovy.settings._base.CNCNET_LADDER_READ_TIMEOUT`, so a slow ladder can't block a worker forever.
+    -   Timeouts, connection errors, ``5xx`` responses, and unexpected errors count as failures for a
+        :class:`~kirovy.services.cncnet_ladder_service.CircuitBreaker`. While it's open, calls raise
+        :class:`kirovy.exceptions.CncNetUnavailable` without touching the network.
+
+    Use the module level :data:`kirovy.services.cncnet_ladder_service.cncnet_ladder`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._session: t.Optional[requests.Session] = None
+        self.breaker = CircuitBreaker()
+        self._stats: t.Counter[str] = t.Counter()
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    @property
+    def session(self) -> requests.Session:
+        """The pooled session. Made on first use, so each forked gunicorn worker gets its own sockets."""
+        with self._lock:
+            if self._session is None:
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.CNCNET_LADDER_POOL_SIZE, max_retries=0)
+                self._session = requests.Session()
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+
+    def get(self, url: str, headers: t.Optional[t.Dict[str, str]] = None) -> requests.Response:
+        """Send a ``GET`` to the ladder.
+
+        :param url:
+            The ladder API URL, e.g. :attr:`kirovy.constants.CNCNET_USER_URL`.
+        :param headers:
+            Only the headers the ladder needs. Never forward every header from an incoming request.
+        :return:
+            The ladder's response, for any status below ``500``.
+        :raises exceptions.CncNetUnavailable:
+            Raised if the circuit is open, or the ladder timed out, refused the connection, or returned a ``5xx``.
+        """
+        if not self.breaker.allow_request():
+            with self._lock:
+                self._stats["short_circuited"] += 1
+            raise exceptions.CncNetUnavailable()
+
+        started = time.perf_counter()
+        try:
+            response = self.session.get(
+                url,
+                headers=headers,
+                timeout=(settings.CNCNET_LADDER_CONNECT_TIMEOUT, settings.CNCNET_LADDER_READ_TIMEOUT),
+            )
+        except requests.RequestException as e:
+            self._record(started, is_failure=True)
+            _LOGGER.warning("cncnet_ladder_request_failed", url=url, error=str(e))
+            raise exceptions.CncNetUnavailable() from e
+        except Exception:
+            # Anything else is a bug, not an outage, but it still has to end a half open trial.
+            self._record(started, is_failure=True)
+            raise
+
+        is_failure = response.status_code >= 500
+        self._record(started, is_failure=is_failure)
+        if is_failure:
+            _LOGGER.warning("cncnet_ladder_server_error", url=url, status_code=response.status_code)
+            raise exceptions.CncNetUnavailable()
+        return response
+
+    def _record(self, started: float, is_failure: bool) -> None:
+        latency = time.perf_counter() - started
+        if is_failure:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["failures"] += int(is_failure)
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+
+    def stats(self) -> LadderStats:
+        with self._lock:
+            requests_sent = self._stats["requests"]
+            return LadderStats(
+                circuit_state=str(self.breaker.state),
+                consecutive_failures=self.breaker.consecutive_failures,
+                requests=requests_sent,
+                failures=self._stats["failures"],
+                short_circuited=self._stats["short_circuited"],
+                average_latency_ms=round(self._total_latency / requests_sent * 1000, 3) if requests_sent else 0.0,
+                max_latency_ms=round(self._max_latency * 1000, 3),
+            )
+
+    def reset(self) -> None:
+        """Close the circuit and reset the stats. The connection pool is kept."""
+        self.breaker = CircuitBreaker()
+        with self._lock:
+            self._stats.clear()
+            self._total_latency = 0.0
+            self._max_latency = 0.0
+
+
+cncnet_ladder = CncNetLadderClient()
+"""attr: The ladder API client for this worker process."""
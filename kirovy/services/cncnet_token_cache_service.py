@@ -0,0 +1,144 @@
+import hashlib
+import time
+from uuid import UUID
+
+import jwt
+from django.conf import settings
+from django.core.cache import caches, BaseCache
+
+from kirovy import typing as t
+from kirovy.models import CncUser
+from kirovy.objects import CncnetUserInfo
+
+
+class CachedCncUser(t.NamedTuple):
+    """The columns of a :class:`kirovy.models.cnc_user.CncUser` kept for a verified token.
+
+    Permission checks load the user's group and flags from the database, once per request, via
+    :func:`kirovy.models.cnc_user.CncUser.load_permissions`. So this only has to be enough to identify the user.
+    """
+
+    id: UUID
+    cncnet_id: int
+    username: t.Optional[str]
+    group: str
+    verified_email: bool
+    verified_map_uploader: bool
+    is_banned: bool
+
+    @classmethod
+    def from_user(cls, user: CncUser) -> "CachedCncUser":
+        return cls(*(getattr(user, name) for name in cls._fields))
+
+    def to_user(self) -> CncUser:
+        """Rebuild the user without a query. The instance behaves like one loaded from the database."""
+        user = CncUser(**self._asdict())
+        user._state.adding = False
+        user._state.db = CncUser.objects.db
+        return user
+
+
+class CachedCncNetToken(t.NamedTuple):
+    """A token that the CnCNet ladder API has already verified."""
+
+    user: CachedCncUser
+    user_info: CncnetUserInfo
+    user_generation: int
+    """attr: The user's generation when the token was cached. Entries from older generations are ignored."""
+    fresh_until: float
+    """attr: When the ladder API should be asked again. After this, the entry is only used while the ladder is down."""
+
+
+class CncNetTokenCache:
+    """Caches the users for tokens that the CnCNet ladder API has verified, so the ladder is only asked once per token.
+
+    Entries are keyed by a hash of the token, so raw tokens are never stored, and are fresh for
+    :attr:`kirovy.settings._base.CNCNET_TOKEN_CACHE_TIMEOUT`. Stale entries are kept for up to
+    :attr:`kirovy.settings._base.CNCNET_TOKEN_STALE_TIMEOUT`, to serve while the ladder API is unavailable.
+    Neither outlives the token's expiry.
+
+    Each user has a generation number, like :class:`kirovy.services.response_cache_service.ResponseCache`.
+    :mod:`kirovy.signals` bumps it when the user is banned, which orphans every cached token for that user.
+
+    Use the module level :data:`kirovy.services.cncnet_token_cache_service.cncnet_token_cache`.
+    """
+
+    prefix = "cncnet-token"
+
+    @property
+    def cache(self) -> BaseCache:
+        return caches[settings.CNCNET_TOKEN_CACHE_ALIAS]
+
+    def token_key(self, token: str) -> str:
+        return f"{self.prefix}:{hashlib.sha256(token.encode()).hexdigest()}"
+
+    def user_generation_key(self, user_id: UUID) -> str:
+        return f"{self.prefix}:user:{user_id}:generation"
+
+    def user_generation(self, user_id: UUID) -> int:
+        """Get a user's current generation, starting one from the clock if the cache doesn't have it."""
+        key = self.user_generation_key(user_id)
+        generation = self.cache.get(key)
+        if generation is None:
+            self.cache.add(key, time.time_ns(), timeout=None)
+            generation = self.cache.get(key)
+        return generation
+
+    def get(self, token: str, allow_stale: bool = False) -> t.Optional[t.Tuple[CncUser, CncnetUserInfo]]:
+        """Get the user for a verified token, or ``None`` if the ladder API needs to verify it.
+
+        :param token:
+            The raw JWT.
+        :param allow_stale:
+            Also return entries past their fresh TTL. Only for when the ladder API is unavailable.
+        """
+        cached: t.Optional[CachedCncNetToken] = self.cache.get(self.token_key(token))
+        if cached is None or cached.user_generation != self.user_generation(cached.user.id):
+            return None
+        if not allow_stale and cached.fresh_until <= time.time():
+            return None
+        return cached.user.to_user(), cached.user_info
+
+    def set(self, token: str, user: CncUser, user_info: CncnetUserInfo) -> None:
+        """Cache a token that the ladder API just verified. Tokens that are about to expire aren't cached."""
+        fresh_for = self.timeout(token)
+        if fresh_for <= 0:
+            return
+        keep_for = max(fresh_for, self.timeout(token, settings.CNCNET_TOKEN_STALE_TIMEOUT))
+        cached = CachedCncNetToken(
+            CachedCncUser.from_user(user), user_info, self.user_generation(user.id), time.time() + fresh_for
+        )
+        self.cache.set(self.token_key(token), cached, timeout=keep_for)
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        """Forget every cached token for a user, so their next request is verified with the ladder API again."""
+        try:
+            self.cache.incr(self.user_generation_key(user_id))
+        except ValueError:
+            # No generation yet, so no tokens were cached under one.
+            self.cache.add(self.user_generation_key(user_id), time.time_ns(), timeout=None)
+
+    @staticmethod
+    def timeout(token: str, limit: t.Optional[int] = None) -> int:
+        """Get the seconds to cache a token for, capped at its ``exp`` claim.
+
+        The signature isn't checked because this only runs after the ladder API has accepted the token.
+
+        :param token:
+            The raw JWT.
+        :param limit:
+            The most seconds to cache for. Defaults to :attr:`kirovy.settings._base.CNCNET_TOKEN_CACHE_TIMEOUT`.
+        """
+        try:
+            expires_at = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.PyJWTError:
+            expires_at = None
+
+        timeout = settings.CNCNET_TOKEN_CACHE_TIMEOUT if limit is None else limit
+        if isinstance(expires_at, (int, float)):
+            timeout = min(timeout, int(expires_at - time.time()))
+        return timeout
+
+
+cncnet_token_cache = CncNetTokenCache()
+"""attr: The cache of tokens verified by the CnCNet ladder API."""
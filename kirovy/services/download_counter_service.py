@@ -0,0 +1,167 @@
+import atexit
+import collections
+import datetime
+import threading
+import time
+from uuid import UUID
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from structlog import get_logger
+
+from kirovy import typing as t
+from kirovy.models import CncMap, CncMapDailyDownloads
+
+_LOGGER = get_logger(__name__)
+
+_DailyKey = t.Tuple[UUID, datetime.date]
+
+
+class DownloadCounter:
+    """Buffers map download counts in process, then writes them in batches.
+
+    CnCNet lobbies download maps constantly, so writing a row for every download would swamp Postgres.
+    Instead, each worker keeps a ``(map, day) -> downloads`` tally in memory and flushes it at most every
+    :attr:`kirovy.settings._base.DOWNLOAD_COUNTER_FLUSH_SECONDS`, with one upsert for the daily counters, and one
+    update for :attr:`kirovy.models.cnc_map.CncMap.download_count`.
+
+    There is no background thread. The download that notices the buffer is stale does the flush. Anything left over
+    is flushed when the worker exits cleanly.
+
+    Use the module level :data:`kirovy.services.download_counter_service.download_counter`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: t.Counter[_DailyKey] = collections.Counter()
+        self._last_flush = time.monotonic()
+
+    def record(self, cnc_map_id: UUID) -> None:
+        """Count one download of a map, and flush the buffer if it's due.
+
+        :param cnc_map_id:
+            The map that was downloaded.
+        """
+        with self._lock:
+            self._pending[(cnc_map_id, timezone.now().date())] += 1
+            is_due = time.monotonic() - self._last_flush >= settings.DOWNLOAD_COUNTER_FLUSH_SECONDS
+
+        if is_due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all buffered counts to the database.
+
+        If the write fails then the counts go back into the buffer so the next flush can retry them.
+
+        :return:
+            The number of ``(map, day)`` counters that were written.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, collections.Counter()
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        try:
+            with transaction.atomic():
+                self._write(pending)
+        except Exception:
+            _LOGGER.exception("Failed to flush download counts", av={"counters": len(pending)})
+            with self._lock:
+                self._pending.update(pending)
+            return 0
+
+        return len(pending)
+
+    def _write(self, pending: t.Counter[_DailyKey]) -> None:
+        """Upsert the daily counters, bump the map totals, then recompute trending for the maps we touched.
+
+        Maps deleted since the download was counted are skipped by the joins rather than failing the batch.
+        """
+        map_totals: t.Counter[UUID] = collections.Counter()
+        for (cnc_map_id, _), downloads in pending.items():
+            map_totals[cnc_map_id] += downloads
+
+        daily_table = CncMapDailyDownloads._meta.db_table
+        map_table = CncMap._meta.db_table
+        daily_values = ", ".join(["(%s::uuid, %s::date, %s::bigint)"] * len(pending))
+        total_values = ", ".join(["(%s::uuid, %s::bigint)"] * len(map_totals))
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {daily_table} (cnc_map_id, date, downloads)
+                SELECT v.cnc_map_id, v.date, v.downloads
+                FROM (VALUES {daily_values}) AS v (cnc_map_id, date, downloads)
+                JOIN {map_table} m ON m.id = v.cnc_map_id
+                ON CONFLICT (cnc_map_id, date)
+                DO UPDATE SET downloads = {daily_table}.downloads + EXCLUDED.downloads
+                """,
+                [value for (cnc_map_id, date), downloads in pending.items() for value in (cnc_map_id, date, downloads)],
+            )
+            cursor.execute(
+                f"""
+                UPDATE {map_table} m SET download_count = m.download_count + v.downloads
+                FROM (VALUES {total_values}) AS v (cnc_map_id, downloads)
+                WHERE m.id = v.cnc_map_id
+                """,
+                [value for cnc_map_id, downloads in map_totals.items() for value in (cnc_map_id, downloads)],
+            )
+
+        recompute_trending_scores(list(map_totals.keys()))
+
+
+def recompute_trending_scores(cnc_map_ids: t.Optional[t.List[UUID]] = None) -> int:
+    """Recompute :attr:`kirovy.models.cnc_map.CncMap.trending_score` from the daily download counters.
+
+    Each day's downloads are halved every :attr:`kirovy.settings._base.TRENDING_HALF_LIFE_DAYS`, and days older than
+    :attr:`kirovy.settings._base.TRENDING_WINDOW_DAYS` are ignored.
+
+    :param cnc_map_ids:
+        Only recompute these maps. ``None`` recomputes every map, which is needed so that maps that stopped
+        being downloaded decay too. Run it daily with ``manage.py recompute_trending_scores``.
+    :return:
+        The number of maps whose score changed.
+    """
+    today = timezone.now().date()
+    window_start = today - datetime.timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    score_params: t.List[t.Any] = [today, settings.TRENDING_HALF_LIFE_DAYS, window_start]
+    score_filter = map_filter = ""
+    map_params: t.List[t.Any] = []
+    if cnc_map_ids is not None:
+        if not cnc_map_ids:
+            return 0
+        score_filter = "AND cnc_map_id = ANY(%s::uuid[])"
+        score_params.append(cnc_map_ids)
+        map_filter = "AND m.id = ANY(%s::uuid[])"
+        map_params.append(cnc_map_ids)
+
+    daily_table = CncMapDailyDownloads._meta.db_table
+    map_table = CncMap._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {map_table} m SET trending_score = COALESCE(scores.score, 0)
+            FROM {map_table} target
+            LEFT JOIN (
+                SELECT cnc_map_id, SUM(downloads * POWER(0.5, (%s::date - date)::float / %s)) AS score
+                FROM {daily_table}
+                WHERE date >= %s::date {score_filter}
+                GROUP BY cnc_map_id
+            ) scores ON scores.cnc_map_id = target.id
+            WHERE m.id = target.id
+            AND m.trending_score IS DISTINCT FROM COALESCE(scores.score, 0)
+            {map_filter}
+            """,
+            score_params + map_params,
+        )
+        return cursor.rowcount
+
+
+download_counter = DownloadCounter()
+"""attr: The download counter for this worker process."""
+
+atexit.register(download_counter.flush)
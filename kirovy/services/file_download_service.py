@@ -0,0 +1,282 @@
+import datetime
+import io
+import mimetypes
+import re
+import time
+import zipfile
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import Storage, default_storage
+from django.http import FileResponse, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+from structlog import get_logger
+
+from kirovy import typing as t
+
+_LOGGER = get_logger(__name__)
+
+_RANGE_HEADER_RE = re.compile(r"^bytes=(?P<start>\d*)-(?P<end>\d*)$")
+"""attr: Matches a single byte range. Multipart ranges are rare for downloads, so we send the full file for them."""
+
+
+class FileDownloadService:
+    """Builds download responses for files that need Django to check permissions before serving them.
+
+    Files that anyone can view are served directly by nginx from ``settings.MEDIA_URL``. Files that need a
+    visibility check, e.g. the backwards compatible ``/{game_slug}/{sha1}`` downloads, have to go through a view.
+    This service lets the view do its checks, then either stream the file from Django, or hand the
+    file off to nginx with ``X-Accel-Redirect`` so that the bytes never pass through the gunicorn worker.
+
+    Map files can't be edited once saved, so a file's sha1 is a strong ``ETag``. Conditional requests are answered
+    with a ``304`` before the file is opened.
+    """
+
+    STREAM_CHUNK_SIZE: t.Final[int] = 64 * 1024
+    """attr: Bytes per chunk when streaming a partial file."""
+
+    @classmethod
+    def download_response(
+        cls,
+        request: HttpRequest,
+        storage_path: str,
+        filename: str,
+        *,
+        etag_hash: t.Optional[str] = None,
+        last_modified: t.Optional[datetime.datetime] = None,
+        cache_control: t.Optional[str] = None,
+        storage: Storage = default_storage,
+    ) -> HttpResponseBase:
+        """Return a response that downloads a stored file as an attachment.
+
+        :param request:
+            The request for the download. Used for ``If-None-Match``, ``If-Modified-Since``, and ``Range``.
+        :param storage_path:
+            The path of the file relative to ``settings.MEDIA_ROOT``. This is ``FieldFile.name``.
+        :param filename:
+            The filename the client will save the download as.
+        :param etag_hash:
+            A hash of the file contents, e.g. ``hash_sha1``. Sent as a strong ``ETag``.
+        :param last_modified:
+            When the file was saved. Sent as ``Last-Modified``.
+        :param cache_control:
+            The ``Cache-Control`` header to send with the file, and with any ``304``.
+        :param storage:
+            The storage backend the file was saved with.
+        :return:
+            A ``304`` if the client's copy is still valid. Otherwise an ``X-Accel-Redirect`` response if
+            :attr:`kirovy.settings._base.SERVE_DOWNLOADS_WITH_NGINX` is enabled, a ``206`` for a satisfiable
+            ``Range``, or a regular ``FileResponse``.
+        """
+        etag = quote_etag(etag_hash) if etag_hash else None
+        last_modified_timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified_timestamp)
+        if response is None:
+            if settings.SERVE_DOWNLOADS_WITH_NGINX:
+                # nginx handles ``Range`` for X-Accel-Redirect responses itself.
+                response = cls.x_accel_redirect_response(storage_path, filename)
+            else:
+                response = cls._file_response(request, storage_path, filename, etag, storage)
+
+        if etag:
+            response["ETag"] = etag
+        if last_modified_timestamp is not None:
+            response["Last-Modified"] = http_date(last_modified_timestamp)
+        if cache_control:
+            response["Cache-Control"] = cache_control
+        return response
+
+    @staticmethod
+    def x_accel_redirect_response(storage_path: str, filename: str) -> HttpResponse:
+        """Return an empty response that tells nginx to serve a file from the protected silo location.
+
+        nginx strips the ``X-Accel-Redirect`` header, keeps the rest of our headers, then serves the file from
+        the ``internal`` location defined in :file:`nginx.conf`.
+
+        :param storage_path:
+            The path of the file relative to ``settings.MEDIA_ROOT``. This is ``FieldFile.name``.
+        :param filename:
+            The filename the client will save the download as.
+        :return:
+            A response with no body, the ``X-Accel-Redirect`` header, and the attachment headers.
+        """
+        content_type, _ = mimetypes.guess_type(filename)
+        response = HttpResponse(content_type=content_type or "application/octet-stream")
+        response["X-Accel-Redirect"] = f"{settings.NGINX_PROTECTED_MEDIA_URL}{quote(storage_path.lstrip('/'))}"
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+        return response
+
+    @staticmethod
+    def parse_range_header(range_header: str, file_size: int) -> t.Optional[t.Tuple[int, int]]:
+        """Parse a single ``Range: bytes=...`` header.
+
+        :param range_header:
+            The raw header, e.g. ``bytes=0-99``, ``bytes=100-``, or ``bytes=-100``.
+        :param file_size:
+            The size of the file in bytes.
+        :return:
+            The inclusive ``(start, end)`` byte offsets, or ``None`` if the range can't be satisfied.
+        :raises ValueError:
+            If the header isn't a single byte range. The caller should ignore the header and send the full file.
+        """
+        match = _RANGE_HEADER_RE.match(range_header.strip())
+        if not match or not (match["start"] or match["end"]):
+            raise ValueError(range_header)
+
+        if not match["start"]:
+            # ``bytes=-100`` is the last 100 bytes.
+            suffix_length = int(match["end"])
+            if suffix_length == 0 or file_size == 0:
+                return None
+            return max(file_size - suffix_length, 0), file_size - 1
+
+        start = int(match["start"])
+        end = int(match["end"]) if match["end"] else file_size - 1
+        if start >= file_size:
+            return None
+        if end < start:
+            raise ValueError(range_header)
+        return start, min(end, file_size - 1)
+
+    @classmethod
+    def _file_response(
+        cls, request: HttpRequest, storage_path: str, filename: str, etag: t.Optional[str], storage: Storage
+    ) -> HttpResponseBase:
+        """Stream the file from Django, honouring a single byte ``Range`` so that clients can resume downloads."""
+        range_header = request.headers.get("Range")
+        if_range = request.headers.get("If-Range")
+        # ``If-Range`` with a stale or weak validator means the client's partial copy is useless. Send everything.
+        if not range_header or (if_range and if_range != etag):
+            response = FileResponse(storage.open(storage_path, "rb"), as_attachment=True, filename=filename)
+            response["Accept-Ranges"] = "bytes"
+            return response
+
+        file_size = storage.size(storage_path)
+        try:
+            byte_range = cls.parse_range_header(range_header, file_size)
+        except ValueError:
+            response = FileResponse(storage.open(storage_path, "rb"), as_attachment=True, filename=filename)
+            response["Accept-Ranges"] = "bytes"
+            return response
+
+        if byte_range is None:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{file_size}"
+            return response
+
+        start, end = byte_range
+        content_type, _ = mimetypes.guess_type(filename)
+        response = StreamingHttpResponse(
+            cls._stream_file_range(storage, storage_path, start, end),
+            status=206,
+            content_type=content_type or "application/octet-stream",
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    @classmethod
+    def _stream_file_range(cls, storage: Storage, storage_path: str, start: int, end: int) -> t.Iterator[bytes]:
+        """Yield the bytes from ``start`` to ``end``, inclusive, without reading the whole file into memory."""
+        with storage.open(storage_path, "rb") as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = file.read(min(cls.STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+class ZipStreamEntry(t.NamedTuple):
+    """A stored file to add to a streamed zip."""
+
+    storage_path: str
+    """attr: The path of the file relative to ``settings.MEDIA_ROOT``. This is ``FieldFile.name``."""
+    archive_name: str
+    """attr: The member name inside the zip."""
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """A write-only, non-seekable file for :class:`zipfile.ZipFile` to write into.
+
+    ``ZipFile`` notices that it can't seek, and writes data descriptors after each member instead of going back
+    to patch the local headers. That lets us hand the bytes to the client as they are written.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: t.List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """Return, and forget, everything written since the last drain."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStreamService:
+    """Builds zip archives on the fly, without ever holding the whole archive in memory.
+
+    Members are read from storage in chunks, and the compressed bytes are yielded as soon as ``zipfile`` writes them.
+    Files that are already zips, like legacy map uploads, are stored rather than compressed a second time.
+    """
+
+    @classmethod
+    def streamed_zip_response(cls, entries: t.Iterable[ZipStreamEntry], filename: str) -> StreamingHttpResponse:
+        """Return a response that streams a zip of ``entries`` as an attachment.
+
+        :param entries:
+            The stored files to put in the zip. Files missing from storage are skipped.
+        :param filename:
+            The filename the client will save the zip as.
+        :return:
+            A streaming response. The length is unknown ahead of time, so there is no ``Content-Length``.
+        """
+        response = StreamingHttpResponse(cls.iter_zip(entries), content_type="application/zip")
+        response["Content-Disposition"] = content_disposition_header(True, filename)
+        return response
+
+    @classmethod
+    def iter_zip(cls, entries: t.Iterable[ZipStreamEntry], storage: Storage = default_storage) -> t.Iterator[bytes]:
+        """Yield a zip archive of ``entries`` a chunk at a time.
+
+        :param entries:
+            The stored files to put in the zip. Files missing from storage are skipped.
+        :param storage:
+            The storage backend the files were saved with.
+        :return:
+            The bytes of the zip archive.
+        """
+        buffer = _ZipStreamBuffer()
+        with zipfile.ZipFile(buffer, "w", allowZip64=True) as archive:
+            for entry in entries:
+                try:
+                    source = storage.open(entry.storage_path, "rb")
+                except FileNotFoundError:
+                    _LOGGER.warning("Skipping missing file in streamed zip", av={"path": entry.storage_path})
+                    continue
+
+                member = zipfile.ZipInfo(entry.archive_name, date_time=time.localtime()[:6])
+                is_zipped = entry.storage_path.lower().endswith(".zip")
+                member.compress_type = zipfile.ZIP_STORED if is_zipped else zipfile.ZIP_DEFLATED
+                with source, archive.open(member, "w") as destination:
+                    while chunk := source.read(FileDownloadService.STREAM_CHUNK_SIZE):
+                        destination.write(chunk)
+                        if data := buffer.drain():
+                            yield data
+                yield buffer.drain()
+        yield buffer.drain()
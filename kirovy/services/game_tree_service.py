@@ -0,0 +1,145 @@
+import threading
+import time
+from uuid import UUID
+
+from django.conf import settings
+
+from kirovy import typing as t
+from kirovy.models import CncGame
+
+
+class GameNode(t.NamedTuple):
+    """The parts of a :class:`kirovy.models.cnc_game.CncGame` needed to walk the game hierarchy."""
+
+    id: UUID
+    slug: str
+    full_name: str
+    parent_game_id: t.Optional[UUID]
+    compatible_with_parent_maps: bool
+    is_visible: bool
+
+
+class GameTree:
+    """Every game, its parent, and its sub games, held in memory.
+
+    Mods and expansions point at the game they were built on with :attr:`kirovy.models.cnc_game.CncGame.parent_game`.
+    Walking that chain with the ORM is one query per level, so this loads every game once and walks dicts instead.
+
+    Use :data:`kirovy.services.game_tree_service.game_tree` rather than building one.
+    """
+
+    def __init__(self, nodes: t.Iterable[GameNode]) -> None:
+        self.nodes: t.Dict[UUID, GameNode] = {node.id: node for node in nodes}
+        self.ids_by_slug: t.Dict[str, UUID] = {node.slug: node.id for node in self.nodes.values()}
+        self.children: t.Dict[UUID, t.List[GameNode]] = {}
+        for node in self.nodes.values():
+            if node.parent_game_id is not None:
+                self.children.setdefault(node.parent_game_id, []).append(node)
+
+    @classmethod
+    def load(cls) -> "GameTree":
+        """Build the tree from the database in one query."""
+        return cls(GameNode(*row) for row in CncGame.objects.values_list(*GameNode._fields))
+
+    def get(self, game_id: UUID) -> GameNode:
+        """Get a game.
+
+        :raises KeyError:
+            Raised for unknown games.
+        """
+        return self.nodes[game_id]
+
+    def ancestors(self, game_id: UUID) -> t.List[GameNode]:
+        """Get the parent games of a game, nearest first. e.g. ``[ra2]`` for ``yr``."""
+        ancestors = []
+        node = self.nodes[game_id]
+        while node.parent_game_id is not None and len(ancestors) < len(self.nodes):
+            node = self.nodes[node.parent_game_id]
+            ancestors.append(node)
+        return ancestors
+
+    def root(self, game_id: UUID) -> GameNode:
+        """Get the top level game that a game's engine comes from. e.g. ``ts`` for Dawn of the Tiberium Age.
+
+        See :class:`kirovy.constants.GameEngines`.
+        """
+        ancestors = self.ancestors(game_id)
+        return ancestors[-1] if ancestors else self.nodes[game_id]
+
+    def compatible_ancestors(self, game_id: UUID) -> t.List[GameNode]:
+        """Get the parent games whose maps work in a game, nearest first. e.g. ``[ra2]`` for ``yr``.
+
+        Stops at the first game without :attr:`~kirovy.models.cnc_game.CncGame.compatible_with_parent_maps`.
+        """
+        compatible = []
+        node = self.nodes[game_id]
+        for parent in self.ancestors(game_id):
+            if not node.compatible_with_parent_maps:
+                break
+            compatible.append(parent)
+            node = parent
+        return compatible
+
+    def descendants(self, game_id: UUID, compatible_only: bool = False) -> t.List[GameNode]:
+        """Get every sub game of a game, e.g. expansions and mods.
+
+        :param game_id:
+            The game to get sub games for.
+        :param compatible_only:
+            Only return the sub games that can play this game's maps. e.g. ``[yr]`` for ``ra2``.
+        :return:
+            The sub games, breadth first.
+        """
+        descendants = []
+        queue = list(self.children.get(game_id, []))
+        while queue:
+            node = queue.pop(0)
+            if compatible_only and not node.compatible_with_parent_maps:
+                continue
+            descendants.append(node)
+            queue.extend(self.children.get(node.id, []))
+        return descendants
+
+
+class GameTreeCache:
+    """Keeps one :class:`~kirovy.services.game_tree_service.GameTree` per worker process.
+
+    :mod:`kirovy.signals` clears it when a game is saved or deleted. Other workers reload after
+    :attr:`kirovy.settings._base.GAME_TREE_CACHE_TIMEOUT`, which is fine because games almost never change.
+    Callers that need a specific game should pass it to :func:`~kirovy.services.game_tree_service.GameTreeCache.get`,
+    so that a game created by another worker reloads the tree instead of looking missing.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._tree: t.Optional[GameTree] = None
+        self._expires_at = 0.0
+
+    def get(self, game_ids: t.Iterable[UUID] = (), slug: t.Optional[str] = None) -> GameTree:
+        """Get the current tree.
+
+        :param game_ids:
+            Games the caller is about to look up. If any are missing, the tree is reloaded once.
+        :param slug:
+            A game slug the caller is about to look up. If it's missing, the tree is reloaded once.
+        :return:
+            The tree. Games that still aren't in it don't exist.
+        """
+        with self._lock:
+            if self._tree is None or self._expires_at <= time.monotonic() or not self._has(game_ids, slug):
+                self._tree = GameTree.load()
+                self._expires_at = time.monotonic() + settings.GAME_TREE_CACHE_TIMEOUT
+            return self._tree
+
+    def _has(self, game_ids: t.Iterable[UUID], slug: t.Optional[str]) -> bool:
+        if slug is not None and slug not in self._tree.ids_by_slug:
+            return False
+        return all(game_id in self._tree.nodes for game_id in game_ids)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._tree = None
+
+
+game_tree = GameTreeCache()
+"""attr: The game hierarchy for this worker process. Call ``game_tree.get()`` for the current tree."""
@@ -0,0 +1,97 @@
+from django.db import connection
+from django.db.models import F, Q, QuerySet
+
+from kirovy import typing as t
+from kirovy.constants import MapSizeBuckets, MAP_SIZE_BUCKET_MAX_CELLS
+from kirovy.models import CncGame, CncMap, MapCategory
+from kirovy.objects import ui_objects
+
+
+class MapFacetService:
+    """Counts the maps in a search by game, category, and size, so the UI can show counts next to each filter."""
+
+    @staticmethod
+    def size_bucket_ranges() -> t.List[t.Tuple[MapSizeBuckets, int, t.Optional[int]]]:
+        """Get the ``(bucket, exclusive_min_cells, inclusive_max_cells)`` of each size bucket, smallest first.
+
+        ``huge`` has no maximum.
+        """
+        ranges = []
+        lower = 0
+        for bucket, upper in MAP_SIZE_BUCKET_MAX_CELLS.items():
+            ranges.append((bucket, lower, upper))
+            lower = upper
+        ranges.append((MapSizeBuckets.huge, lower, None))
+        return ranges
+
+    @classmethod
+    def filter_size_buckets(cls, queryset: QuerySet[CncMap], buckets: t.Iterable[str]) -> QuerySet[CncMap]:
+        """Filter maps to the ones whose latest file is in any of ``buckets``."""
+        size_filter = Q()
+        for bucket, lower, upper in cls.size_bucket_ranges():
+            if bucket in buckets:
+                bucket_filter = Q(map_cells__gt=lower)
+                if upper is not None:
+                    bucket_filter &= Q(map_cells__lte=upper)
+                size_filter |= bucket_filter
+        return queryset.annotate(map_cells=F("width") * F("height")).filter(size_filter)
+
+    @classmethod
+    def facet_counts(cls, queryset: QuerySet[CncMap]) -> ui_objects.MapFacets:
+        """Count the maps in ``queryset`` by game, by category, and by size bucket, in one query.
+
+        The counts come from a single ``GROUP BY GROUPING SETS`` over the search, rather than a ``COUNT`` per facet.
+        Categories come from :attr:`kirovy.models.cnc_map.CncMap.category_ids`, so the many-to-many isn't joined.
+        Maps are counted once per category they're in, so category counts can add up to more than ``total``.
+
+        :param queryset:
+            The filtered map search.
+        :return:
+            The total, and the count for each value of each facet. Values with no maps are left out.
+        """
+        map_ids_sql, map_ids_params = queryset.order_by().values("id").query.sql_with_params()
+        size_cases = []
+        size_params: t.List[t.Any] = []
+        for bucket, lower, upper in cls.size_bucket_ranges():
+            if upper is None:
+                size_cases.append("WHEN m.width * m.height > %s THEN %s")
+                size_params.extend([lower, bucket.value])
+            else:
+                size_cases.append("WHEN m.width * m.height > %s AND m.width * m.height <= %s THEN %s")
+                size_params.extend([lower, upper, bucket.value])
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT GROUPING(g.id), GROUPING(c.id), GROUPING(sizes.bucket),
+                    g.id, g.slug, c.id, c.name, sizes.bucket, COUNT(DISTINCT m.id)
+                FROM {CncMap._meta.db_table} m
+                JOIN {CncGame._meta.db_table} g ON g.id = m.cnc_game_id
+                LEFT JOIN LATERAL unnest(m.category_ids) AS mc(category_id) ON true
+                LEFT JOIN {MapCategory._meta.db_table} c ON c.id = mc.category_id
+                CROSS JOIN LATERAL (SELECT CASE {" ".join(size_cases)} END AS bucket) sizes
+                WHERE m.id IN ({map_ids_sql})
+                GROUP BY GROUPING SETS ((g.id, g.slug), (c.id, c.name), (sizes.bucket), ())
+                """,
+                size_params + list(map_ids_params),
+            )
+            rows = cursor.fetchall()
+
+        facets = ui_objects.MapFacets(total=0, games=[], categories=[], sizes=[])
+        for no_game, no_category, no_size, game_id, game_slug, category_id, category_name, bucket, count in rows:
+            if not no_game:
+                facets["games"].append(ui_objects.FacetCount(value=str(game_id), label=game_slug, count=count))
+            elif not no_category and category_id:
+                facets["categories"].append(
+                    ui_objects.FacetCount(value=str(category_id), label=category_name, count=count)
+                )
+            elif not no_size and bucket:
+                facets["sizes"].append(ui_objects.FacetCount(value=bucket, label=bucket, count=count))
+            elif no_game and no_category and no_size:
+                facets["total"] = count
+
+        bucket_order = [bucket.value for bucket, _, _ in cls.size_bucket_ranges()]
+        facets["sizes"].sort(key=lambda facet: bucket_order.index(facet["value"]))
+        for facet in ("games", "categories"):
+            facets[facet].sort(key=lambda x: (-x["count"], x["label"]))
+        return facets
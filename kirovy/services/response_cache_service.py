@@ -0,0 +1,223 @@
+import collections
+import hashlib
+import threading
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from kirovy import typing as t
+from kirovy.request import KirovyRequest
+
+
+class CachedResponse(t.NamedTuple):
+    """A rendered response, as stored in both cache tiers."""
+
+    status_code: int
+    content_type: str
+    content: bytes
+
+
+class ResponseCacheStats(t.TypedDict):
+    """Hit counts for a :class:`~kirovy.services.response_cache_service.ResponseCache` in this worker process."""
+
+    local_hits: int
+    shared_hits: int
+    misses: int
+    hit_rate: float
+    local_entries: int
+
+
+class ResponseCache:
+    """Caches the rendered bytes of anonymous ``GET`` responses, in two tiers.
+
+    1.  An LRU in this worker process, so the most common searches don't even need to be unpickled.
+    2.  The :attr:`kirovy.settings._base.RESPONSE_CACHE_ALIAS` django cache, if it's shared between workers.
+
+    Keys include a generation number kept in the :attr:`kirovy.settings._base.RESPONSE_CACHE_ALIAS` cache.
+    :mod:`kirovy.signals` bumps the generation when maps, their files, or categories change, which orphans every entry
+    in both tiers at once. Orphaned entries are never read again, and age out of the LRU and the second tier on their
+    own.
+
+    Out of the box the alias is the in-process ``default`` cache. The second tier would only hold a second copy of the
+    LRU, so it's skipped, see :attr:`is_shared`. A change then only invalidates the worker that made it, and other
+    workers serve their old responses for up to :attr:`kirovy.settings._base.RESPONSE_CACHE_TIMEOUT`.
+
+    Keys only include the query params that the view reads, and responses over
+    :attr:`kirovy.settings._base.RESPONSE_CACHE_MAX_ENTRY_BYTES` aren't cached, so made up params can't fill the cache.
+
+    Use the module level :data:`kirovy.services.response_cache_service.map_search_cache`.
+    """
+
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._local: collections.OrderedDict[str, t.Tuple[float, CachedResponse]] = collections.OrderedDict()
+        self._stats: t.Counter[str] = collections.Counter()
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[settings.RESPONSE_CACHE_ALIAS]
+
+    @property
+    def is_shared(self) -> bool:
+        """Whether the second tier is reachable by other workers. An in-process cache is skipped."""
+        return not isinstance(self.shared, LocMemCache)
+
+    @property
+    def generation_key(self) -> str:
+        return f"{self.prefix}:generation"
+
+    def generation(self) -> int:
+        """Get the current generation, starting one if the shared cache doesn't have it.
+
+        New generations start from the clock rather than zero, so that a generation evicted from the shared cache
+        can't come back as a number that old entries were stored under.
+        """
+        generation = self.shared.get(self.generation_key)
+        if generation is None:
+            self.shared.add(self.generation_key, time.time_ns(), timeout=None)
+            generation = self.shared.get(self.generation_key)
+        return generation
+
+    def bump_generation(self) -> None:
+        """Invalidate every cached response in workers that share :attr:`shared`. See the class docs."""
+        try:
+            self.shared.incr(self.generation_key)
+        except ValueError:
+            # No generation yet, so nothing has been cached under one.
+            self.shared.add(self.generation_key, time.time_ns(), timeout=None)
+
+    @staticmethod
+    def normalized_query(request: KirovyRequest, params: t.Collection[str]) -> str:
+        """Encode the query params in ``params``, sorted, and without empty values.
+
+        Other params are dropped. The view doesn't read them, so they must not split the cache.
+        """
+        return urlencode(
+            sorted(
+                (key, value)
+                for key, values in request.query_params.lists()
+                if key in params
+                for value in values
+                if value
+            )
+        )
+
+    def cache_key(self, request: KirovyRequest, params: t.Collection[str]) -> str:
+        """Build the cache key for a request.
+
+        The query string is normalized, so parameter order, empty parameters, and params that the view doesn't read
+        don't split the cache. The host and renderer are included because they change the rendered bytes,
+        e.g. pagination links.
+
+        :param request:
+            The request being handled.
+        :param params:
+            The query params that change the response.
+        """
+        query = self.normalized_query(request, params)
+        raw_key = f"{request.accepted_renderer.format}|{request.get_host()}|{request.path}|{query}"
+        return f"{self.prefix}:{self.generation()}:{hashlib.sha1(raw_key.encode()).hexdigest()}"
+
+    def get(self, cache_key: str) -> t.Optional[CachedResponse]:
+        """Get a cached response, trying this process first, then the shared cache."""
+        now = time.monotonic()
+        with self._lock:
+            local = self._local.get(cache_key)
+            if local and local[0] > now:
+                self._local.move_to_end(cache_key)
+                self._stats["local_hits"] += 1
+                return local[1]
+
+        cached: CachedResponse | None = self.shared.get(cache_key) if self.is_shared else None
+        with self._lock:
+            if cached is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["shared_hits"] += 1
+        self._set_local(cache_key, cached)
+        return cached
+
+    def set(self, cache_key: str, cached: CachedResponse) -> None:
+        """Cache a rendered response, unless it's over :attr:`kirovy.settings._base.RESPONSE_CACHE_MAX_ENTRY_BYTES`."""
+        if len(cached.content) > settings.RESPONSE_CACHE_MAX_ENTRY_BYTES:
+            return
+        if self.is_shared:
+            self.shared.set(cache_key, cached, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+        self._set_local(cache_key, cached)
+
+    def _set_local(self, cache_key: str, cached: CachedResponse) -> None:
+        with self._lock:
+            self._local[cache_key] = (time.monotonic() + settings.RESPONSE_CACHE_TIMEOUT, cached)
+            self._local.move_to_end(cache_key)
+            while len(self._local) > settings.RESPONSE_CACHE_LOCAL_MAX_ENTRIES:
+                self._local.popitem(last=False)
+
+    def cached_response(
+        self,
+        request: KirovyRequest,
+        get_response: t.Callable[[], Response],
+        params: t.Collection[str],
+        anonymous_only: bool = True,
+    ) -> t.Union[Response, HttpResponse]:
+        """Return a cached response for anonymous requests, or call ``get_response`` and cache what it renders.
+
+        Only ``200`` responses are cached. Authenticated requests skip the cache by default.
+
+        :param request:
+            The request being handled.
+        :param get_response:
+            Builds the response on a cache miss, e.g. ``lambda: super().get(request)``.
+        :param params:
+            The query params that change the response. Only these are part of the cache key.
+        :param anonymous_only:
+            Set to ``False`` for responses that are the same for every user, so logged-in users share the cache too.
+        :return:
+            The fresh, unrendered, DRF response on a miss. A plain ``HttpResponse`` with the cached bytes on a hit.
+        """
+        if request.method != "GET" or (anonymous_only and request.user.is_authenticated):
+            return get_response()
+
+        cache_key = self.cache_key(request, params)
+        cached = self.get(cache_key)
+        if cached:
+            response = HttpResponse(cached.content, status=cached.status_code, content_type=cached.content_type)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = get_response()
+        response["X-Cache"] = "MISS"
+        if isinstance(response, Response) and response.status_code == 200:
+            response.add_post_render_callback(
+                lambda rendered: self.set(
+                    cache_key, CachedResponse(rendered.status_code, rendered["Content-Type"], rendered.content)
+                )
+            )
+        return response
+
+    def stats(self) -> ResponseCacheStats:
+        with self._lock:
+            hits = self._stats["local_hits"] + self._stats["shared_hits"]
+            total = hits + self._stats["misses"]
+            return ResponseCacheStats(
+                local_hits=self._stats["local_hits"],
+                shared_hits=self._stats["shared_hits"],
+                misses=self._stats["misses"],
+                hit_rate=hits / total if total else 0.0,
+                local_entries=len(self._local),
+            )
+
+    def clear_local(self) -> None:
+        """Empty this process's LRU and reset the stats. The second tier is invalidated with ``bump_generation``."""
+        with self._lock:
+            self._local.clear()
+            self._stats.clear()
+
+
+map_search_cache = ResponseCache("map-search")
+"""attr: The response cache for the public map search endpoints."""
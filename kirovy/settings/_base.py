@@ -97,7 +97,12 @@ REST_FRAMEWORK = {
     ],
     "EXCEPTION_HANDLER": "kirovy.exception_handler.kirovy_exception_handler",
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_RENDERER_CLASSES": ("rest_framework.renderers.JSONRenderer",),
+    "DEFAULT_RENDERER_CLASSES": ("kirovy.renderers.KirovyJSONRenderer",),
+    "DEFAULT_PARSER_CLASSES": (
+        "kirovy.parsers.KirovyJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 """
 attr: Define the default authentication backend for endpoints.
@@ -137,6 +142,151 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "kirovy-default",
+        "OPTIONS": {"MAX_ENTRIES": 50_000},
+    },
+}
+"""attr: Django's cache backends.
+
+The default cache is in-process. Anything we put in it must have a bounded TTL, and must be invalidated from
+:mod:`kirovy.signals`, because other processes can't see our invalidations.
+"""
+
+LEGACY_MAP_LOOKUP_CACHE_TIMEOUT = 60 * 15
+"""attr: Seconds to cache a legacy ``/{game_slug}/{sha1}`` lookup that found a map file.
+
+See :func:`kirovy.models.cnc_map.CncMapFileManager.find_legacy_map_download`.
+"""
+
+LEGACY_MAP_LOOKUP_MISS_CACHE_TIMEOUT = 60 * 5
+"""attr: Seconds to cache a legacy ``/{game_slug}/{sha1}`` lookup that did **not** find a map file.
+
+CnCNet lobbies poll for every map in rotation, and most custom maps were never uploaded, so misses are cached too.
+"""
+
+ESTIMATED_COUNT_EXACT_THRESHOLD = 1000
+"""attr: ``?count=estimate`` counts exactly when the planner estimates fewer rows than this.
+
+See :func:`kirovy.utils.query_utils.estimated_count`.
+"""
+
+RESPONSE_CACHE_ALIAS = get_env_var("RESPONSE_CACHE_ALIAS", default="default")
+"""attr: The django cache behind each worker's LRU of cached map search responses.
+
+The default is in-process, so responses are only kept in the LRU, and one worker's invalidation doesn't reach the
+others until :attr:`~kirovy.settings._base.RESPONSE_CACHE_TIMEOUT` passes. To share it, add a cache that every worker
+can reach to :attr:`~kirovy.settings._base.CACHES`, e.g. redis, and set this to its alias.
+See :class:`kirovy.services.response_cache_service.ResponseCache`.
+"""
+
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+"""attr: Seconds to cache a rendered map search response. Changes to maps invalidate it sooner."""
+
+RESPONSE_CACHE_LOCAL_MAX_ENTRIES = 256
+"""attr: How many rendered map search responses each worker keeps in its in-process LRU."""
+
+RESPONSE_CACHE_MAX_ENTRY_BYTES = 256 * 1024
+"""attr: Rendered map search responses bigger than this aren't cached, so that a few big pages can't fill the cache."""
+
+GAME_TREE_CACHE_TIMEOUT = 60 * 10
+"""attr: Seconds each worker keeps the game hierarchy in memory. The worker that saves a game reloads it immediately.
+
+See :class:`kirovy.services.game_tree_service.GameTreeCache`.
+"""
+
+CNCNET_TOKEN_CACHE_ALIAS = get_env_var("CNCNET_TOKEN_CACHE_ALIAS", default="default")
+"""attr: The django cache for tokens verified by the CnCNet ladder API.
+
+Point this at a cache that every worker can reach, e.g. redis, so that a ban reaches every worker immediately.
+See :class:`kirovy.services.cncnet_token_cache_service.CncNetTokenCache`.
+"""
+
+CNCNET_TOKEN_CACHE_TIMEOUT = 60 * 5
+"""attr: The most seconds to trust a token without asking the CnCNet ladder API again. Never longer than the token."""
+
+CNCNET_TOKEN_STALE_TIMEOUT = 60 * 60
+"""attr: The most seconds to keep trusting a token while the CnCNet ladder API is unavailable.
+
+See :class:`kirovy.services.cncnet_ladder_service.CncNetLadderClient`.
+"""
+
+CNCNET_LADDER_CONNECT_TIMEOUT = 3.05
+"""attr: Seconds to wait to connect to the CnCNet ladder API. Slightly over a multiple of 3, the TCP retransmit window."""
+
+CNCNET_LADDER_READ_TIMEOUT = 5
+"""attr: Seconds to wait for the CnCNet ladder API to respond once connected."""
+
+CNCNET_LADDER_POOL_SIZE = 10
+"""attr: Keep-alive connections to the CnCNet ladder API that each worker keeps open."""
+
+CNCNET_LADDER_BREAKER_FAILURE_THRESHOLD = 5
+"""attr: Failed ladder API calls in a row before calls fail fast. See :class:`kirovy.services.cncnet_ladder_service.CircuitBreaker`."""
+
+CNCNET_LADDER_BREAKER_RESET_TIMEOUT = 30
+"""attr: Seconds to fail fast before trying the CnCNet ladder API again."""
+
+CNCNET_JWKS_URL = get_env_var("CNCNET_JWKS_URL", default=None)
+"""attr: Where the CnCNet ladder publishes the public keys it signs JWTs with. Unset to always ask the ladder API.
+
+See :class:`kirovy.services.cncnet_jwt_service.CncNetJwtVerifier`.
+"""
+
+CNCNET_JWKS_CACHE_TIMEOUT = 60 * 60
+"""attr: Seconds to keep the ladder's key set. Tokens signed with an unknown key refetch it sooner."""
+
+CNCNET_JWKS_FETCH_TIMEOUT = 5
+"""attr: Seconds to wait for the ladder's key set before falling back to the ladder API."""
+
+CNCNET_JWT_ALGORITHMS = ["RS256", "ES256"]
+"""attr: The asymmetric algorithms accepted for local verification. Other tokens are checked by the ladder API."""
+
+CNCNET_JWT_ISSUER = get_env_var("CNCNET_JWT_ISSUER", default=None)
+"""attr: The ``iss`` claim that locally verified tokens must have. Not checked if unset."""
+
+DOWNLOAD_COUNTER_FLUSH_SECONDS = get_env_var("DOWNLOAD_COUNTER_FLUSH_SECONDS", default=30, value_type=int)
+"""attr: How long each worker buffers download counts before writing them to the database in one batch.
+
+Counts still in the buffer are lost if a worker is killed, which is an acceptable trade for not writing on
+every lobby download. See :class:`kirovy.services.download_counter_service.DownloadCounter`.
+"""
+
+TRENDING_HALF_LIFE_DAYS = 3
+"""attr: Downloads from this many days ago count half as much towards :attr:`kirovy.models.cnc_map.CncMap.trending_score`."""
+
+TRENDING_WINDOW_DAYS = 14
+"""attr: Daily download counts older than this are ignored when computing the trending score."""
+
+MAP_AUTOCOMPLETE_MIN_PREFIX_LENGTH = 2
+"""attr: The shortest prefix that map name autocomplete will look up. Shorter prefixes return no suggestions."""
+
+MAP_AUTOCOMPLETE_MAX_RESULTS = 20
+"""attr: The most suggestions map name autocomplete will return. The UI picks how many with ``?limit=``."""
+
+MAP_AUTOCOMPLETE_MAX_AGE = 60
+"""attr: Seconds that browsers and CDNs may cache a map name autocomplete response.
+
+See :class:`kirovy.views.cnc_map_views.MapAutocompleteView`.
+"""
+
+MAP_NAME_SIMILARITY_THRESHOLD = 0.3
+"""attr: The default trigram similarity a map name needs to match a search that found nothing with full-text search.
+
+``0.3`` is the ``pg_trgm`` default. Lower is fuzzier. See :class:`kirovy.views.cnc_map_views.MapFullTextSearchFilter`.
+"""
+
+LEGACY_SEARCH_PAGE_SIZE = 50
+"""attr: The most maps the legacy ``/search`` page renders at once. More results are behind a "next page" link.
+
+See :class:`kirovy.views.cnc_map_views.MapLegacySearchUI`.
+"""
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -232,6 +382,29 @@ This is necessary because django app dependencies -- like the admin plugin -- ha
 Basically, ``collectstatic`` copies static files from your project directories to the web server's exposed directory.
 """
 
+SERVE_DOWNLOADS_WITH_NGINX = get_env_var("SERVE_DOWNLOADS_WITH_NGINX", default=False, value_type=bool)
+"""attr: If true, then downloads that pass through Django will be handed off to nginx via ``X-Accel-Redirect``.
+
+Django still does the permission and visibility checks, but nginx reads the file and sends it with ``sendfile``,
+so the gunicorn worker is freed as soon as the headers are returned.
+See :class:`kirovy.services.file_download_service.FileDownloadService`.
+
+Leave this off if you aren't running behind the nginx container, otherwise downloads will be empty responses.
+"""
+
+NGINX_PROTECTED_MEDIA_URL = "/protected_silo/"
+"""str: The ``internal`` nginx location that serves ``settings.MEDIA_ROOT`` for ``X-Accel-Redirect`` downloads.
+
+Matches the ``internal`` location in :file:`nginx.conf`. Clients can't request this path directly.
+"""
+
+MAX_MAPS_PER_BULK_DOWNLOAD = 100
+"""attr: The most maps one streamed zip from ``/maps/download/`` can contain.
+
+Each map is at most :attr:`~kirovy.settings._base.MAX_UPLOADED_FILE_SIZE_MAP`, and the worker is busy until the
+whole archive is sent, so keep this bounded.
+"""
+
 ### ------------- END SERVING FILES -------------
 
 # Default primary key field type
@@ -0,0 +1,142 @@
+"""
+Signal receivers that keep caches and denormalized columns in sync with the database.
+
+Receivers are connected when django starts, in :func:`kirovy.apps.KirovyConfig.ready`.
+
+.. note::
+
+    Signals don't fire for ``QuerySet.update()`` or bulk operations. Cached data is always stored with a bounded TTL,
+    so a missed invalidation will only ever be stale until the entry expires.
+"""
+
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from kirovy.models import CncGame, CncMap, CncMapFile, CncUser, MapCategory
+from kirovy.models.cnc_map import CncMapImageFile
+from kirovy.services.cncnet_token_cache_service import cncnet_token_cache
+from kirovy.services.game_tree_service import game_tree
+from kirovy.services.response_cache_service import map_search_cache
+
+
+@receiver([post_save, post_delete], sender=CncMapFile)
+def invalidate_legacy_lookup_for_map_file(sender: type[CncMapFile], instance: CncMapFile, **kwargs) -> None:
+    """Clear the cached ``/{game_slug}/{sha1}`` lookup for a map file that was uploaded or deleted.
+
+    This also clears cached misses, so a map is downloadable the moment it is uploaded.
+    """
+    CncMapFile.objects.invalidate_legacy_lookups([(instance.hash_sha1, instance.cnc_game_id)])
+
+
+@receiver([post_save, post_delete], sender=CncMapFile)
+@receiver([post_save, post_delete], sender=CncMapImageFile)
+def refresh_file_stats_for_map(
+    sender: type[CncMapFile | CncMapImageFile], instance: CncMapFile | CncMapImageFile, **kwargs
+) -> None:
+    """Refresh the latest file columns and file counts on a map when one of its files or images changes."""
+    CncMap.refresh_file_stats(Q(id=instance.cnc_map_id))
+
+
+@receiver(post_save, sender=CncMap)
+def invalidate_legacy_lookups_for_map(sender: type[CncMap], instance: CncMap, created: bool, **kwargs) -> None:
+    """Clear the cached ``/{game_slug}/{sha1}`` lookups for a map's files when the map is saved.
+
+    Bans are saved through :func:`kirovy.models.moderabile.Moderabile.ban`, so banned maps stop being served.
+    """
+    if created:
+        # New maps don't have any files yet.
+        return
+
+    file_keys = CncMapFile.objects.filter(cnc_map_id=instance.id).values_list("hash_sha1", "cnc_game_id")
+    CncMapFile.objects.invalidate_legacy_lookups(file_keys)
+
+
+@receiver(post_save, sender=CncMap)
+def refresh_search_vector_for_map(sender: type[CncMap], instance: CncMap, **kwargs) -> None:
+    """Rebuild the full-text search document when a map's name or description may have changed."""
+    CncMap.refresh_search_vectors(Q(id=instance.id))
+
+
+@receiver(m2m_changed, sender=CncMap.categories.through)
+def refresh_search_vector_for_categories(
+    sender: type, instance: CncMap | MapCategory, action: str, reverse: bool, pk_set: set | None, **kwargs
+) -> None:
+    """Rebuild the full-text search documents when categories are added to, or removed from, maps."""
+    if action not in {"post_add", "post_remove", "post_clear"}:
+        return
+
+    if not reverse:
+        CncMap.refresh_search_vectors(Q(id=instance.id))
+    elif pk_set:
+        CncMap.refresh_search_vectors(Q(id__in=pk_set))
+
+
+@receiver(m2m_changed, sender=CncMap.categories.through)
+def refresh_category_ids_for_maps(
+    sender: type, instance: CncMap | MapCategory, action: str, reverse: bool, pk_set: set | None, **kwargs
+) -> None:
+    """Copy the category many-to-many onto ``CncMap.category_ids`` when categories are added to, or removed from, maps."""
+    if action not in {"post_add", "post_remove", "post_clear"}:
+        return
+
+    if not reverse:
+        CncMap.refresh_category_ids(Q(id=instance.id))
+    elif action == "post_clear":
+        CncMap.refresh_category_ids(Q(category_ids__contains=[instance.id]))
+    elif pk_set:
+        CncMap.refresh_category_ids(Q(id__in=pk_set))
+
+
+@receiver(post_save, sender=MapCategory)
+@receiver(post_delete, sender=MapCategory)
+def refresh_category_ids_for_category(sender: type[MapCategory], instance: MapCategory, **kwargs) -> None:
+    """Re-sort ``category_ids`` when a category is renamed, and drop the ids of deleted categories."""
+    if not kwargs.get("created"):
+        CncMap.refresh_category_ids(Q(category_ids__contains=[instance.id]))
+
+
+@receiver(post_save, sender=MapCategory)
+def refresh_search_vectors_for_category(sender: type[MapCategory], instance: MapCategory, created: bool, **kwargs):
+    """Rebuild the search documents for every map in a category that was renamed."""
+    if not created:
+        CncMap.refresh_search_vectors(Q(categories=instance))
+
+
+@receiver(post_save, sender=CncUser)
+def refresh_search_vectors_for_user(sender: type[CncUser], instance: CncUser, created: bool, update_fields, **kwargs):
+    """Rebuild the search documents for a user's maps when their username may have changed."""
+    if created or (update_fields is not None and "username" not in update_fields):
+        return
+    CncMap.refresh_search_vectors(Q(cnc_user_id=instance.id))
+
+
+@receiver([post_save, post_delete], sender=CncUser)
+def invalidate_cncnet_tokens_for_user(sender: type[CncUser], instance: CncUser, update_fields=None, **kwargs) -> None:
+    """Forget a user's cached tokens when they're banned, unbanned, or deleted.
+
+    Bans are saved through :func:`kirovy.models.moderabile.Moderabile.ban`, which always updates ``is_banned``.
+    """
+    if kwargs.get("created") or (update_fields is not None and "is_banned" not in update_fields):
+        return
+    cncnet_token_cache.invalidate_user(instance.id)
+
+
+@receiver([post_save, post_delete], sender=CncMap)
+@receiver([post_save, post_delete], sender=CncMapFile)
+@receiver([post_save, post_delete], sender=CncMapImageFile)
+@receiver([post_save, post_delete], sender=MapCategory)
+@receiver([post_save, post_delete], sender=CncGame)
+@receiver(m2m_changed, sender=CncMap.categories.through)
+def invalidate_map_search_responses(sender: type, **kwargs) -> None:
+    """Invalidate every cached map search response when anything a search can show changes.
+
+    Bans are saved through :func:`kirovy.models.moderabile.Moderabile.ban`, so they're covered by ``post_save``.
+    """
+    map_search_cache.bump_generation()
+
+
+@receiver([post_save, post_delete], sender=CncGame)
+def invalidate_game_tree(sender: type[CncGame], **kwargs) -> None:
+    """Reload the in-memory game hierarchy when a game is added, moved, or deleted."""
+    game_tree.invalidate()
@@ -117,6 +117,9 @@ map_patterns = [
     path("<uuid:pk>/", cnc_map_views.MapRetrieveUpdateView.as_view()),
     path("delete/<uuid:pk>/", cnc_map_views.MapDeleteView.as_view()),
     path("search/", cnc_map_views.MapListView.as_view()),
+    path("download/", cnc_map_views.MapBulkDownloadView.as_view()),
+    path("facets/", cnc_map_views.MapFacetsView.as_view()),
+    path("autocomplete/", cnc_map_views.MapAutocompleteView.as_view()),
     path("img/", map_image_views.MapImageFileUploadView.as_view()),
     path("img/<uuid:pk>/", map_image_views.MapImageFileRetrieveUpdateDestroy.as_view()),
     # path("img/<uuid:map_id>/", ...),
@@ -129,7 +132,11 @@ user_patterns = [
 ]
 
 # /admin/
-admin_patterns = [path("ban/", admin_views.BanView.as_view())]
+admin_patterns = [
+    path("ban/", admin_views.BanView.as_view()),
+    path("response-cache/", admin_views.ResponseCacheStatsView.as_view()),
+    path("ladder/", admin_views.LadderStatsView.as_view()),
+]
 
 
 # /game
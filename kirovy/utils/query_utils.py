@@ -0,0 +1,54 @@
+import json
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import QuerySet
+
+from kirovy import typing as t
+
+
+def planner_row_estimate(queryset: QuerySet) -> int:
+    """Get Postgres's estimate of how many rows a queryset returns, without running it.
+
+    Unfiltered querysets read the table's row estimate from ``pg_class``, which is kept up to date by autovacuum.
+    Everything else uses the row estimate from ``EXPLAIN``. Both are only as accurate as the table statistics.
+
+    :param queryset:
+        The queryset to estimate.
+    :return:
+        The estimated number of rows.
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct and not queryset.query.is_sliced:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+            # ``reltuples`` is -1 for tables that have never been analyzed.
+            if row and row[0] >= 0:
+                return int(row[0])
+
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimated_count(queryset: QuerySet) -> t.Tuple[int, bool]:
+    """Count a queryset cheaply, using the planner's estimate for big results.
+
+    Estimates below :attr:`kirovy.settings._base.ESTIMATED_COUNT_EXACT_THRESHOLD` are replaced with an exact
+    ``COUNT(*)``, because small counts are cheap and estimates are least accurate for small, selective filters.
+
+    :param queryset:
+        The queryset to count.
+    :return:
+        The count, and whether it's an estimate.
+    """
+    estimate = planner_row_estimate(queryset)
+    if estimate < settings.ESTIMATED_COUNT_EXACT_THRESHOLD:
+        return queryset.count(), False
+    return estimate, True
@@ -2,6 +2,7 @@ from kirovy import typing as t, exceptions as e
 from kirovy.constants import GameEngines
 from kirovy.models import CncGame
 from kirovy.services.cnc_gen_2_services import CncGen2MapParser
+from kirovy.services.game_tree_service import game_tree
 
 
 def get_map_parser_for_game(game: CncGame) -> t.Type[CncGen2MapParser]:
@@ -16,16 +17,10 @@ def get_map_parser_for_game(game: CncGame) -> t.Type[CncGen2MapParser]:
     :raises e.GameNotSupportedError:
         Raised when we don't have a parser for this game.
     """
+    # Mods and expansions use their top level game's engine. The hierarchy is cached, so this doesn't query.
+    root_game = game_tree.get([game.id]).root(game.id)
 
-    # We can switch to storing the base game as a field if we ever get performance issues here.
-    # Uploads will be fairly rare, and this will be three queries at most though, so I am leaving it for now.
-    while game.parent_game_id is not None:
-        game = game.parent_game
-
-    if (
-        game.slug in GameEngines.westwood_gen_1
-        or game.slug in GameEngines.westwood_gen_2
-    ):
+    if root_game.slug in GameEngines.westwood_gen_1 or root_game.slug in GameEngines.westwood_gen_2:
         return CncGen2MapParser
 
     raise e.GameNotSupportedError(game.full_name)
@@ -8,6 +8,8 @@ from kirovy.models.moderabile import Moderabile
 from kirovy.objects import ui_objects
 from kirovy.request import KirovyRequest
 from kirovy.response import KirovyResponse
+from kirovy.services.cncnet_ladder_service import cncnet_ladder
+from kirovy.services.response_cache_service import map_search_cache
 from kirovy.views.base_views import KirovyApiView
 
 
@@ -46,3 +48,41 @@ class BanView(KirovyApiView):
             status=status.HTTP_200_OK,
             data=ui_objects.ResultResponseData(message="Updated ban status for object", result=ban_data.model_dump()),
         )
+
+
+class ResponseCacheStatsView(KirovyApiView):
+    """Hit rates for the map search response cache.
+
+    ``GET /admin/response-cache/``
+
+    Stats are per worker process, so they only describe the worker that handled the request.
+    See :class:`kirovy.services.response_cache_service.ResponseCache`.
+    """
+
+    http_method_names = ["get"]
+    permission_classes = [permissions.IsStaff]
+
+    def get(self, request: KirovyRequest, **kwargs) -> KirovyResponse[ui_objects.ResultResponseData]:
+        return KirovyResponse(
+            status=status.HTTP_200_OK,
+            data=ui_objects.ResultResponseData(result=map_search_cache.stats()),
+        )
+
+
+class LadderStatsView(KirovyApiView):
+    """Latency and circuit breaker state for calls to the CnCNet ladder API.
+
+    ``GET /admin/ladder/``
+
+    Stats are per worker process, so they only describe the worker that handled the request.
+    See :class:`kirovy.services.cncnet_ladder_service.CncNetLadderClient`.
+    """
+
+    http_method_names = ["get"]
+    permission_classes = [permissions.IsStaff]
+
+    def get(self, request: KirovyRequest, **kwargs) -> KirovyResponse[ui_objects.ResultResponseData]:
+        return KirovyResponse(
+            status=status.HTTP_200_OK,
+            data=ui_objects.ResultResponseData(result=cncnet_ladder.stats()),
+        )
@@ -2,12 +2,18 @@
 Base views with common functionality for all API views in Kirovy
 """
 
+import base64
+import binascii
+import datetime
+import json
 from abc import ABCMeta
 
+from django.core.exceptions import FieldDoesNotExist
 from django.core.files.uploadedfile import UploadedFile, InMemoryUploadedFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
 from rest_framework import (
     generics as _g,
-    permissions as _p,
     pagination as _pagination,
     status,
 )
@@ -27,7 +33,7 @@ from kirovy.request import KirovyRequest
 from kirovy.response import KirovyResponse
 from kirovy.serializers import KirovySerializer, CncNetUserOwnedModelSerializer
 from kirovy.services.file_extension_service import FileExtensionService
-from kirovy.utils import file_utils
+from kirovy.utils import file_utils, query_utils
 
 _LOGGER = logging.get_logger(__name__)
 
@@ -50,21 +56,38 @@ class KirovyApiView(APIView):
         )
 
 
+COUNT_ESTIMATE: t.Final[str] = "estimate"
+"""attr: ``?count=estimate`` asks paginators for a cheap, possibly estimated, count.
+
+See :func:`kirovy.utils.query_utils.estimated_count`.
+"""
+
+
 class KirovyDefaultPagination(_pagination.LimitOffsetPagination):
-    """Default pagination values."""
+    """Default pagination values.
+
+    Always counts the results, but ``?count=estimate`` swaps the exact ``COUNT(*)`` for a planner estimate.
+    """
 
     default_limit = 30
     max_limit = 200
+    count_is_estimated: bool = False
+
+    def get_count(self, queryset: QuerySet) -> int:
+        if self.request.query_params.get(KirovyCursorPagination.count_query_param, "").lower() == COUNT_ESTIMATE:
+            count, self.count_is_estimated = query_utils.estimated_count(queryset)
+            return count
+        return super().get_count(queryset)
 
     def get_paginated_response(self, results: t.List[t.DictStrAny]) -> KirovyResponse[ui_objects.ListResponseData]:
-        data = kirovy.objects.ui_objects.ListResponseData(
-            results=results,
-            pagination_metadata=kirovy.objects.ui_objects.PaginationMetadata(
-                offset=self.offset,
-                limit=self.limit,
-                remaining_count=self.count,
-            ),
+        metadata = kirovy.objects.ui_objects.PaginationMetadata(
+            offset=self.offset,
+            limit=self.limit,
+            remaining_count=self.count,
         )
+        if self.count_is_estimated:
+            metadata["remaining_count_is_estimated"] = True
+        data = kirovy.objects.ui_objects.ListResponseData(results=results, pagination_metadata=metadata)
 
         return KirovyResponse(data, status=status.HTTP_200_OK)
 
@@ -72,6 +95,257 @@ class KirovyDefaultPagination(_pagination.LimitOffsetPagination):
     #     raise NotImplementedError()
 
 
+class KirovyCursorPagination(_pagination.BasePagination):
+    """Keyset pagination with an opaque cursor.
+
+    ``LIMIT ... OFFSET`` makes Postgres walk and throw away every row before the offset, so deep pages get slower.
+    This pagination seeks instead: the cursor holds the sort values of the last row on the page, and the next page
+    is ``WHERE (sort_key, id) > (last_sort_key, last_id)``. With a ``(sort_key, id)`` index every page costs the same.
+
+    -   The ordering comes from the queryset, e.g. from ``?ordering=`` or search rank, defaulting to
+        :attr:`~kirovy.views.base_views.KirovyCursorPagination.default_ordering`. ``id`` is appended as a tiebreaker
+        so that rows with equal sort keys are never skipped or repeated.
+    -   ``COUNT(*)`` over the filtered queryset only runs if the UI asks for it with ``?count=true``.
+        ``?count=estimate`` returns the planner's estimate instead for big results, e.g. "about 12,000 maps".
+    -   Requests with ``?offset=`` keep the old :class:`~kirovy.views.base_views.KirovyDefaultPagination` behaviour.
+        Every other request gets the cursor response, including the first page. So UIs that read ``offset`` or
+        ``remaining_count`` from a first page requested without ``?offset=`` must pass ``?offset=0``, or switch to
+        ``next_cursor`` and ``?count=``. See :class:`kirovy.objects.ui_objects.PaginationMetadata`.
+
+    Sort keys must be columns or annotations, not related fields that can repeat per row.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+    count_query_param = "count"
+    default_page_size = 30
+    max_page_size = 200
+    default_ordering: t.Tuple[str, ...] = ("-created",)
+    tiebreaker = "id"
+    allow_offset = True
+    """attr: Whether ``?offset=`` falls back to :class:`~kirovy.views.base_views.KirovyDefaultPagination`."""
+    allow_count = True
+    """attr: Whether ``?count=`` is honoured. Counting costs more the more rows match."""
+
+    page_size: int
+    next_cursor: t.Optional[str]
+    count: t.Optional[int]
+    count_is_estimated: bool
+    _offset_paginator: t.Optional[KirovyDefaultPagination] = None
+
+    def paginate_queryset(self, queryset: QuerySet, request: KirovyRequest, view=None) -> t.List[t.Any]:
+        ordering = self.get_ordering(queryset)
+        if self.allow_offset and "offset" in request.query_params:
+            # Offsets are only stable if every page is sorted the same way.
+            self._offset_paginator = KirovyDefaultPagination()
+            return self._offset_paginator.paginate_queryset(queryset.order_by(*ordering), request, view)
+
+        self.page_size = self.get_page_size(request)
+        self.count = None
+        self.count_is_estimated = False
+        count_mode = request.query_params.get(self.count_query_param, "").lower() if self.allow_count else ""
+        if count_mode in {"1", "true"}:
+            self.count = queryset.count()
+        elif count_mode == COUNT_ESTIMATE:
+            self.count, self.count_is_estimated = query_utils.estimated_count(queryset)
+
+        queryset = queryset.order_by(*ordering)
+        if encoded_cursor := request.query_params.get(self.cursor_query_param):
+            values = self.decode_cursor(encoded_cursor, ordering)
+            queryset = queryset.filter(self.seek_filter(ordering, values, self.get_nullable_fields(queryset, ordering)))
+
+        # Fetch one extra row to know if there is a next page, without counting.
+        rows = list(queryset[: self.page_size + 1])
+        page, has_next = rows[: self.page_size], len(rows) > self.page_size
+        self.next_cursor = self.encode_cursor(ordering, page[-1]) if has_next else None
+        return page
+
+    def get_paginated_response(self, results: t.List[t.DictStrAny]) -> KirovyResponse[ui_objects.ListResponseData]:
+        if self._offset_paginator:
+            return self._offset_paginator.get_paginated_response(results)
+
+        metadata = ui_objects.PaginationMetadata(limit=self.page_size, next_cursor=self.next_cursor)
+        if self.count is not None:
+            metadata["remaining_count"] = self.count
+        if self.count_is_estimated:
+            metadata["remaining_count_is_estimated"] = True
+        return KirovyResponse(
+            ui_objects.ListResponseData(results=results, pagination_metadata=metadata), status=status.HTTP_200_OK
+        )
+
+    def get_page_size(self, request: KirovyRequest) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.default_page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, queryset: QuerySet) -> t.List[str]:
+        """Get the queryset's ordering, with the tiebreaker appended in the same direction as the last sort key.
+
+        Matching directions let Postgres scan a ``(sort_key, id)`` index forwards or backwards.
+        """
+        ordering = [x for x in queryset.query.order_by if isinstance(x, str) and x != "?"]
+        if len(ordering) != len(queryset.query.order_by) or not ordering:
+            ordering = list(self.default_ordering)
+
+        ordering = [x for x in ordering if x.lstrip("-") not in {self.tiebreaker, "pk"}]
+        is_descending = bool(ordering) and ordering[-1].startswith("-")
+        return ordering + [f"-{self.tiebreaker}" if is_descending else self.tiebreaker]
+
+    def encode_cursor(self, ordering: t.List[str], row: t.Any) -> str:
+        values = []
+        for field in ordering:
+            if isinstance(row, dict):
+                # Rows from ``.values()`` are keyed by the full lookup.
+                value = row.get(field.lstrip("-"))
+            else:
+                value = row
+                for attr in field.lstrip("-").split("__"):
+                    value = getattr(value, attr, None)
+            values.append(value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else value)
+
+        payload = json.dumps({"o": ordering, "v": values}, cls=DjangoJSONEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, encoded_cursor: str, ordering: t.List[str]) -> t.List[t.Any]:
+        """Decode a cursor from :func:`~kirovy.views.base_views.KirovyCursorPagination.encode_cursor`.
+
+        :raises KirovyValidationError:
+            If the cursor is garbage, or was made for a different ordering than this request.
+        """
+        try:
+            padded = encoded_cursor + "=" * (-len(encoded_cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            is_valid = payload["o"] == ordering and len(payload["v"]) == len(ordering)
+        except (ValueError, TypeError, KeyError, binascii.Error):
+            is_valid = False
+
+        if not is_valid:
+            raise KirovyValidationError(
+                "Invalid cursor. Cursors only work with the same ordering they were made for.",
+                code=api_codes.GenericApiCodes.INVALID_QUERY_PARAM,
+                additional={"param": self.cursor_query_param},
+            )
+        return payload["v"]
+
+    @staticmethod
+    def seek_filter(
+        ordering: t.List[str], values: t.List[t.Any], nullable_fields: t.Optional[t.Collection[str]] = None
+    ) -> Q:
+        """Build the filter for rows after ``values`` in ``ordering``.
+
+        This is the expanded form of a row comparison, ``a > x OR (a = x AND b > y) ...``, because each key can sort
+        in a different direction. Postgres sorts ``NULL`` last when ascending and first when descending.
+
+        Postgres can't use the expansion as an index condition, so it would filter every row before the cursor. An
+        inclusive bound on the first key, ``a >= x AND (...)``, lets the index scan start at the cursor instead.
+
+        :param nullable_fields:
+            The sort keys that can be ``NULL``. ``None`` assumes that any of them can be.
+        """
+        seek = Q(pk__in=[])
+        bound = Q()
+        previous_keys_equal = Q()
+        for index, (field, value) in enumerate(zip(ordering, values)):
+            name = field.lstrip("-")
+            is_descending = field.startswith("-")
+            is_null = Q(**{f"{name}__isnull": True})
+            if value is None:
+                after = Q(**{f"{name}__isnull": False}) if is_descending else Q(pk__in=[])
+                at_or_after = Q() if is_descending else is_null
+                equal = is_null
+            else:
+                after = Q(**{f"{name}__{'lt' if is_descending else 'gt'}": value})
+                at_or_after = Q(**{f"{name}__{'lte' if is_descending else 'gte'}": value})
+                if not is_descending and (nullable_fields is None or name in nullable_fields):
+                    after |= is_null
+                    at_or_after |= is_null
+                equal = Q(**{name: value})
+            if index == 0:
+                bound = at_or_after
+            seek |= previous_keys_equal & after
+            previous_keys_equal &= equal
+        return bound & seek
+
+    def get_nullable_fields(self, queryset: QuerySet, ordering: t.List[str]) -> t.Set[str]:
+        """Get the sort keys that can be ``NULL``. Annotations can always be ``NULL``, as far as we know."""
+        nullable_fields = set()
+        for name in (field.lstrip("-") for field in ordering):
+            try:
+                if queryset.model._meta.get_field(name).null:
+                    nullable_fields.add(name)
+            except FieldDoesNotExist:
+                nullable_fields.add(name)
+        return nullable_fields
+
+    def get_paginated_response_schema(self, schema: t.DictStrAny) -> t.DictStrAny:
+        return {
+            "type": "object",
+            "required": ["results", "pagination_metadata"],
+            "properties": {
+                "results": schema,
+                "pagination_metadata": {
+                    "type": "object",
+                    "required": ["limit"],
+                    "properties": {
+                        "limit": {"type": "integer"},
+                        "next_cursor": {
+                            "type": "string",
+                            "nullable": True,
+                            "description": "Pass as ``?cursor=`` to get the next page. Null on the last page. "
+                            "Not set for ``?offset=`` requests.",
+                        },
+                        "offset": {"type": "integer", "description": "Only set for ``?offset=`` requests."},
+                        "remaining_count": {
+                            "type": "integer",
+                            "description": "Only set for ``?offset=`` requests, or with ``?count=``.",
+                        },
+                        "remaining_count_is_estimated": {"type": "boolean"},
+                    },
+                },
+            },
+        }
+
+    def get_schema_operation_parameters(self, view) -> t.List[t.DictStrAny]:
+        offset_parameters = []
+        if self.allow_offset:
+            offset_parameters.append(
+                {
+                    "name": KirovyDefaultPagination.offset_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Use offset pagination instead of cursors. The response has ``offset`` and "
+                    "``remaining_count`` instead of ``next_cursor``.",
+                    "schema": {"type": "integer"},
+                }
+            )
+        return offset_parameters + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The ``next_cursor`` from the previous page.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Results per page. At most {self.max_page_size}.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "If true, also return the total number of results. This is slow for big searches. "
+                "If ``estimate``, big counts are estimated and ``remaining_count_is_estimated`` is set.",
+                "schema": {"type": "string", "enum": ["true", COUNT_ESTIMATE]},
+            },
+        ]
+
+
 class KirovyListCreateView(_g.ListCreateAPIView):
     """Base view for listing and creating objects.
 
@@ -79,8 +353,8 @@ class KirovyListCreateView(_g.ListCreateAPIView):
     """
 
     permission_classes = [permissions.CanUpload | permissions.ReadOnly]
-    pagination_class: t.Optional[t.Type[KirovyDefaultPagination]] = KirovyDefaultPagination
-    _paginator: t.Optional[KirovyDefaultPagination]
+    pagination_class: t.Optional[t.Type[_pagination.BasePagination]] = KirovyCursorPagination
+    _paginator: t.Optional[_pagination.BasePagination]
     request: KirovyRequest  # Added for type hinting. Populated by DRF ``.setup()``
 
     def initialize_request(self, request, *args, **kwargs):
@@ -127,7 +401,7 @@ class KirovyListCreateView(_g.ListCreateAPIView):
         return super().get_paginated_response(data)
 
     @property
-    def paginator(self) -> t.Optional[KirovyDefaultPagination]:
+    def paginator(self) -> t.Optional[_pagination.BasePagination]:
         """Just here for type hinting."""
         return super().paginator
 
@@ -197,7 +471,7 @@ class KirovyDestroyView(_g.DestroyAPIView):
     """
 
     request: KirovyRequest  # Added for type hinting. Populated by DRF ``.setup()``
-    permission_classes = [permissions.CanDelete | _p.IsAdminUser]
+    permission_classes = [permissions.CanDelete]
 
     def initialize_request(self, request, *args, **kwargs):
         """
@@ -1,26 +1,43 @@
 import pathlib
 from uuid import UUID
 
-from django.db.models import Q, QuerySet
-from django.http import FileResponse
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import F, FloatField, Q, QuerySet
+from django.db.models.functions import Cast, Lower
+from django.http import StreamingHttpResponse
+from django.utils import text as text_utils
+from django.utils.cache import patch_cache_control
+from django.utils.functional import SimpleLazyObject
 from rest_framework import status
-from rest_framework.exceptions import PermissionDenied
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.exceptions import APIException, PermissionDenied
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
 from django_filters import rest_framework as filters
 from rest_framework.permissions import AllowAny
 from rest_framework.renderers import TemplateHTMLRenderer
+from rest_framework.utils.urls import replace_query_param
 
-from kirovy import permissions
+from kirovy import constants, permissions, typing as t
+from kirovy.constants import api_codes
+from kirovy.exceptions.view_exceptions import KirovyValidationError
 from kirovy.models import (
     MapCategory,
     CncGame,
     CncMap,
     CncMapFile,
 )
+from kirovy.models.cnc_map import PUBLICLY_LISTED_MAPS
 from kirovy.objects import ui_objects
 from kirovy.request import KirovyRequest
 from kirovy.response import KirovyResponse
 from kirovy.serializers import cnc_map_serializers
+from kirovy.serializers.projections import ValuesProjection
+from kirovy.services.download_counter_service import download_counter
+from kirovy.services.game_tree_service import game_tree
+from kirovy.services.map_facet_service import MapFacetService
+from kirovy.services.response_cache_service import map_search_cache
+from kirovy.services.file_download_service import FileDownloadService, ZipStreamEntry, ZipStreamService
 from kirovy.views import base_views
 from structlog import get_logger
 
@@ -37,6 +54,14 @@ class MapCategoryListCreateView(base_views.KirovyListCreateView):
     queryset = MapCategory.objects.all()
 
 
+class UUIDInFilter(filters.BaseInFilter, filters.UUIDFilter):
+    """Comma separated UUIDs, e.g. ``?ids=uuid1,uuid2``."""
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    """Comma separated strings, e.g. ``?sha1=hash1,hash2``."""
+
+
 class MapListFilters(filters.FilterSet):
     """The filters for the map list endpoint.
 
@@ -51,17 +76,37 @@ class MapListFilters(filters.FilterSet):
     """
 
     include_edits = filters.BooleanFilter(field_name="parent_id", method="filter_include_map_edits")
-    # include_maps_from_sub_games = filters.BooleanFilter(
-    #     field_name="cnc_game__parent_id", method="filter_include_maps_from_sub_games"
-    # )
+    include_maps_from_sub_games = filters.BooleanFilter(method="filter_noop")
+    """attr: Also return maps for the expansions and mods of the selected games. e.g. YR maps for RA2."""
+    include_compatible_maps = filters.BooleanFilter(method="filter_noop")
+    """attr: Also return maps from parent games that work in the selected games. e.g. RA2 maps for YR.
+
+    See :attr:`kirovy.models.cnc_game.CncGame.compatible_with_parent_maps`.
+    """
     cnc_game = filters.ModelMultipleChoiceFilter(
-        field_name="cnc_game__id", to_field_name="id", queryset=CncGame.objects.filter(is_visible=True)
+        field_name="cnc_game__id",
+        to_field_name="id",
+        queryset=CncGame.objects.filter(is_visible=True),
+        method="filter_games",
+    )
+    game_slug = filters.CharFilter(field_name="cnc_game__slug", method="filter_game_slug")
+    categories = filters.ModelMultipleChoiceFilter(queryset=MapCategory.objects.all(), method="filter_categories")
+    """attr: Matches maps in any of the categories, e.g. ``?categories=uuid1&categories=uuid2``."""
+    all_categories = filters.ModelMultipleChoiceFilter(
+        queryset=MapCategory.objects.all(), method="filter_all_categories"
+    )
+    """attr: Matches maps that are in every one of the categories."""
+    ids = UUIDInFilter(field_name="id", lookup_expr="in")
+    sha1 = CharInFilter(field_name="cncmapfile__hash_sha1", lookup_expr="in", distinct=True)
+    """attr: Matches maps with any file version that has one of the hashes. Lobbies only know the sha1."""
+    size = filters.MultipleChoiceFilter(
+        choices=[(bucket.value, bucket.value) for bucket in constants.MapSizeBuckets], method="filter_size"
     )
-    game_slug = filters.CharFilter(field_name="cnc_game__slug")
+    """attr: Matches maps in any of the size buckets, e.g. ``?size=small&size=medium``. See ``/maps/facets/``."""
 
     class Meta:
         model = CncMap
-        fields = ["is_legacy", "is_reviewed", "parent", "categories"]
+        fields = ["is_legacy", "is_reviewed", "parent"]
 
     def filter_include_map_edits(self, queryset: QuerySet[CncMap], name: str, value: bool) -> QuerySet[CncMap]:
         """We will exclude maps that are edits of other maps by default.
@@ -86,39 +131,191 @@ class MapListFilters(filters.FilterSet):
 
         return queryset
 
-    # TODO: Does anyone even want this behavior?
-    # def filter_include_maps_from_sub_games(
-    #     self, queryset: QuerySet[CncMap], name: str, value: bool
-    # ) -> QuerySet[CncMap]:
-    #     """We will exclude maps that are for sub games of the selected games by default.
-    #
-    #     If ``value`` is true, then we will return maps for sub games.
-    #     e.g. return Yuri's Revenge maps if game is Red Alert 2.
-    #
-    #     Sub games can also be mods, according to the database, so make sure to set the filter for including mods
-    #     too.
-    #
-    #     See: :attr:`kirovy.models.cnc_game.CncGame.parent_game`.
-    #
-    #     :param queryset:
-    #         The queryset that we will modify with our filters.
-    #     :param name:
-    #         The name of the field. We don't use it, but it's required for the interface.
-    #     :param value:
-    #         The value from the UI. If ``True``, then we will include maps for sub games of the game filter.
-    #     :return:
-    #         The queryset, maybe modified to include maps for sub games.
-    #     """
-    #     specified_games = self.data["cnc_game"]
-    #     if not specified_games:
-    #         # The user didn't specify a game, so don't perform any modifications to the query.
-    #         return queryset
-    #     if not value:
-    #         # User provided games, but does not want to see sub games.
-    #         return queryset.exclude(cnc_game__parent_game_id__isnull=False)
-    #
-    #     # User wants to see sub games
-    #     return queryset | CncMap.objects.filter(cnc_game__parent_game__in=)
+    def filter_categories(self, queryset: QuerySet[CncMap], name: str, value: t.List[MapCategory]) -> QuerySet[CncMap]:
+        """Filter with ``category_ids && ARRAY[...]``, which uses the GIN index and doesn't need ``DISTINCT``.
+
+        See :attr:`kirovy.models.cnc_map.CncMap.category_ids`.
+        """
+        if not value:
+            return queryset
+        return queryset.filter(category_ids__overlap=[category.id for category in value])
+
+    def filter_all_categories(
+        self, queryset: QuerySet[CncMap], name: str, value: t.List[MapCategory]
+    ) -> QuerySet[CncMap]:
+        """Filter with ``category_ids @> ARRAY[...]``, which also uses the GIN index."""
+        if not value:
+            return queryset
+        return queryset.filter(category_ids__contains=[category.id for category in value])
+
+    def filter_size(self, queryset: QuerySet[CncMap], name: str, value: t.List[str]) -> QuerySet[CncMap]:
+        """Filter by :class:`kirovy.constants.MapSizeBuckets`, using the size of each map's latest file."""
+        if not value:
+            return queryset
+        return MapFacetService.filter_size_buckets(queryset, value)
+
+    def filter_noop(self, queryset: QuerySet[CncMap], name: str, value: t.Any) -> QuerySet[CncMap]:
+        """For params that change how other filters behave, rather than filtering by themselves."""
+        return queryset
+
+    def filter_games(self, queryset: QuerySet[CncMap], name: str, value: t.List[CncGame]) -> QuerySet[CncMap]:
+        if not value:
+            return queryset
+        return queryset.filter(cnc_game_id__in=self.expand_game_ids([game.id for game in value]))
+
+    def filter_game_slug(self, queryset: QuerySet[CncMap], name: str, value: str) -> QuerySet[CncMap]:
+        if not value:
+            return queryset
+        game_id = game_tree.get(slug=value).ids_by_slug.get(value)
+        if game_id is None:
+            return queryset.none()
+        return queryset.filter(cnc_game_id__in=self.expand_game_ids([game_id]))
+
+    def expand_game_ids(self, game_ids: t.List[UUID]) -> t.Set[UUID]:
+        """Add the sub games and compatible parent games that the request asked for to the selected games.
+
+        Uses the in-memory :class:`~kirovy.services.game_tree_service.GameTree`, so the map query stays a plain
+        ``cnc_game_id IN (...)`` instead of joining up and down the game hierarchy.
+        """
+        tree = game_tree.get(game_ids)
+        expanded = set(game_ids)
+        for game_id in game_ids:
+            if self.form.cleaned_data.get("include_maps_from_sub_games"):
+                expanded |= {game.id for game in tree.descendants(game_id)}
+            if self.form.cleaned_data.get("include_compatible_maps"):
+                expanded |= {game.id for game in tree.compatible_ancestors(game_id)}
+        return expanded
+
+
+class MapOrderingFilter(OrderingFilter):
+    """Ordering filter that also accepts friendly aliases for precomputed sort columns.
+
+    e.g. ``/maps/search/?ordering=popular`` sorts by most downloaded, and ``?ordering=-popular`` reverses it.
+    """
+
+    ordering_aliases: t.Dict[str, str] = {
+        "popular": "-download_count",
+        "trending": "-trending_score",
+    }
+    """attr: Maps an alias to the ordering field it stands for. Aliased fields must also be in ``ordering_fields``."""
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        expanded: t.List[str] = []
+        for field in fields:
+            alias = self.ordering_aliases.get(field.lstrip("-"))
+            if not alias:
+                expanded.append(field)
+            elif field.startswith("-"):
+                # Reverse the alias, e.g. "-popular" is least downloaded first.
+                expanded.append(alias[1:] if alias.startswith("-") else f"-{alias}")
+            else:
+                expanded.append(alias)
+
+        return super().remove_invalid_fields(queryset, expanded, view, request)
+
+
+class MapFullTextSearchFilter(BaseFilterBackend):
+    """Full-text search on :attr:`kirovy.models.cnc_map.CncMap.search_vector`, ranked by relevance.
+
+    The search term is parsed with ``websearch_to_tsquery``, so users can type e.g. ``"tour of egypt" -naval`` or
+    ``islands or coast``. Matching uses the GIN index, so it doesn't slow down as the catalog grows, unlike the
+    ``ILIKE '%term%'`` that DRF's ``SearchFilter`` generates.
+
+    If nothing matches, e.g. because the user typed ``tour of egipt``, we fall back to trigram similarity on
+    :attr:`~kirovy.models.cnc_map.CncMap.map_name`, which uses the ``gin_trgm_ops`` index.
+    The similarity cut-off can be set with ``?similarity=0.4``.
+
+    Checking for full-text matches up front would run the search twice. Views with
+    :attr:`~kirovy.views.cnc_map_views.MapListView.search_fallback_from_page` get the full-text results, and filter
+    again with :attr:`~kirovy.views.cnc_map_views.MapListView.search_by_similar_names` if their first page is empty.
+
+    Results are sorted best match first, unless the request also has an ``ordering``.
+    """
+
+    search_param = "search"
+    similarity_param = "similarity"
+
+    def get_search_term(self, request: KirovyRequest, view) -> str:
+        return request.query_params.get(getattr(view, "search_param", self.search_param), "").strip()
+
+    def get_similarity_threshold(self, request: KirovyRequest) -> float:
+        """Get the trigram similarity cut-off from the request.
+
+        :return:
+            A float in ``(0, 1]``. Defaults to :attr:`kirovy.settings._base.MAP_NAME_SIMILARITY_THRESHOLD`.
+        :raises KirovyValidationError:
+            If the param isn't a number in ``(0, 1]``.
+        """
+        raw_threshold = request.query_params.get(self.similarity_param)
+        if raw_threshold is None:
+            return settings.MAP_NAME_SIMILARITY_THRESHOLD
+        try:
+            threshold = float(raw_threshold)
+        except ValueError:
+            threshold = -1.0
+        if not 0 < threshold <= 1:
+            raise KirovyValidationError(
+                f"{self.similarity_param} must be a number greater than 0, and at most 1.",
+                code=api_codes.GenericApiCodes.INVALID_QUERY_PARAM,
+                additional={"param": self.similarity_param},
+            )
+        return threshold
+
+    def filter_queryset(self, request: KirovyRequest, queryset: QuerySet[CncMap], view) -> QuerySet[CncMap]:
+        search_term = self.get_search_term(request, view)
+        if not search_term:
+            return queryset
+        # Validate before picking a search, so a bad param fails whether or not full-text search finds anything.
+        threshold = self.get_similarity_threshold(request)
+        if getattr(view, "search_by_similar_names", False):
+            return self.filter_similar_names(queryset, search_term, threshold)
+
+        query = SearchQuery(search_term, search_type="websearch", config=CncMap.SEARCH_CONFIG)
+        full_text_results = queryset.filter(search_vector=query)
+        if getattr(view, "search_fallback_from_page", False):
+            view.search_can_fall_back = True
+        elif not full_text_results.exists():
+            return self.filter_similar_names(queryset, search_term, threshold)
+
+        # Ranks are ``real``. Cast them so that cursor pagination can round trip them exactly.
+        return full_text_results.annotate(
+            search_rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+        ).order_by("-search_rank", "-created")
+
+    @staticmethod
+    def filter_similar_names(queryset: QuerySet[CncMap], search_term: str, threshold: float) -> QuerySet[CncMap]:
+        """Filter to maps whose names are similar to ``search_term``, most similar first.
+
+        The ``%`` operator is the only trigram comparison the GIN index can answer, and it compares against
+        ``pg_trgm.similarity_threshold``. So we set the threshold for this connection rather than filtering on
+        ``similarity() >= x``, which would compute the similarity for every row.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_limit(%s)", [threshold])
+
+        return (
+            queryset.filter(map_name__trigram_similar=search_term)
+            .annotate(search_rank=Cast(TrigramSimilarity("map_name", search_term), FloatField()))
+            .order_by("-search_rank", "-created")
+        )
+
+    def get_schema_operation_parameters(self, view) -> t.List[t.DictStrAny]:
+        return [
+            {
+                "name": getattr(view, "search_param", self.search_param),
+                "required": False,
+                "in": "query",
+                "description": "Web search style terms, e.g. quoted phrases, `or`, and `-excluded`.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.similarity_param,
+                "required": False,
+                "in": "query",
+                "description": "How similar map names must be when no map matches the search terms exactly. (0, 1].",
+                "schema": {"type": "number"},
+            },
+        ]
 
 
 class MapListView(base_views.KirovyListCreateView):
@@ -147,56 +344,286 @@ class MapListView(base_views.KirovyListCreateView):
 
         """
         base_query = (
-            CncMap.objects.filter(
-                Q(is_banned=False, is_published=True, incomplete_upload=False, is_temporary=False)
-                | Q(is_legacy=True)
-                | Q(is_mapdb1_compatible=True)
-            ).filter(cnc_game__is_visible=True)
-            # Prefetch data necessary to the map grid. Pre-fetching avoids hitting the database in a loop.
-            .select_related("cnc_user", "cnc_game", "parent", "parent__cnc_user")
-            # Prefetch the categories because they're displayed like tags.
-            # TODO: Since the category list is going to be somewhat small,
-            #  maybe the UI should just cache them and I return IDs instead of objects?
-            .prefetch_related("categories", "cncmapfile_set", "cncmapimagefile_set")
+            # Must stay the exact predicate of the partial indexes on ``CncMap``.
+            CncMap.objects.filter(PUBLICLY_LISTED_MAPS).filter(cnc_game__is_visible=True)
         )
+        # Columns, joins, and prefetches are added for the requested fields in ``filter_queryset``.
         return base_query
 
+    default_fields: t.Optional[t.Set[str]] = None
+    """attr: The fields to return when the request doesn't have ``?fields=``. ``None`` returns every field."""
+
+    def get_requested_fields(self) -> t.Optional[t.Set[str]]:
+        """Get the fields to serialize from ``?fields=`` and ``?expand=``.
+
+        e.g. ``?fields=card`` for the search grid, or ``?fields=card&expand=files``.
+        See :attr:`kirovy.serializers.cnc_map_serializers.CncMapBaseSerializer.Meta.field_sets`.
+        """
+        if not hasattr(self, "_requested_fields"):
+
+            def _split(param: str) -> t.List[str]:
+                return [x.strip() for x in self.request.query_params.get(param, "").split(",") if x.strip()]
+
+            self._requested_fields = self.get_serializer_class().requested_fields(
+                _split("fields"), _split("expand"), default=self.default_fields
+            )
+        return self._requested_fields
+
+    def get_serializer_context(self) -> t.DictStrAny:
+        context = super().get_serializer_context()
+        context["fields"] = self.get_requested_fields()
+        return context
+
+    def filter_queryset(self, queryset: QuerySet[CncMap]) -> QuerySet[CncMap]:
+        """Filter, then load only what the requested fields need. Pre-fetching avoids hitting the database in a loop."""
+        queryset = super().filter_queryset(queryset)
+        return self.get_serializer_class().optimize_queryset(
+            queryset, self.get_requested_fields(), ordering=queryset.query.order_by
+        )
+
     filter_backends = [
         filters.DjangoFilterBackend,  # filter first to reduce the count of rows that we full text search on.
-        SearchFilter,
-        OrderingFilter,
+        MapFullTextSearchFilter,
+        MapOrderingFilter,
     ]
     filterset_class = MapListFilters
 
     search_param = "search"
     """attr: The query param to use in the URL
 
-     Searches the fields defined in :attr:`~kirovy.views.cnc_map_views.MapListView`
-     """
-
-    search_fields = [
-        "map_name",
-        "^description",
-    ]
-    """
-    attr: Fields that can be text searched using query params.
-    `Django REST Framework docs <https://www.django-rest-framework.org/api-guide/filtering/#searchfilter>`_.
-    `Built-in django search docs <https://docs.djangoproject.com/en/4.2/ref/contrib/postgres/search/>`_.
+    Full-text searches :attr:`kirovy.models.cnc_map.CncMap.search_vector`. See
+    :class:`~kirovy.views.cnc_map_views.MapFullTextSearchFilter`.
     """
 
     ordering_fields = [
         "map_name",
-        "cnc_map_file__created",  # For finding maps with new file versions.
-        "cnc_map_file__width",
-        "cnc_map_file__height",
+        "latest_file_created",  # For finding maps with new file versions.
+        "width",
+        "height",
+        "file_count",
+        "image_count",
+        "download_count",
+        "trending_score",
     ]
     """
     attr: The fields we will sort ordering by.
     `Docs <https://www.django-rest-framework.org/api-guide/filtering/#orderingfilter>`_
+
+    ``popular`` and ``trending`` are aliases, see :class:`~kirovy.views.cnc_map_views.MapOrderingFilter`.
     """
 
     serializer_class = cnc_map_serializers.CncMapBaseSerializer
 
+    projection_class: t.Optional[t.Type[ValuesProjection]] = cnc_map_serializers.CncMapListProjection
+    """attr: Builds the list output from ``.values()`` rows instead of the serializer. ``None`` always serializes.
+
+    See :class:`kirovy.serializers.projections.ValuesProjection`.
+    """
+
+    search_by_similar_names: bool = False
+    """attr: Set once full-text search found nothing, so that searches match similar map names instead.
+
+    See :class:`~kirovy.views.cnc_map_views.MapFullTextSearchFilter`.
+    """
+
+    search_can_fall_back: bool = False
+    """attr: Set by :class:`~kirovy.views.cnc_map_views.MapFullTextSearchFilter` when it left the fallback to us."""
+
+    @property
+    def search_fallback_from_page(self) -> bool:
+        """Whether an empty first page decides the fallback to similar map names, instead of a separate query.
+
+        Only cursor pages can tell "no matches" from "past the last match". A cursor is only handed out if more rows
+        follow, so an empty cursor page means the cursor came from the similar names.
+        """
+        paginator = self.paginator
+        if not isinstance(paginator, base_views.KirovyCursorPagination):
+            return False
+        return not (paginator.allow_offset and "offset" in self.request.query_params)
+
+    def list(self, request: KirovyRequest, *args, **kwargs) -> KirovyResponse[ui_objects.ListResponseData]:
+        """List maps, skipping the serializer when the requested fields can be projected from ``.values()``."""
+        projection = self.projection_class and self.projection_class(
+            self.get_serializer_class(), self.get_serializer_context()
+        )
+        if not (projection and projection.is_supported):
+            projection = None
+
+        page = self.paginate_queryset(self.get_list_queryset(projection))
+        if page == [] and self.search_can_fall_back:
+            self.search_by_similar_names = True
+            page = self.paginate_queryset(self.get_list_queryset(projection))
+
+        if page is None:
+            rows = self.get_list_queryset(projection)
+            results = projection.project(list(rows)) if projection else self.get_serializer(rows, many=True).data
+            return KirovyResponse(ui_objects.ListResponseData(results=results), status=status.HTTP_200_OK)
+        results = projection.project(page) if projection else self.get_serializer(page, many=True).data
+        return self.get_paginated_response(results)
+
+    def get_list_queryset(self, projection: t.Optional[ValuesProjection]) -> QuerySet:
+        queryset = self.filter_queryset(self.get_queryset())
+        return projection.values_queryset(queryset) if projection else queryset
+
+    def get(self, request: KirovyRequest, *args, **kwargs) -> KirovyResponse:
+        """List maps. Anonymous searches are served from :data:`kirovy.services.response_cache_service.map_search_cache`."""
+        return map_search_cache.cached_response(
+            request, lambda: super(MapListView, self).get(request, *args, **kwargs), self.get_cache_params()
+        )
+
+    def get_cache_params(self) -> t.Set[str]:
+        """Get the query params that change the response. Only these are part of the response cache key.
+
+        Anyone can add params that we don't read, so keying on the whole query string would let them fill the cache.
+        """
+        params = {
+            *self.filterset_class.base_filters,
+            self.search_param,
+            MapFullTextSearchFilter.similarity_param,
+            MapOrderingFilter.ordering_param,
+            "fields",
+            "expand",
+        }
+        paginator = self.paginator
+        if isinstance(paginator, base_views.KirovyCursorPagination):
+            params |= {paginator.cursor_query_param, paginator.page_size_query_param, paginator.count_query_param}
+            if paginator.allow_offset:
+                params |= {
+                    base_views.KirovyDefaultPagination.offset_query_param,
+                    base_views.KirovyDefaultPagination.limit_query_param,
+                }
+        return params
+
+
+class MapBulkDownloadView(MapListView):
+    """Download the latest file for many maps as one streamed zip.
+
+    Takes the same filters as :class:`~kirovy.views.cnc_map_views.MapListView`, so a map pool can be picked by
+    ``?ids=``, by ``?sha1=``, or by re-using the query string of a search.
+
+    e.g. ``/maps/download/?ids=uuid1,uuid2`` or ``/maps/download/?game_slug=yr&categories=uuid3``
+    """
+
+    pagination_class = None
+
+    def get(self, request: KirovyRequest, *args, **kwargs) -> KirovyResponse | StreamingHttpResponse:
+        max_maps = settings.MAX_MAPS_PER_BULK_DOWNLOAD
+        # Ordering isn't needed to pick the maps, and the list prefetches are ignored for ``values_list``.
+        map_ids = list(
+            self.filter_queryset(self.get_queryset()).order_by().values_list("id", flat=True)[: max_maps + 1]
+        )
+        if not map_ids:
+            return KirovyResponse(status=status.HTTP_404_NOT_FOUND)
+        if len(map_ids) > max_maps:
+            raise KirovyValidationError(
+                f"Too many maps. Download at most {max_maps} maps at once.",
+                code=api_codes.DownloadApiCodes.TOO_MANY_MAPS,
+                additional={"max_maps": max_maps},
+            )
+
+        # Only the latest version of each map. ``DISTINCT ON`` picks the first row per map from the ordering.
+        map_files = (
+            CncMapFile.objects.filter(cnc_map_id__in=map_ids)
+            .order_by("cnc_map_id", "-version")
+            .distinct("cnc_map_id")
+            .select_related("cnc_map")
+            .only("file", "hash_sha1", "cnc_map__map_name")
+        )
+        entries = []
+        for map_file in map_files:
+            download_counter.record(map_file.cnc_map_id)
+            entries.append(
+                ZipStreamEntry(
+                    map_file.file.name,
+                    f"{text_utils.slugify(map_file.cnc_map.map_name) or 'map'}_{map_file.hash_sha1}"
+                    f"{pathlib.Path(map_file.file.name).suffix}",
+                )
+            )
+
+        return ZipStreamService.streamed_zip_response(entries, "maps.zip")
+
+
+class MapFacetsView(MapListView):
+    """Count the maps matching a search by game, category, and size, to show next to the search filters.
+
+    Takes the same filters as :class:`~kirovy.views.cnc_map_views.MapListView`,
+    e.g. ``/maps/facets/?game_slug=yr&search=naval``. Returns :class:`kirovy.objects.ui_objects.MapFacets`.
+    """
+
+    pagination_class = None
+
+    def get(self, request: KirovyRequest, *args, **kwargs) -> KirovyResponse[ui_objects.ResultResponseData]:
+        return map_search_cache.cached_response(
+            request,
+            lambda: KirovyResponse(
+                ui_objects.ResultResponseData(
+                    result=MapFacetService.facet_counts(self.filter_queryset(self.get_queryset()))
+                ),
+                status=status.HTTP_200_OK,
+            ),
+            self.get_cache_params(),
+        )
+
+
+class MapAutocompleteView(KirovyApiView):
+    """Suggest map names for what the user has typed in the search box so far.
+
+    ``GET /maps/autocomplete/?q=islan&game_slug=yr&limit=10``. Returns a list of
+    :class:`kirovy.objects.ui_objects.MapNameSuggestion`, most downloaded first.
+
+    Names are matched by case-insensitive prefix, using the ``cncmap_public_name_prefix_idx`` index, rather than
+    running a full search per keystroke. Suggestions are the same for every user, so responses are cached by prefix
+    in :data:`kirovy.services.response_cache_service.map_search_cache` and marked cacheable for browsers.
+    """
+
+    http_method_names = ["get"]
+    permission_classes = [AllowAny]
+    prefix_param = "q"
+    default_limit = 10
+
+    def get(self, request: KirovyRequest, *args, **kwargs) -> KirovyResponse[ui_objects.ListResponseData]:
+        response = map_search_cache.cached_response(
+            request,
+            lambda: KirovyResponse(
+                ui_objects.ListResponseData(results=self.get_suggestions(request)), status=status.HTTP_200_OK
+            ),
+            {self.prefix_param, "game_slug", "limit"},
+            anonymous_only=False,
+        )
+        patch_cache_control(response, public=True, max_age=settings.MAP_AUTOCOMPLETE_MAX_AGE)
+        return response
+
+    def get_limit(self, request: KirovyRequest) -> int:
+        try:
+            limit = int(request.query_params["limit"])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(max(limit, 1), settings.MAP_AUTOCOMPLETE_MAX_RESULTS)
+
+    def get_suggestions(self, request: KirovyRequest) -> t.List[ui_objects.MapNameSuggestion]:
+        prefix = request.query_params.get(self.prefix_param, "").strip().lower()
+        if len(prefix) < settings.MAP_AUTOCOMPLETE_MIN_PREFIX_LENGTH:
+            return []
+
+        # Games come from the in-memory tree, so the query never joins ``CncGame``.
+        game_slug = request.query_params.get("game_slug")
+        tree = game_tree.get(slug=game_slug or None)
+        game_ids = [game.id for game in tree.nodes.values() if game.is_visible]
+        if game_slug:
+            game_ids = [game_id for game_id in game_ids if tree.get(game_id).slug == game_slug]
+
+        rows = (
+            CncMap.objects.filter(PUBLICLY_LISTED_MAPS)
+            .alias(map_name_lower=Lower("map_name"))
+            .filter(map_name_lower__startswith=prefix, cnc_game_id__in=game_ids)
+            .order_by("-download_count", "map_name", "id")
+            .values_list("id", "map_name", "cnc_game_id")[: self.get_limit(request)]
+        )
+        return [
+            ui_objects.MapNameSuggestion(id=str(map_id), map_name=map_name, game_slug=tree.get(game_id).slug)
+            for map_id, map_name, game_id in rows
+        ]
+
 
 class MapRetrieveUpdateView(base_views.KirovyRetrieveUpdateView):
     serializer_class = cnc_map_serializers.CncMapBaseSerializer
@@ -220,7 +647,7 @@ class MapRetrieveUpdateView(base_views.KirovyRetrieveUpdateView):
 
         :return:
         """
-        if self.request.user.is_staff:
+        if self.request.user_permissions.is_staff:
             # Staff users can see everything.
             return CncMap.objects.filter()
 
@@ -259,17 +686,32 @@ class BackwardsCompatibleMapView(KirovyApiView):
 
     permission_classes = [AllowAny]
 
+    CACHE_CONTROL: t.Final[str] = "public, max-age=3600"
+    """attr: The file behind a sha1 never changes, but the map can be banned, so caches have to check back eventually."""
+
     def get(self, request, sha1_hash_filename: str, game_id: UUID, format=None):
         """
         Return the map matching the hash, if it exists.
         """
         sha1_hash = pathlib.Path(sha1_hash_filename).stem
         _LOGGER.debug("Attempted backwards compatible download", av={"sha1": sha1_hash, "game": str(game_id)})
-        map_file = CncMapFile.objects.find_legacy_map_by_sha1(sha1_hash, game_id)
-        if not map_file:
+        # Cached, because lobbies request every map in rotation, and most of them were never uploaded.
+        legacy_download = CncMapFile.objects.find_legacy_map_download(sha1_hash, game_id)
+        if not legacy_download:
             return KirovyResponse(status=status.HTTP_404_NOT_FOUND)
 
-        return FileResponse(map_file.file.open("rb"), as_attachment=True, filename=f"{map_file.hash_sha1}.zip")
+        response = FileDownloadService.download_response(
+            request,
+            legacy_download.storage_path,
+            f"{sha1_hash}.zip",
+            etag_hash=legacy_download.hash_sha1,
+            last_modified=legacy_download.created,
+            cache_control=self.CACHE_CONTROL,
+        )
+        if response.status_code == status.HTTP_200_OK:
+            # Don't count 304s, or range requests resuming a download we already counted.
+            download_counter.record(legacy_download.cnc_map_id)
+        return response
 
 
 class MapLegacyStaticUI(KirovyApiView):
@@ -292,16 +734,68 @@ class MapLegacyStaticUI(KirovyApiView):
         return KirovyResponse()
 
 
+class LegacySearchPagination(base_views.KirovyCursorPagination):
+    """Cursor pagination capped at :attr:`kirovy.settings._base.LEGACY_SEARCH_PAGE_SIZE`, without counts or offsets.
+
+    Both counting and ``OFFSET`` cost more the more maps match, which is what the legacy search page must avoid.
+    """
+
+    allow_offset = False
+    allow_count = False
+
+    @property
+    def default_page_size(self) -> int:
+        return settings.LEGACY_SEARCH_PAGE_SIZE
+
+    @property
+    def max_page_size(self) -> int:
+        return settings.LEGACY_SEARCH_PAGE_SIZE
+
+
 class MapLegacySearchUI(MapListView):
+    """The legacy HTML map search at ``/search``, e.g. ``/search?game_slug=yr&search=island``.
+
+    Short search terms can match thousands of maps, so this renders one capped page from the ``.values()``
+    projection, with a link to the next page. The result list is a cached template fragment, keyed like
+    :data:`kirovy.services.response_cache_service.map_search_cache`, so map changes invalidate it.
+    The search only runs when the fragment isn't cached, because the page is built lazily.
+    """
 
     permission_classes = [AllowAny]
     renderer_classes = [TemplateHTMLRenderer]
     template_name = "legacy_search.html"
-    pagination_class = None
+    pagination_class = LegacySearchPagination
+    default_fields = {"created_date", "latest_map_file_hash", "map_name", "game_slug"}
+
+    def get_requested_fields(self) -> t.Optional[t.Set[str]]:
+        """Always the legacy columns. ``?fields=`` isn't supported here."""
+        return set(self.default_fields)
 
     # TODO: Require filters.
-    def get(self, request, *args, **kwargs) -> KirovyResponse[ui_objects.ListResponseData | None]:
+    def get(self, request, *args, **kwargs) -> KirovyResponse[t.DictStrAny | None]:
         if not request.query_params.get("game_slug"):
             return KirovyResponse[None](status=status.HTTP_200_OK)
         response = super().get(request, *args, **kwargs)
         return response
+
+    def list(self, request: KirovyRequest, *args, **kwargs) -> KirovyResponse[t.DictStrAny]:
+        context = {
+            "search_page": SimpleLazyObject(lambda: self.get_search_page(request)),
+            "fragment_key": map_search_cache.cache_key(request, self.get_cache_params()),
+            "fragment_timeout": settings.RESPONSE_CACHE_TIMEOUT,
+        }
+        return KirovyResponse(context, status=status.HTTP_200_OK)
+
+    def get_search_page(self, request: KirovyRequest) -> ui_objects.LegacySearchPage:
+        """Run the search. Called while rendering, so errors become a message on the page instead of a response."""
+        try:
+            data = super().list(request).data
+        except APIException:
+            return ui_objects.LegacySearchPage(results=[], next_url=None, is_invalid=True)
+
+        next_url = None
+        if next_cursor := data["pagination_metadata"]["next_cursor"]:
+            # Only the params that are part of the fragment key, because the link is cached with the fragment.
+            query = map_search_cache.normalized_query(request, self.get_cache_params())
+            next_url = replace_query_param(f"{request.path}?{query}", self.paginator.cursor_query_param, next_cursor)
+        return ui_objects.LegacySearchPage(results=data["results"], next_url=next_url, is_invalid=False)
@@ -9,11 +9,10 @@ from kirovy.views.base_views import KirovyListCreateView, KirovyDefaultPaginatio
 class GamesListView(KirovyListCreateView):
 
     permission_classes = [permissions.IsAdmin | permissions.ReadOnly]
-    pagination_class: t.Type[KirovyDefaultPagination] | None = KirovyDefaultPagination
     serializer_class = cnc_game_serializers.CncGameSerializer
 
     def get_queryset(self) -> QuerySet[CncGame]:
-        if self.request.user.is_staff:
+        if self.request.user_permissions.is_staff:
             return CncGame.objects.all()
 
         return CncGame.objects.filter(is_visible=True)
@@ -26,7 +25,7 @@ class GameDetailView(KirovyRetrieveUpdateView):
     serializer_class = cnc_game_serializers.CncGameSerializer
 
     def get_queryset(self) -> QuerySet[CncGame]:
-        if self.request.user.is_staff:
+        if self.request.user_permissions.is_staff:
             return CncGame.objects.all()
 
         return CncGame.objects.filter(is_visible=True)
@@ -55,7 +55,9 @@ class _BaseMapFileUploadView(KirovyApiView, metaclass=ABCMeta):
         uploaded_file: UploadedFile = request.data["file"]
 
         game = self.get_game_from_request(request)
-        game_supports_uploads = game and (request.user.is_staff or (game.is_visible and game.allow_public_uploads))
+        game_supports_uploads = game and (
+            request.user_permissions.is_staff or (game.is_visible and game.allow_public_uploads)
+        )
         if not game_supports_uploads:
             # Gaslight the user
             raise KirovyValidationError(detail="Game does not exist", code=UploadApiCodes.GAME_DOES_NOT_EXIST)
@@ -0,0 +1,145 @@
+import abc
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from kirovy import typing as t
+
+
+class _StandInServer(abc.ABC):
+    """A JSON HTTP server on a random local port, standing in for part of the CnCNet ladder.
+
+    Keep-alive is on, like the real ladder, so tests can check that connections are reused.
+    """
+
+    path = "/"
+
+    def __init__(self) -> None:
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                status_code, data = server.respond(self)
+                body = json.dumps(data).encode()
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.daemon_threads = True
+        # Clients that time out close the socket mid-response. That's expected, so don't print it.
+        self._httpd.handle_error = lambda request, client_address: None
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}{self.path}"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    @abc.abstractmethod
+    def respond(self, handler: BaseHTTPRequestHandler) -> t.Tuple[int, t.Any]:
+        """Answer a ``GET``.
+
+        :return:
+            The status code, and the data to send as JSON.
+        """
+        ...
+
+    def shutdown(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class LadderKeyServer(_StandInServer):
+    """A local stand-in for the CnCNet ladder's JWKS endpoint, holding the private keys to sign test tokens with."""
+
+    path = "/.well-known/jwks.json"
+
+    def __init__(self) -> None:
+        self.keys: t.Dict[str, rsa.RSAPrivateKey] = {}
+        self.fetch_count = 0
+        self.rotate()
+        super().__init__()
+
+    def respond(self, handler: BaseHTTPRequestHandler) -> t.Tuple[int, t.Any]:
+        self.fetch_count += 1
+        return 200, self.jwks()
+
+    @property
+    def current_kid(self) -> str:
+        return list(self.keys)[-1]
+
+    def rotate(self) -> str:
+        """Replace the published keys with a new one, like the ladder would when rotating keys."""
+        kid = f"ladder-key-{time.monotonic_ns()}"
+        self.keys = {kid: rsa.generate_private_key(public_exponent=65537, key_size=2048)}
+        return kid
+
+    def jwks(self) -> t.DictStrAny:
+        return {
+            "keys": [
+                {**json.loads(RSAAlgorithm.to_jwk(key.public_key())), "kid": kid, "alg": "RS256", "use": "sig"}
+                for kid, key in self.keys.items()
+            ]
+        }
+
+    def sign(self, claims: t.DictStrAny, expires_in: int = 600, key: rsa.RSAPrivateKey | None = None) -> str:
+        """Issue a token the way the ladder would, signed with the current key unless ``key`` is given."""
+        payload = {"exp": int(time.time()) + expires_in, **claims}
+        signing_key = key or self.keys[self.current_kid]
+        return jwt.encode(payload, signing_key, algorithm="RS256", headers={"kid": self.current_kid})
+
+
+class LadderApiServer(_StandInServer):
+    """A local stand-in for the CnCNet ladder's user info endpoint.
+
+    Set :attr:`status_code` or :attr:`delay` to make the ladder misbehave.
+    """
+
+    path = "/api/v1/user/info"
+
+    def __init__(self) -> None:
+        self.status_code = 200
+        self.delay = 0.0
+        self.user_info: t.DictStrAny = {
+            "id": 9001,
+            "name": "Yuri",
+            "email": "yuri@cncnet.org",
+            "email_verified": True,
+            "group": "User",
+        }
+        self.received: t.List[t.Tuple[int, t.Dict[str, str]]] = []
+        """attr: The client port and headers of every request, oldest first."""
+        super().__init__()
+
+    def respond(self, handler: BaseHTTPRequestHandler) -> t.Tuple[int, t.Any]:
+        self.received.append((handler.client_address[1], dict(handler.headers)))
+        time.sleep(self.delay)
+        return self.status_code, self.user_info if self.status_code == 200 else {"message": "error"}
+
+
+@pytest.fixture
+def ladder_key_server(settings) -> t.Iterator[LadderKeyServer]:
+    """Serve ladder signing keys locally, and point local JWT verification at them."""
+    server = LadderKeyServer()
+    settings.CNCNET_JWKS_URL = server.url
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def ladder_api_server(monkeypatch) -> t.Iterator[LadderApiServer]:
+    """Serve the ladder's user info locally, and point authentication at it."""
+    server = LadderApiServer()
+    monkeypatch.setattr("kirovy.constants.CNCNET_USER_URL", server.url)
+    yield server
+    server.shutdown()
@@ -9,6 +9,7 @@ import requests
 import ujson
 from django.conf import UserSettingsHolder
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
 from django.http import FileResponse
 from django.test import Client
 from pytest_django.fixtures import settings
@@ -20,6 +21,13 @@ from kirovy.models import CncUser
 from kirovy.objects import ui_objects
 from kirovy.objects.ui_objects import ErrorResponseData, BanData
 from kirovy.response import KirovyResponse
+from kirovy.services import (
+    cncnet_ladder_service,
+    download_counter_service,
+    game_tree_service,
+    response_cache_service,
+)
+from kirovy.services.download_counter_service import DownloadCounter
 
 
 @pytest.fixture
@@ -68,6 +76,31 @@ def tmp_media_root(tmp_path, settings):
     return settings.MEDIA_ROOT
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Clear django's caches before each test.
+
+    The database is rolled back between tests, but the in-process caches aren't, so cached rows would leak into
+    the next test.
+    """
+    for django_cache in caches.all():
+        django_cache.clear()
+    response_cache_service.map_search_cache.clear_local()
+    game_tree_service.game_tree.invalidate()
+    cncnet_ladder_service.cncnet_ladder.reset()
+
+
+@pytest.fixture(autouse=True)
+def download_counter() -> t.Iterator[DownloadCounter]:
+    """Return the worker's download counter, with nothing buffered from other tests.
+
+    Buffered counts reference maps that get rolled back, so discard them rather than flushing them at exit.
+    """
+    download_counter_service.download_counter._pending.clear()
+    yield download_counter_service.download_counter
+    download_counter_service.download_counter._pending.clear()
+
+
 _ClientReturnT = KirovyResponse | FileResponse
 
 _ClientResponseDataT = t.TypeVar("_ClientResponseDataT", bound=ui_objects.BaseResponseData)
@@ -1,4 +1,5 @@
 from django.core.files import File
+from django.db import connection
 from django.db.models import UUIDField
 from rest_framework import status
 
@@ -6,6 +7,7 @@ from kirovy.models import CncGame, CncUser
 from kirovy.models.cnc_map import CncMap, CncMapFile, MapCategory, CncMapImageFile
 from kirovy import typing as t
 import pytest
+from pytest_django.plugin import blocking_manager_key
 
 from kirovy.services.cnc_gen_2_services import CncGen2MapSections, MapConfigParser
 from kirovy.utils import file_utils
@@ -162,6 +164,48 @@ def cnc_map(create_cnc_map) -> CncMap:
     return create_cnc_map()
 
 
+@pytest.fixture
+def seed_cnc_maps(create_cnc_map) -> t.Callable[..., CncMap]:
+    """Return a function that fills the map table to a realistic size, for tests that check query plans.
+
+    The rows are copied from one map in SQL, and the table is analyzed so the planner knows its size. Overrides are
+    SQL expressions of the row number ``n``, e.g. ``seed_cnc_maps(map_name="md5(n::text)")``. Escape ``%`` as ``%%``.
+
+    See :func:`~tests.fixtures.map_fixtures.pytest_runtest_teardown` for cleaning up the statistics.
+    """
+    table = CncMap._meta.db_table
+
+    def _inner(count: int = 100_000, **seeded: str) -> CncMap:
+        template = create_cnc_map("Seed Map")
+        seeded = {"id": "gen_random_uuid()", "map_name": "'Seed Map ' || n", **seeded}
+        columns = [field.column for field in CncMap._meta.concrete_fields]
+        select = ", ".join(seeded.get(column, column) for column in columns)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"SELECT {select} FROM {table}, generate_series(1, %s) AS n WHERE id = %s",
+                [count, template.id],
+            )
+            cursor.execute(f"ANALYZE {table}")
+        return template
+
+    return _inner
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item: pytest.Item, nextitem: t.Optional[pytest.Item]) -> t.Iterator[None]:
+    """Analyze the map table again after tests that used :func:`~tests.fixtures.map_fixtures.seed_cnc_maps`.
+
+    Table statistics aren't rolled back with the test's transaction, so later tests would plan, and estimate counts,
+    for rows that no longer exist. This runs after every fixture is torn down, so the rollback has already happened.
+    After the last test, the test database is gone too, and nothing is left to plan.
+    """
+    yield
+    if nextitem is not None and "seed_cnc_maps" in getattr(item, "fixturenames", ()):
+        with item.config.stash[blocking_manager_key].unblock(), connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {CncMap._meta.db_table}")
+
+
 @pytest.fixture
 def banned_cheat_map(create_cnc_map, file_map_unfair) -> CncMap:
     """A map cheat map that was uploaded via the CnCNet client, then banned."""
@@ -75,3 +75,58 @@ def test_cnc_map_version(game_uploadable, extension_map, file_map_valid, cnc_map
     assert map2.version == 2
 
     assert pathlib.Path(map2.file.path).parent == pathlib.Path(map1.file.path).parent
+
+
+def test_cnc_map_file_stats_maintained(
+    create_cnc_map, create_cnc_map_file, create_cnc_map_image_file, file_map_desert, file_map_snow, file_map_image
+):
+    """Test that the latest file columns and file counts on a map follow its files and images."""
+    cnc_map = create_cnc_map()
+    assert (cnc_map.file_count, cnc_map.image_count, cnc_map.width, cnc_map.latest_file_created) == (0, 0, None, None)
+
+    create_cnc_map_file(file_map_desert, cnc_map)
+    latest = create_cnc_map_file(file_map_snow, cnc_map)
+    image = create_cnc_map_image_file(file_map_image, cnc_map)
+    cnc_map.refresh_from_db()
+
+    assert cnc_map.file_count == 2
+    assert cnc_map.image_count == 1
+    assert (cnc_map.width, cnc_map.height) == (latest.width, latest.height)
+    assert cnc_map.latest_file_created == latest.created
+
+    latest.delete()
+    image.delete()
+    cnc_map.refresh_from_db()
+
+    assert cnc_map.file_count == 1
+    assert cnc_map.image_count == 0
+    assert cnc_map.latest_file_created < latest.created
+
+
+def test_cnc_map_category_ids_maintained(create_cnc_map, create_cnc_map_category):
+    """Test that ``category_ids`` follows the category many-to-many, from both sides, sorted by category name."""
+    naval = create_cnc_map_category("Naval War")
+    land = create_cnc_map_category("Land Rush")
+    cnc_map = create_cnc_map(map_categories=[naval, land])
+    assert cnc_map.category_ids == [land.id, naval.id]
+
+    land.name = "Tank Rush"
+    land.save()
+    cnc_map.refresh_from_db()
+    assert cnc_map.category_ids == [naval.id, land.id]
+
+    cnc_map.categories.remove(naval)
+    cnc_map.refresh_from_db()
+    assert cnc_map.category_ids == [land.id]
+
+    naval.cncmap_set.add(cnc_map)
+    cnc_map.refresh_from_db()
+    assert cnc_map.category_ids == [naval.id, land.id]
+
+    naval.delete()
+    cnc_map.refresh_from_db()
+    assert cnc_map.category_ids == [land.id]
+
+    land.cncmap_set.clear()
+    cnc_map.refresh_from_db()
+    assert cnc_map.category_ids == []
@@ -0,0 +1,26 @@
+from django.db import connection
+
+from kirovy.models import CncMap
+from kirovy.utils import query_utils
+
+
+def test_planner_row_estimate(create_cnc_map):
+    """Test that unfiltered tables use the analyzed table size, and filtered querysets use ``EXPLAIN``."""
+    for name in ["Alpha", "Bravo", "Charlie", "Delta"]:
+        create_cnc_map(name)
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {CncMap._meta.db_table}")
+
+    assert query_utils.planner_row_estimate(CncMap.objects.all()) == 4
+    assert query_utils.planner_row_estimate(CncMap.objects.filter(map_name="Alpha")) >= 1
+
+
+def test_estimated_count(create_cnc_map, settings):
+    """Test that estimates under the threshold are replaced with exact counts."""
+    create_cnc_map()
+    assert query_utils.estimated_count(CncMap.objects.all()) == (1, False)
+
+    settings.ESTIMATED_COUNT_EXACT_THRESHOLD = 0
+    count, is_estimated = query_utils.estimated_count(CncMap.objects.filter(is_published=True))
+    assert is_estimated
+    assert count >= 0
@@ -0,0 +1,79 @@
+import datetime
+import decimal
+import io
+import timeit
+import uuid
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from kirovy.objects import ui_objects
+from kirovy.parsers import KirovyJSONParser
+from kirovy.renderers import KirovyJSONRenderer
+
+
+def test_json_renderer_matches_drf():
+    """Test that the orjson renderer writes the same JSON as DRF's renderer."""
+    data = ui_objects.ListResponseData(
+        message=gettext_lazy("Maps"),
+        results=[
+            {
+                "id": uuid.uuid4(),
+                "created": datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc),
+                "date": datetime.date(2024, 1, 2),
+                "price": decimal.Decimal("1.5"),
+                "map_name": "Line\u2028Separator \U0001f680",
+                "nested": {"values": [1, 2.5, None, True]},
+            }
+        ],
+        pagination_metadata=ui_objects.PaginationMetadata(limit=1, next_cursor=None),
+    )
+
+    assert KirovyJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert KirovyJSONRenderer().render(None) == b""
+
+    # ``ListField`` errors are keyed by the index of the bad item.
+    list_field = serializers.ListField(child=serializers.IntegerField())
+    with pytest.raises(ValidationError) as error:
+        list_field.run_validation(["1", "Kirov reporting"])
+    errors = {"ids": error.value.detail, 1.5: "float", True: "bool", None: "null"}
+    assert KirovyJSONRenderer().render(errors) == JSONRenderer().render(errors)
+    assert KirovyJSONRenderer().render({"a": 1}, "application/json; indent=4") == b'{\n  "a": 1\n}'
+
+
+def test_json_renderer_keeps_microseconds():
+    """Test the one known difference from DRF's renderer. DRF truncates datetimes to milliseconds."""
+    now = timezone.now().replace(microsecond=123456)
+    assert KirovyJSONRenderer().render({"now": now}) == f'{{"now":"{now.isoformat()[:-6]}Z"}}'.encode()
+
+
+def test_json_parser():
+    assert KirovyJSONParser().parse(io.BytesIO(b'{"map_name": "Dustbowl", "ids": [1, 2]}')) == {
+        "map_name": "Dustbowl",
+        "ids": [1, 2],
+    }
+    with pytest.raises(ParseError):
+        KirovyJSONParser().parse(io.BytesIO(b'{"map_name": '))
+
+
+@pytest.mark.benchmark
+def test_json_renderer_benchmark(create_cnc_map, create_cnc_map_file, file_map_desert, client_anonymous):
+    """Compare rendering a 200 map search page with DRF's renderer and the orjson renderer.
+
+    Deselected by default. Run it with ``pytest -m benchmark -s tests/test_renderers.py``.
+    """
+    for i in range(200):
+        create_cnc_map_file(file_map_desert, create_cnc_map(f"Benchmark Map {i}"))
+    data = client_anonymous.get("/maps/search/?limit=200").data
+    assert len(data["results"]) == 200
+    assert KirovyJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    renders = 200
+    for renderer in [JSONRenderer(), KirovyJSONRenderer()]:
+        seconds = timeit.timeit(lambda: renderer.render(data), number=renders)
+        size_kb = len(renderer.render(data)) / 1024
+        print(f"\n{type(renderer).__name__}: {seconds / renders * 1000:.2f} ms per {size_kb:.0f} KB page")
@@ -0,0 +1,83 @@
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.test import RequestFactory
+
+from kirovy import exceptions
+from kirovy.authentication import CncNetAuthentication, _CncNetAuthenticator
+from kirovy.models import CncUser
+from kirovy.objects import CncnetUserInfo
+from kirovy.services.cncnet_jwt_service import cncnet_jwt_verifier
+
+
+def _authenticate(token: str):
+    return CncNetAuthentication().authenticate(RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+
+
+@pytest.fixture
+def ladder_calls(monkeypatch):
+    """Record calls to the ladder's user info endpoint, and answer them with a fixed user."""
+    calls = []
+
+    def _request_user_info(request):
+        calls.append(request)
+        return CncnetUserInfo(id=9001, name="Yuri", email="yuri@cncnet.org", email_verified=True, group="User")
+
+    monkeypatch.setattr(_CncNetAuthenticator, "request_user_info", staticmethod(_request_user_info))
+    return calls
+
+
+def test_jwt_verifier__local_verification(db, ladder_key_server, ladder_calls):
+    """Test that tokens carrying the user's claims are verified with the ladder's keys, without calling the ladder."""
+    claims = {"sub": "4242", "name": "Kane", "group": "User", "email_verified": True, "email": "kane@cncnet.org"}
+
+    kirovy_user, user_info = _authenticate(ladder_key_server.sign(claims))
+    assert ladder_calls == []
+    assert (kirovy_user.cncnet_id, kirovy_user.username, kirovy_user.verified_email) == (4242, "Kane", True)
+    assert user_info.email == "kane@cncnet.org"
+
+    # The key set is fetched once, not once per token.
+    _authenticate(ladder_key_server.sign({**claims, "name": "Kane Reborn"}, expires_in=900))
+    assert ladder_key_server.fetch_count == 1
+    assert CncUser.objects.get(cncnet_id=4242).username == "Kane Reborn"
+
+    # Tokens without the user's info still need the ladder.
+    _authenticate(ladder_key_server.sign({"sub": "9001"}))
+    assert len(ladder_calls) == 1
+
+
+def test_jwt_verifier__rejects_bad_tokens(db, ladder_key_server, ladder_calls):
+    """Test that forged and expired tokens are rejected without asking the ladder."""
+    claims = {"sub": "4242", "name": "Kane", "group": "User", "email_verified": True}
+    forger_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    with pytest.raises(exceptions.InvalidTokenError):
+        _authenticate(ladder_key_server.sign(claims, key=forger_key))
+    with pytest.raises(exceptions.InvalidTokenError):
+        _authenticate(ladder_key_server.sign(claims, expires_in=-60))
+    assert ladder_calls == []
+
+    # Tokens signed with an algorithm we don't have keys for, e.g. a shared secret, are checked by the ladder.
+    _authenticate(jwt.encode(claims, "ladder-secret", algorithm="HS256"))
+    assert len(ladder_calls) == 1
+
+
+def test_jwt_verifier__key_rotation(db, ladder_key_server, ladder_calls):
+    """Test that a token signed with a new key refetches the key set."""
+    claims = {"sub": "4242", "name": "Kane", "group": "User", "email_verified": True}
+    _authenticate(ladder_key_server.sign(claims))
+    # Unknown keys are only refetched once per cooldown, so a flood of bad ``kid``s can't hammer the ladder.
+    cncnet_jwt_verifier.jwk_client().cooldown_duration = 0
+
+    ladder_key_server.rotate()
+    kirovy_user, _ = _authenticate(ladder_key_server.sign(claims, expires_in=900))
+    assert kirovy_user.cncnet_id == 4242
+    assert ladder_key_server.fetch_count == 2
+    assert ladder_calls == []
+
+
+def test_jwt_verifier__disabled(db, ladder_calls, settings):
+    """Test that every new token goes to the ladder when no key set is configured."""
+    settings.CNCNET_JWKS_URL = None
+    _authenticate(jwt.encode({"sub": "9001"}, "ladder-secret", algorithm="HS256"))
+    assert len(ladder_calls) == 1
@@ -0,0 +1,107 @@
+import time
+
+import jwt
+import pytest
+from django.test import RequestFactory
+from rest_framework import status
+
+from kirovy import exceptions
+from kirovy.authentication import CncNetAuthentication
+from kirovy.services.cncnet_ladder_service import CircuitState, cncnet_ladder
+from kirovy.services.cncnet_token_cache_service import cncnet_token_cache
+
+
+def _make_token(cncnet_id: int = 9001) -> str:
+    return jwt.encode({"sub": str(cncnet_id), "exp": int(time.time()) + 600}, "ladder-secret", algorithm="HS256")
+
+
+def _authenticate(token: str, **headers):
+    request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}", **headers)
+    return CncNetAuthentication().authenticate(request)
+
+
+def test_ladder_client__pooled_session(db, ladder_api_server):
+    """Test that ladder calls reuse one connection, and only send the token."""
+    token = _make_token()
+    first_user, _ = _authenticate(token, HTTP_COOKIE="sessionid=secret", HTTP_X_FORWARDED_FOR="10.0.0.1")
+    _authenticate(token + "-another-token")
+
+    assert first_user.cncnet_id == 9001
+    assert len(ladder_api_server.received) == 2
+    assert len({client_port for client_port, _ in ladder_api_server.received}) == 1
+    _, headers = ladder_api_server.received[0]
+    assert headers["Authorization"] == f"Bearer {token}"
+    assert "Cookie" not in headers and "X-Forwarded-For" not in headers
+
+
+def test_ladder_client__timeout(db, ladder_api_server, settings):
+    """Test that a slow ladder fails the request instead of blocking the worker."""
+    settings.CNCNET_LADDER_READ_TIMEOUT = 0.1
+    ladder_api_server.delay = 1
+
+    started = time.monotonic()
+    with pytest.raises(exceptions.CncNetUnavailable):
+        _authenticate(_make_token())
+    assert time.monotonic() - started < 1
+    assert cncnet_ladder.stats()["failures"] == 1
+
+
+def test_ladder_client__circuit_breaker(db, ladder_api_server, settings, client_admin, client_user):
+    """Test that a failing ladder trips the breaker, which fails fast but still lets known tokens in."""
+    settings.CNCNET_LADDER_BREAKER_FAILURE_THRESHOLD = 2
+    known_token = _make_token()
+    known_user, _ = _authenticate(known_token)
+    # Make the cached entry stale, as if the ladder was last asked a while ago.
+    key = cncnet_token_cache.token_key(known_token)
+    cncnet_token_cache.cache.set(key, cncnet_token_cache.cache.get(key)._replace(fresh_until=0), timeout=600)
+
+    ladder_api_server.status_code = status.HTTP_502_BAD_GATEWAY
+    for _ in range(2):
+        with pytest.raises(exceptions.CncNetUnavailable):
+            _authenticate(_make_token(4242))
+    assert cncnet_ladder.breaker.state == CircuitState.OPEN
+
+    # The breaker is open, so the ladder isn't called at all.
+    calls = len(ladder_api_server.received)
+    with pytest.raises(exceptions.CncNetUnavailable):
+        _authenticate(_make_token(4242))
+    stale_user, _ = _authenticate(known_token)
+    assert stale_user.id == known_user.id
+    assert len(ladder_api_server.received) == calls
+
+    # After the reset timeout, one trial call closes the breaker if the ladder recovered.
+    settings.CNCNET_LADDER_BREAKER_RESET_TIMEOUT = 0
+    ladder_api_server.status_code = status.HTTP_200_OK
+    _authenticate(_make_token(4242))
+    assert cncnet_ladder.breaker.state == CircuitState.CLOSED
+
+    assert client_user.get("/admin/ladder/").status_code == status.HTTP_403_FORBIDDEN
+    stats = client_admin.get("/admin/ladder/").data["result"]
+    assert stats["circuit_state"] == CircuitState.CLOSED
+    # Both calls while the breaker was open were short circuited, including the one served from the stale token.
+    assert (stats["requests"], stats["failures"], stats["short_circuited"]) == (4, 2, 2)
+    assert stats["max_latency_ms"] >= stats["average_latency_ms"] > 0
+
+
+def test_ladder_client__trial_raises_unexpected_error(db, ladder_api_server, settings, monkeypatch):
+    """Test that a half open trial that raises something other than a requests error doesn't wedge the breaker."""
+    settings.CNCNET_LADDER_BREAKER_FAILURE_THRESHOLD = 1
+    settings.CNCNET_LADDER_BREAKER_RESET_TIMEOUT = 0
+    ladder_api_server.status_code = status.HTTP_502_BAD_GATEWAY
+    with pytest.raises(exceptions.CncNetUnavailable):
+        _authenticate(_make_token())
+    assert cncnet_ladder.breaker.state == CircuitState.OPEN
+
+    def _broken_get(*args, **kwargs):
+        raise RuntimeError("Kirov reporting")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(cncnet_ladder.session, "get", _broken_get)
+        with pytest.raises(RuntimeError):
+            cncnet_ladder.get(ladder_api_server.url)
+    assert cncnet_ladder.breaker.state == CircuitState.OPEN
+
+    # The next trial goes through, and closes the breaker.
+    ladder_api_server.status_code = status.HTTP_200_OK
+    _authenticate(_make_token())
+    assert cncnet_ladder.breaker.state == CircuitState.CLOSED
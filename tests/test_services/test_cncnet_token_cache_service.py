@@ -0,0 +1,57 @@
+import time
+
+import jwt
+from django.test import RequestFactory
+
+from kirovy.authentication import CncNetAuthentication, _CncNetAuthenticator
+from kirovy.objects import CncnetUserInfo
+from kirovy.services.cncnet_token_cache_service import cncnet_token_cache
+
+
+def _make_token(expires_in: int) -> str:
+    return jwt.encode({"sub": "1", "exp": int(time.time()) + expires_in}, "not-the-ladder-secret", algorithm="HS256")
+
+
+def test_token_cache__authenticate(user, moderator, monkeypatch, django_assert_num_queries):
+    """Test that a token is only verified with CnCNet once, until the user is banned."""
+    ladder_calls = []
+
+    def _request_user_info(request):
+        ladder_calls.append(request)
+        return CncnetUserInfo(
+            id=user.cncnet_id, name=user.username, email="kane@cncnet.org", email_verified=True, group=user.group
+        )
+
+    monkeypatch.setattr(_CncNetAuthenticator, "request_user_info", staticmethod(_request_user_info))
+    token = _make_token(expires_in=600)
+    request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    kirovy_user, user_info = CncNetAuthentication().authenticate(request)
+    assert kirovy_user.id == user.id
+    assert len(ladder_calls) == 1
+
+    # No call to CnCNet, and no query to update the user.
+    with django_assert_num_queries(0):
+        cached_user, cached_info = CncNetAuthentication().authenticate(request)
+    assert len(ladder_calls) == 1
+    assert (cached_user.id, cached_user.cncnet_id, cached_user.group) == (user.id, user.cncnet_id, user.group)
+    assert cached_info.email == user_info.email
+    assert cached_user.can_upload
+
+    # Banning the user forgets their tokens.
+    user.ban(moderator, ban_reason="Nuked the lobby")
+    kirovy_user, _ = CncNetAuthentication().authenticate(request)
+    assert len(ladder_calls) == 2
+    assert kirovy_user.is_banned
+    assert not kirovy_user.can_upload
+
+
+def test_token_cache__ttl_capped_at_expiry(settings):
+    """Test that tokens are never cached for longer than they're valid."""
+    settings.CNCNET_TOKEN_CACHE_TIMEOUT = 300
+
+    assert cncnet_token_cache.timeout(_make_token(expires_in=3600)) == 300
+    assert 0 < cncnet_token_cache.timeout(_make_token(expires_in=30)) <= 30
+    assert cncnet_token_cache.timeout(_make_token(expires_in=-30)) <= 0
+    # Tokens without a readable ``exp`` use the setting.
+    assert cncnet_token_cache.timeout("not-a-jwt") == 300
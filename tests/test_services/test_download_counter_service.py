@@ -0,0 +1,75 @@
+import datetime
+
+from django.utils import timezone
+from rest_framework import status
+
+from kirovy.models import CncMap, CncMapDailyDownloads
+from kirovy.services.download_counter_service import DownloadCounter, recompute_trending_scores
+
+
+def test_download_counter__buffers_until_flush(
+    create_cnc_map, create_cnc_map_file, file_map_desert, client_anonymous, game_yuri, download_counter
+):
+    """Test that downloads are buffered in process, then written with one batch per flush."""
+    cnc_map: CncMap = create_cnc_map(is_temporary=True, cnc_game=game_yuri, is_mapdb1_compatible=True)
+    map_file = create_cnc_map_file(file_map_desert, cnc_map, zip_for_legacy=True)
+    url = f"/{game_yuri.slug}/{map_file.hash_sha1}.zip"
+
+    for _ in range(3):
+        b"".join(client_anonymous.get(url).streaming_content)
+    # Conditional and partial requests aren't new downloads.
+    client_anonymous.get(url, HTTP_IF_NONE_MATCH=f'"{map_file.hash_sha1}"')
+    b"".join(client_anonymous.get(url, HTTP_RANGE="bytes=10-").streaming_content)
+
+    cnc_map.refresh_from_db()
+    assert cnc_map.download_count == 0
+    assert not CncMapDailyDownloads.objects.exists()
+
+    assert download_counter.flush() == 1
+    b"".join(client_anonymous.get(url).streaming_content)
+    assert download_counter.flush() == 1
+
+    cnc_map.refresh_from_db()
+    assert cnc_map.download_count == 4
+    assert cnc_map.trending_score == 4.0
+    daily = CncMapDailyDownloads.objects.get(cnc_map=cnc_map)
+    assert daily.downloads == 4
+    assert daily.date == timezone.now().date()
+
+
+def test_download_counter__skips_deleted_maps(create_cnc_map):
+    """Test that a map deleted before the flush doesn't fail the batch for other maps."""
+    kept_map = create_cnc_map()
+    deleted_map = create_cnc_map()
+    counter = DownloadCounter()
+    counter.record(kept_map.id)
+    counter.record(deleted_map.id)
+    deleted_map.delete()
+
+    assert counter.flush() == 2
+
+    kept_map.refresh_from_db()
+    assert kept_map.download_count == 1
+    assert not CncMapDailyDownloads.objects.filter(cnc_map_id=deleted_map.id).exists()
+
+
+def test_recompute_trending_scores(create_cnc_map, settings):
+    """Test that older downloads count for less, and downloads outside the window don't count at all."""
+    settings.TRENDING_HALF_LIFE_DAYS = 2
+    settings.TRENDING_WINDOW_DAYS = 7
+    today = timezone.now().date()
+    recent_map = create_cnc_map()
+    old_map = create_cnc_map()
+    CncMapDailyDownloads.objects.create(cnc_map=recent_map, date=today, downloads=10)
+    CncMapDailyDownloads.objects.create(cnc_map=recent_map, date=today - datetime.timedelta(days=2), downloads=10)
+    CncMapDailyDownloads.objects.create(cnc_map=old_map, date=today - datetime.timedelta(days=8), downloads=1000)
+    CncMap.objects.filter(id=old_map.id).update(trending_score=50)
+
+    assert recompute_trending_scores() == 2
+
+    recent_map.refresh_from_db()
+    old_map.refresh_from_db()
+    assert recent_map.trending_score == 15.0
+    assert old_map.trending_score == 0.0
+    # Nothing changed, so nothing gets written.
+    assert recompute_trending_scores() == 0
@@ -0,0 +1,68 @@
+import pytest
+from rest_framework import status
+
+from kirovy import exceptions
+from kirovy.constants import GameSlugs
+from kirovy.services.cnc_gen_2_services import CncGen2MapParser
+from kirovy.services.game_tree_service import game_tree
+from kirovy.utils.service_utils import get_map_parser_for_game
+
+
+def test_game_tree__hierarchy(game_yuri, game_dawn_of_the_tiberium_age, create_cnc_game, django_assert_num_queries):
+    """Test walking up and down the game hierarchy, and that saving a game reloads it."""
+    red_alert_2 = game_yuri.parent_game
+    tree = game_tree.get()
+
+    assert [x.slug for x in tree.ancestors(game_yuri.id)] == [GameSlugs.red_alert_2]
+    assert tree.root(game_dawn_of_the_tiberium_age.id).slug == GameSlugs.tiberian_sun
+    assert tree.root(red_alert_2.id).slug == GameSlugs.red_alert_2
+    assert [x.slug for x in tree.compatible_ancestors(game_yuri.id)] == [GameSlugs.red_alert_2]
+    # DTA is a total conversion, so Tiberian Sun maps don't work in it.
+    assert tree.compatible_ancestors(game_dawn_of_the_tiberium_age.id) == []
+
+    yuri_mod = create_cnc_game(slug="yrmod", parent_game=game_yuri, is_mod=True, compatible_with_parent_maps=True)
+    tree = game_tree.get()
+    assert [x.slug for x in tree.compatible_ancestors(yuri_mod.id)] == [GameSlugs.yuris_revenge, GameSlugs.red_alert_2]
+    compatible = {x.slug for x in tree.descendants(red_alert_2.id, compatible_only=True)}
+    assert {GameSlugs.yuris_revenge, "yrmod"} <= compatible
+    assert {x.slug for x in tree.descendants(red_alert_2.id)} >= compatible
+
+    with django_assert_num_queries(0):
+        assert game_tree.get() is tree
+
+
+def test_get_map_parser_for_game(game_dawn_of_the_tiberium_age, game_yuri, create_cnc_game, django_assert_num_queries):
+    """Test that mods and expansions use their top level game's parser, without walking parents in the database."""
+    game_tree.get()
+    with django_assert_num_queries(0):
+        assert get_map_parser_for_game(game_dawn_of_the_tiberium_age) is CncGen2MapParser
+        assert get_map_parser_for_game(game_yuri) is CncGen2MapParser
+
+    with pytest.raises(exceptions.GameNotSupportedError):
+        get_map_parser_for_game(create_cnc_game(slug="newengine"))
+
+
+def test_game_tree__game_from_another_worker(game_yuri, create_cnc_game, create_cnc_map, client_anonymous, monkeypatch):
+    """Test that a game this worker hasn't seen yet reloads the tree, instead of looking like it doesn't exist."""
+    tree = game_tree.get()
+    # Another worker saved the game, so this worker's signal never cleared its tree.
+    monkeypatch.setattr(game_tree, "invalidate", lambda: None)
+    yuri_mod = create_cnc_game(slug="yrmod", parent_game=game_yuri, is_mod=True, compatible_with_parent_maps=True)
+    yr_map = create_cnc_map("Little Big Lake", cnc_game=game_yuri)
+    mod_map = create_cnc_map("Mod Map", cnc_game=yuri_mod)
+    assert game_tree.get() is tree
+
+    assert get_map_parser_for_game(yuri_mod) is CncGen2MapParser
+    assert game_tree.get() is not tree
+
+    for query in [
+        f"cnc_game={yuri_mod.id}&include_compatible_maps=true",
+        "game_slug=yrmod&include_compatible_maps=true",
+    ]:
+        game_tree._tree = tree
+        response = client_anonymous.get(f"/maps/search/?{query}")
+        assert response.status_code == status.HTTP_200_OK
+        assert {x["id"] for x in response.data["results"]} == {str(mod_map.id), str(yr_map.id)}
+
+    # Unknown games still don't exist after the reload.
+    assert client_anonymous.get("/maps/search/?game_slug=nope").data["results"] == []
@@ -0,0 +1,114 @@
+from rest_framework import status
+
+from kirovy.models import CncMap
+from kirovy.services.response_cache_service import map_search_cache
+
+SEARCH_URL = "/maps/search/"
+
+
+def test_response_cache__hits_until_maps_change(create_cnc_map, client_anonymous):
+    """Test that anonymous searches are cached, and that saving a map invalidates them."""
+    first_map = create_cnc_map("Heck Freezes Over")
+
+    response = client_anonymous.get(f"{SEARCH_URL}?game_slug={first_map.cnc_game.slug}&search=")
+    assert response.status_code == status.HTTP_200_OK
+    assert response["X-Cache"] == "MISS"
+
+    # Parameter order and empty parameters are normalized away.
+    cached = client_anonymous.get(f"{SEARCH_URL}?search=&game_slug={first_map.cnc_game.slug}")
+    assert cached["X-Cache"] == "HIT"
+    assert cached.content == response.content
+    assert [x["id"] for x in cached.json()["results"]] == [str(first_map.id)]
+
+    second_map = create_cnc_map("Heck Freezes Over Again")
+
+    refreshed = client_anonymous.get(f"{SEARCH_URL}?game_slug={first_map.cnc_game.slug}")
+    assert refreshed["X-Cache"] == "MISS"
+    assert {x["id"] for x in refreshed.json()["results"]} == {str(first_map.id), str(second_map.id)}
+
+
+def test_response_cache__ban_invalidates(create_cnc_map, client_anonymous, moderator):
+    """Test that banning a map removes it from cached searches."""
+    cnc_map: CncMap = create_cnc_map()
+    assert len(client_anonymous.get(SEARCH_URL).json()["results"]) == 1
+    assert client_anonymous.get(SEARCH_URL)["X-Cache"] == "HIT"
+
+    cnc_map.ban(moderator, ban_reason="Unbalanced")
+
+    response = client_anonymous.get(SEARCH_URL)
+    assert response["X-Cache"] == "MISS"
+    assert response.json()["results"] == []
+
+
+def test_response_cache__authenticated_skips_cache(create_cnc_map, client_user):
+    """Test that logged-in users always get a fresh response."""
+    create_cnc_map()
+    for _ in range(2):
+        response = client_user.get(SEARCH_URL)
+        assert response.status_code == status.HTTP_200_OK
+        assert "X-Cache" not in response
+
+
+def test_response_cache__local_lru_and_stats(
+    create_cnc_map, client_anonymous, client_admin, client_user, settings, tmp_path
+):
+    """Test that the in-process tier is bounded, falls back to the shared tier, and that hits are reported."""
+    # A file cache stands in for one that every worker can reach, e.g. redis.
+    settings.CACHES = {
+        **settings.CACHES,
+        "shared": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path)},
+    }
+    settings.RESPONSE_CACHE_ALIAS = "shared"
+    settings.RESPONSE_CACHE_LOCAL_MAX_ENTRIES = 1
+    create_cnc_map()
+
+    client_anonymous.get(f"{SEARCH_URL}?ordering=map_name")
+    client_anonymous.get(f"{SEARCH_URL}?ordering=-map_name")
+    # Evicted from the LRU by the second search, so it comes from the shared tier.
+    assert client_anonymous.get(f"{SEARCH_URL}?ordering=map_name")["X-Cache"] == "HIT"
+    assert client_anonymous.get(f"{SEARCH_URL}?ordering=map_name")["X-Cache"] == "HIT"
+
+    assert map_search_cache.stats() == {
+        "local_hits": 1,
+        "shared_hits": 1,
+        "misses": 2,
+        "hit_rate": 0.5,
+        "local_entries": 1,
+    }
+
+    assert client_user.get("/admin/response-cache/").status_code == status.HTTP_403_FORBIDDEN
+    response = client_admin.get("/admin/response-cache/")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["result"]["hit_rate"] == 0.5
+
+
+def test_response_cache__in_process_alias_skips_second_tier(create_cnc_map, client_anonymous, settings):
+    """Test that the in-process ``default`` cache isn't used as a second copy of the LRU."""
+    settings.RESPONSE_CACHE_LOCAL_MAX_ENTRIES = 1
+    create_cnc_map()
+
+    client_anonymous.get(f"{SEARCH_URL}?ordering=map_name")
+    client_anonymous.get(f"{SEARCH_URL}?ordering=-map_name")
+    assert client_anonymous.get(f"{SEARCH_URL}?ordering=map_name")["X-Cache"] == "MISS"
+    assert map_search_cache.stats()["shared_hits"] == 0
+
+
+def test_response_cache__unused_params_and_big_responses(create_cnc_map, client_anonymous, settings):
+    """Test that params the view doesn't read share a cache entry, and that big responses aren't cached."""
+    cnc_map = create_cnc_map()
+
+    assert client_anonymous.get(f"{SEARCH_URL}?limit=5&junk=1")["X-Cache"] == "MISS"
+    response = client_anonymous.get(f"{SEARCH_URL}?junk=2&limit=5")
+    assert response["X-Cache"] == "HIT"
+    assert [x["id"] for x in response.json()["results"]] == [str(cnc_map.id)]
+    assert client_anonymous.get(f"{SEARCH_URL}?limit=6")["X-Cache"] == "MISS"
+
+    assert client_anonymous.get(f"/maps/autocomplete/?q={cnc_map.map_name[:4]}&junk=1")["X-Cache"] == "MISS"
+    assert client_anonymous.get(f"/maps/autocomplete/?q={cnc_map.map_name[:4]}&junk=2")["X-Cache"] == "HIT"
+    assert client_anonymous.get("/maps/facets/?junk=1")["X-Cache"] == "MISS"
+    assert client_anonymous.get("/maps/facets/?junk=2")["X-Cache"] == "HIT"
+
+    settings.RESPONSE_CACHE_MAX_ENTRY_BYTES = 10
+    for _ in range(2):
+        assert client_anonymous.get(f"{SEARCH_URL}?ordering=map_name")["X-Cache"] == "MISS"
+    assert map_search_cache.stats()["local_entries"] == 4
@@ -4,12 +4,14 @@ import zipfile
 import io
 
 import pytest
+from django.core.files.storage import FileSystemStorage
 from django.http import FileResponse
 from rest_framework import status
 
 from kirovy import typing as t
 from kirovy.models import CncGame, CncMapFile, CncMap
 from kirovy.response import KirovyResponse
+from kirovy.utils import file_utils
 
 if t.TYPE_CHECKING:
     from tests.fixtures.common_fixtures import KirovyClient
@@ -128,3 +130,119 @@ def _download_and_check_hash(
     assert cnc_map_file.cnc_map.map_name == expected_map_name
     if ip_address:
         assert cnc_map_file.ip_address == ip_address
+
+
+def test_map_download_backwards_compatible__nginx_offload(
+    create_cnc_map, create_cnc_map_file, file_map_desert, client_anonymous, game_yuri, settings
+):
+    """Test that downloads are handed off to nginx, with the attachment headers, when offloading is enabled."""
+    settings.SERVE_DOWNLOADS_WITH_NGINX = True
+    cnc_map: CncMap = create_cnc_map(is_temporary=True, cnc_game=game_yuri, is_mapdb1_compatible=True)
+    map_file = create_cnc_map_file(file_map_desert, cnc_map, zip_for_legacy=True)
+
+    response = client_anonymous.get(f"/{game_yuri.slug}/{map_file.hash_sha1}.zip")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["X-Accel-Redirect"] == f"{settings.NGINX_PROTECTED_MEDIA_URL}{map_file.file.name}"
+    assert response["Content-Disposition"] == f'attachment; filename="{map_file.hash_sha1}.zip"'
+    assert response["Content-Type"] == "application/zip"
+    # nginx sends the body, so django shouldn't have read the file.
+    assert response.content == b""
+
+
+def test_map_download_backwards_compatible__lookup_cached(
+    create_cnc_map, create_cnc_map_file, file_map_desert, client_anonymous, game_yuri, django_assert_num_queries
+):
+    """Test that repeated lobby downloads, and repeated misses, don't query the database."""
+    cnc_map: CncMap = create_cnc_map(is_temporary=True, cnc_game=game_yuri, is_mapdb1_compatible=True)
+    map_file = create_cnc_map_file(file_map_desert, cnc_map, zip_for_legacy=True)
+    missing_sha1 = "0" * 40
+
+    assert client_anonymous.get(f"/{game_yuri.slug}/{map_file.hash_sha1}.zip").status_code == status.HTTP_200_OK
+    assert client_anonymous.get(f"/{game_yuri.slug}/{missing_sha1}.zip").status_code == status.HTTP_404_NOT_FOUND
+
+    with django_assert_num_queries(0):
+        response: FileResponse = client_anonymous.get(f"/{game_yuri.slug}/{map_file.hash_sha1}.zip")
+        assert response.status_code == status.HTTP_200_OK
+        assert client_anonymous.get(f"/{game_yuri.slug}/{missing_sha1}.zip").status_code == status.HTTP_404_NOT_FOUND
+
+    assert b"".join(response.streaming_content)
+
+
+def test_map_download_backwards_compatible__lookup_invalidated(
+    create_cnc_map, create_cnc_map_file, file_map_desert, client_anonymous, game_yuri, moderator
+):
+    """Test that cached misses are cleared by uploads, and cached hits are cleared by bans."""
+    cnc_map: CncMap = create_cnc_map(is_temporary=True, cnc_game=game_yuri, is_mapdb1_compatible=True)
+    sha1 = file_utils.hash_file_sha1(file_map_desert)
+    url = f"/{game_yuri.slug}/{sha1}.zip"
+
+    # Cache a miss, then upload the map.
+    assert client_anonymous.get(url).status_code == status.HTTP_404_NOT_FOUND
+    create_cnc_map_file(file_map_desert, cnc_map, zip_for_legacy=True)
+    assert client_anonymous.get(url).status_code == status.HTTP_200_OK
+
+    # Cache a hit, then ban the map.
+    cnc_map.ban(moderator, ban_reason="Unfair starting positions")
+    assert client_anonymous.get(url).status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_map_download_backwards_compatible__conditional(
+    create_cnc_map, create_cnc_map_file, file_map_desert, client_anonymous, game_yuri, mocker
+):
+    """Test that downloads carry validators, and that a matching validator gets a 304 without opening the file."""
+    cnc_map: CncMap = create_cnc_map(is_temporary=True, cnc_game=game_yuri, is_mapdb1_compatible=True)
+    map_file = create_cnc_map_file(file_map_desert, cnc_map, zip_for_legacy=True)
+    url = f"/{game_yuri.slug}/{map_file.hash_sha1}.zip"
+
+    response: FileResponse = client_anonymous.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] == f'"{map_file.hash_sha1}"'
+    assert response["Last-Modified"]
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["Cache-Control"] == "public, max-age=3600"
+    b"".join(response.streaming_content)
+
+    open_spy = mocker.spy(FileSystemStorage, "open")
+    not_modified = client_anonymous.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified["ETag"] == response["ETag"]
+    assert not_modified["Cache-Control"] == "public, max-age=3600"
+
+    not_modified = client_anonymous.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    open_spy.assert_not_called()
+
+    changed = client_anonymous.get(url, HTTP_IF_NONE_MATCH='"someotherhash"')
+    assert changed.status_code == status.HTTP_200_OK
+    b"".join(changed.streaming_content)
+
+
+def test_map_download_backwards_compatible__range(
+    create_cnc_map, create_cnc_map_file, file_map_desert, client_anonymous, game_yuri
+):
+    """Test that clients can resume a download with a byte range."""
+    cnc_map: CncMap = create_cnc_map(is_temporary=True, cnc_game=game_yuri, is_mapdb1_compatible=True)
+    map_file = create_cnc_map_file(file_map_desert, cnc_map, zip_for_legacy=True)
+    url = f"/{game_yuri.slug}/{map_file.hash_sha1}.zip"
+    full_content = b"".join(client_anonymous.get(url).streaming_content)
+    size = len(full_content)
+
+    response = client_anonymous.get(url, HTTP_RANGE="bytes=10-")
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response["Content-Range"] == f"bytes 10-{size - 1}/{size}"
+    assert b"".join(response.streaming_content) == full_content[10:]
+
+    response = client_anonymous.get(url, HTTP_RANGE="bytes=-20", HTTP_IF_RANGE=f'"{map_file.hash_sha1}"')
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response["Content-Length"] == "20"
+    assert b"".join(response.streaming_content) == full_content[-20:]
+
+    # A stale ``If-Range`` gets the whole file.
+    response = client_anonymous.get(url, HTTP_RANGE="bytes=10-", HTTP_IF_RANGE='"someotherhash"')
+    assert response.status_code == status.HTTP_200_OK
+    assert b"".join(response.streaming_content) == full_content
+
+    response = client_anonymous.get(url, HTTP_RANGE=f"bytes={size}-")
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+    assert response["Content-Range"] == f"bytes */{size}"
@@ -0,0 +1,72 @@
+import re
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from kirovy.models import CncMap
+from kirovy.services.game_tree_service import game_tree
+
+BASE_URL = "/search"
+
+
+def _map_queries(queries: CaptureQueriesContext) -> int:
+    return len([q for q in queries if f'FROM "{CncMap._meta.db_table}"' in q["sql"]])
+
+
+def test_legacy_search__paginated(
+    create_cnc_map, create_cnc_map_file, file_map_desert, game_yuri, client_anonymous, settings
+):
+    """Test that the legacy search renders a capped page, with a link to the rest."""
+    settings.LEGACY_SEARCH_PAGE_SIZE = 2
+    island_maps = [create_cnc_map(f"Island {i}", cnc_game=game_yuri) for i in range(3)]
+    map_file = create_cnc_map_file(file_map_desert, island_maps[0])
+    create_cnc_map("Frozen Lakes", cnc_game=game_yuri)
+
+    # ``?limit=`` and ``?offset=`` can't get around the cap.
+    query = urlencode({"game_slug": game_yuri.slug, "search": "island", "limit": 100, "offset": 0})
+    response = client_anonymous.get(f"{BASE_URL}?{query}")
+    assert response.status_code == status.HTTP_200_OK
+    page = response.content.decode()
+    assert page.count('class="map-result"') == 2
+
+    next_url = re.search(r'href="(/search\?[^"]+)">Next page', page).group(1).replace("&amp;", "&")
+    response = client_anonymous.get(next_url)
+    assert response.status_code == status.HTTP_200_OK
+    last_page = response.content.decode()
+    assert last_page.count('class="map-result"') == 1
+    assert "Next page" not in last_page
+
+    rendered = {x.map_name for x in island_maps if x.map_name in page or x.map_name in last_page}
+    assert rendered == {x.map_name for x in island_maps}
+    assert "Frozen Lakes" not in page + last_page
+    assert map_file.hash_sha1 in page + last_page
+
+    response = client_anonymous.get(f"{BASE_URL}?game_slug={game_yuri.slug}&cursor=garbage")
+    assert response.status_code == status.HTTP_200_OK
+    assert "Invalid search." in response.content.decode()
+
+
+def test_legacy_search__constant_cost(create_cnc_map, game_yuri, client_user, settings):
+    """Test that the number of queries doesn't grow with the matches, and that cached results skip the search."""
+    settings.LEGACY_SEARCH_PAGE_SIZE = 5
+    url = f"{BASE_URL}?game_slug={game_yuri.slug}&search=island"
+    create_cnc_map("Island 0", cnc_game=game_yuri)
+    game_tree.get()
+
+    with CaptureQueriesContext(connection) as one_match:
+        assert client_user.get(url).status_code == status.HTTP_200_OK
+
+    for i in range(1, 20):
+        create_cnc_map(f"Island {i}", cnc_game=game_yuri)
+    with CaptureQueriesContext(connection) as many_matches:
+        response = client_user.get(f"{url}&ordering=map_name")
+    assert response.content.decode().count('class="map-result"') == 5
+    assert len(many_matches) == len(one_match)
+    assert _map_queries(many_matches) > 0
+
+    # Logged-in users skip the response cache, but still get the cached results fragment.
+    with CaptureQueriesContext(connection) as cached:
+        assert client_user.get(f"{url}&ordering=map_name").status_code == status.HTTP_200_OK
+    assert _map_queries(cached) == 0
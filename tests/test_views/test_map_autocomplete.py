@@ -0,0 +1,64 @@
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from kirovy.models import CncMap
+
+BASE_URL = "/maps/autocomplete/"
+
+
+def test_map_autocomplete(create_cnc_map, game_yuri, game_uploadable, client_anonymous, client_user, settings):
+    """Test that names are suggested by case-insensitive prefix, most downloaded first, and scoped by game."""
+    settings.MAP_AUTOCOMPLETE_MAX_RESULTS = 2
+    island_hopping = create_cnc_map("Island Hopping", cnc_game=game_yuri)
+    island_fortress = create_cnc_map("island Fortress")
+    isle_of_war = create_cnc_map("Isle of War")
+    create_cnc_map("Island Banned", is_banned=True)
+    create_cnc_map("Frozen Island")
+    CncMap.objects.filter(id=island_fortress.id).update(download_count=10)
+
+    def _suggest(client=client_anonymous, **params):
+        response = client.get(f"{BASE_URL}?{urlencode(params)}")
+        assert response.status_code == status.HTTP_200_OK
+        return response
+
+    response = _suggest(q="ISLAND")
+    assert response.json()["results"] == [
+        {"id": str(island_fortress.id), "map_name": island_fortress.map_name, "game_slug": game_uploadable.slug},
+        {"id": str(island_hopping.id), "map_name": island_hopping.map_name, "game_slug": game_yuri.slug},
+    ]
+    assert response["Cache-Control"] == f"public, max-age={settings.MAP_AUTOCOMPLETE_MAX_AGE}"
+
+    # ``?limit=`` is capped.
+    assert len(_suggest(q="isl", limit=5).json()["results"]) == 2
+    settings.MAP_AUTOCOMPLETE_MAX_RESULTS = 20
+    assert str(isle_of_war.id) in {x["id"] for x in _suggest(q="isl", limit=4).json()["results"]}
+    assert [x["id"] for x in _suggest(q="island", game_slug=game_yuri.slug).json()["results"]] == [
+        str(island_hopping.id)
+    ]
+    # Too short to be useful, and ``LIKE`` wildcards are matched literally.
+    assert _suggest(q="i").json()["results"] == []
+    assert _suggest(q="%land").json()["results"] == []
+
+    # Suggestions don't depend on the user, so logged-in users share the cache.
+    assert _suggest(client_user, q="ISLAND")["X-Cache"] == "HIT"
+
+
+def test_map_autocomplete__plan_uses_prefix_index(seed_cnc_maps, client_anonymous):
+    """Test that autocomplete reads the prefix index instead of scanning a realistically sized map table."""
+    seed_cnc_maps(map_name="md5(n::text)")
+    table = CncMap._meta.db_table
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client_anonymous.get(f"{BASE_URL}?q=abc")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["results"]
+
+    query = next(q["sql"] for q in queries if q["sql"].startswith("SELECT") and f'FROM "{table}"' in q["sql"])
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN {query}")
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+
+    assert "cncmap_public_name_prefix_idx" in plan, plan
@@ -0,0 +1,74 @@
+import hashlib
+import io
+import pathlib
+import zipfile
+
+from django.http import StreamingHttpResponse
+from rest_framework import status
+
+from kirovy.constants import api_codes
+from kirovy.models import CncMap
+from kirovy.response import KirovyResponse
+
+BASE_URL = "/maps/download/"
+
+
+def test_map_bulk_download(
+    create_cnc_map, create_cnc_map_file, file_map_desert, file_map_snow, client_anonymous, game_yuri
+):
+    """Test that a map pool downloads as one zip, without re-compressing maps that are already zipped."""
+    legacy_map: CncMap = create_cnc_map("Desert", cnc_game=game_yuri, is_mapdb1_compatible=True)
+    legacy_file = create_cnc_map_file(file_map_desert, legacy_map, zip_for_legacy=True)
+    new_map: CncMap = create_cnc_map("Snow")
+    create_cnc_map_file(file_map_snow, new_map)
+    new_file = create_cnc_map_file(file_map_snow, new_map)  # Only the latest version is included.
+    not_included = create_cnc_map("Not in the pool", file=file_map_desert)
+
+    response: StreamingHttpResponse = client_anonymous.get(f"{BASE_URL}?ids={legacy_map.id},{new_map.id}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/zip"
+    assert response["Content-Disposition"] == 'attachment; filename="maps.zip"'
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+    members = {member.filename: member for member in archive.infolist()}
+    assert set(members.keys()) == {
+        f"desert_{legacy_file.hash_sha1}.zip",
+        f"snow_{new_file.hash_sha1}{pathlib.Path(new_file.file.name).suffix}",
+    }
+    assert str(not_included.id.hex) not in str(members)
+
+    legacy_member = members[f"desert_{legacy_file.hash_sha1}.zip"]
+    assert legacy_member.compress_type == zipfile.ZIP_STORED
+    inner_zip = zipfile.ZipFile(io.BytesIO(archive.read(legacy_member)))
+    assert hashlib.sha1(inner_zip.read(inner_zip.infolist()[0])).hexdigest() == legacy_file.hash_sha1
+
+    new_member = members[f"snow_{new_file.hash_sha1}{pathlib.Path(new_file.file.name).suffix}"]
+    assert new_member.compress_type == zipfile.ZIP_DEFLATED
+    assert hashlib.sha1(archive.read(new_member)).hexdigest() == new_file.hash_sha1
+
+
+def test_map_bulk_download__sha1(create_cnc_map, create_cnc_map_file, file_map_desert, client_anonymous, game_yuri):
+    """Test that lobbies can request a pool by the sha1s they already know."""
+    cnc_map: CncMap = create_cnc_map(cnc_game=game_yuri, is_mapdb1_compatible=True)
+    map_file = create_cnc_map_file(file_map_desert, cnc_map, zip_for_legacy=True)
+
+    response: StreamingHttpResponse = client_anonymous.get(f"{BASE_URL}?sha1={map_file.hash_sha1}")
+
+    assert response.status_code == status.HTTP_200_OK
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+    assert len(archive.infolist()) == 1
+
+    assert client_anonymous.get(f"{BASE_URL}?sha1={'0' * 40}").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_map_bulk_download__too_many(create_cnc_map, file_map_desert, client_anonymous, settings):
+    """Test that the number of maps in one zip is capped."""
+    settings.MAX_MAPS_PER_BULK_DOWNLOAD = 1
+    create_cnc_map("Desert 1", file=file_map_desert)
+    create_cnc_map("Desert 2", file=file_map_desert)
+
+    response: KirovyResponse = client_anonymous.get(BASE_URL)
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["code"] == api_codes.DownloadApiCodes.TOO_MANY_MAPS
+    assert response.data["additional"] == {"max_maps": 1}
@@ -1,6 +1,10 @@
 from django import urls
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
+from kirovy.models import CncUser
+
 BASE_URL = "/maps/delete/"
 
 
@@ -20,9 +24,12 @@ def test_delete_map__staff(client_moderator, create_cnc_map, user):
     cnc_map = create_cnc_map(user_id=user.id)
     url = f"{BASE_URL}{cnc_map.id}/"
 
-    response = client_moderator.delete(url)
+    with CaptureQueriesContext(connection) as queries:
+        response = client_moderator.delete(url)
 
     assert response.status_code == status.HTTP_204_NO_CONTENT
+    # The permission checks share the request's permissions instead of re-reading the user.
+    assert len([q for q in queries if f'FROM "{CncUser._meta.db_table}"' in q["sql"]]) == 1
 
 
 def test_delete_map__legacy(client_god, create_cnc_map):
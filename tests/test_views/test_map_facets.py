@@ -0,0 +1,71 @@
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from kirovy.models import CncMap
+
+BASE_URL = "/maps/facets/"
+
+
+def _set_size(cnc_map: CncMap, width: int, height: int) -> None:
+    CncMap.objects.filter(id=cnc_map.id).update(width=width, height=height)
+
+
+def test_map_facets(create_cnc_map, create_cnc_map_category, game_yuri, game_uploadable, client_anonymous):
+    """Test that facets count the maps matching the search, for every facet, in one query."""
+    naval = create_cnc_map_category("Naval War")
+    land = create_cnc_map_category("Land Rush")
+    small_naval = create_cnc_map("Island Hopping", map_categories=[naval, land], cnc_game=game_yuri)
+    _set_size(small_naval, 80, 80)
+    medium_naval = create_cnc_map("Coral Sea", map_categories=[naval])
+    _set_size(medium_naval, 140, 140)
+    huge_land = create_cnc_map("Eternal Desert", map_categories=[land])
+    _set_size(huge_land, 300, 300)
+    # Doesn't match the search, so it isn't counted.
+    create_cnc_map("Frozen Lakes", map_categories=[naval])
+
+    query = urlencode({"search": "island or coral or desert"})
+    with CaptureQueriesContext(connection) as queries:
+        response = client_anonymous.get(f"{BASE_URL}?{query}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len([q for q in queries if "GROUPING SETS" in q["sql"]]) == 1
+    # Every facet comes from the one grouped query.
+    assert not [q for q in queries if "COUNT(" in q["sql"].upper() and "GROUPING SETS" not in q["sql"]]
+
+    facets = response.data["result"]
+    assert facets["total"] == 3
+    assert facets["games"] == [
+        {"value": str(game_uploadable.id), "label": game_uploadable.slug, "count": 2},
+        {"value": str(game_yuri.id), "label": game_yuri.slug, "count": 1},
+    ]
+    assert facets["categories"] == [
+        {"value": str(land.id), "label": land.name, "count": 2},
+        {"value": str(naval.id), "label": naval.name, "count": 2},
+    ]
+    assert facets["sizes"] == [
+        {"value": "small", "label": "small", "count": 1},
+        {"value": "medium", "label": "medium", "count": 1},
+        {"value": "huge", "label": "huge", "count": 1},
+    ]
+
+
+def test_map_list__size_filter(create_cnc_map, client_anonymous):
+    """Test that the size facets can be used as filters."""
+    small = create_cnc_map("Little Big Map")
+    _set_size(small, 100, 100)
+    large = create_cnc_map("Big Little Map")
+    _set_size(large, 180, 200)
+    huge = create_cnc_map("Biggest Map")
+    _set_size(huge, 250, 250)
+    create_cnc_map("No Files Yet")
+
+    query = urlencode([("size", "small"), ("size", "huge")])
+    response = client_anonymous.get(f"/maps/search/?{query}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert {x["id"] for x in response.data["results"]} == {str(small.id), str(huge.id)}
+
+    assert client_anonymous.get("/maps/search/?size=gigantic").status_code == status.HTTP_400_BAD_REQUEST
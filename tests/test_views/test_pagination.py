@@ -0,0 +1,155 @@
+import re
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from kirovy import typing as t
+from kirovy.models import CncMap
+from kirovy.objects.ui_objects import ListResponseData
+from kirovy.response import KirovyResponse
+
+BASE_URL = "/maps/search/"
+
+
+def _walk_pages(client, params: t.DictStrAny) -> t.List[t.List[str]]:
+    """Follow ``next_cursor`` until the last page, and return the map IDs on each page."""
+    pages = []
+    cursor = None
+    while True:
+        query = {**params, **({"cursor": cursor} if cursor else {})}
+        response: KirovyResponse[ListResponseData] = client.get(f"{BASE_URL}?{urlencode(query)}")
+        assert response.status_code == status.HTTP_200_OK
+        pages.append([x["id"] for x in response.data["results"]])
+        cursor = response.data["pagination_metadata"]["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_cursor_pagination(create_cnc_map, client_anonymous):
+    """Test that walking the cursors returns every map once, in order, including maps with equal sort keys."""
+    maps = [create_cnc_map(name) for name in ["Bravo", "Alpha", "Charlie", "Alpha", "Alpha"]]
+    CncMap.objects.filter(id=maps[2].id).update(download_count=10)
+
+    pages = _walk_pages(client_anonymous, {"limit": 2, "ordering": "map_name"})
+    assert [len(x) for x in pages] == [2, 2, 1]
+    flattened = [map_id for page in pages for map_id in page]
+    alphas = sorted(str(x.id) for x in maps if x.map_name == "Alpha")
+    assert flattened == alphas + [str(maps[0].id), str(maps[2].id)]
+
+    # Descending keys seek the other way. Maps without downloads tie, and are broken by ID.
+    pages = _walk_pages(client_anonymous, {"limit": 2, "ordering": "popular"})
+    flattened = [map_id for page in pages for map_id in page]
+    assert flattened[0] == str(maps[2].id)
+    assert flattened[1:] == sorted((str(x.id) for x in maps if x != maps[2]), reverse=True)
+
+    # Default ordering is newest first.
+    pages = _walk_pages(client_anonymous, {"limit": 3})
+    assert [map_id for page in pages for map_id in page] == [str(x.id) for x in reversed(maps)]
+
+    # Maps without files sort last when ascending, and first when descending.
+    CncMap.objects.filter(id__in=[maps[0].id, maps[3].id]).update(latest_file_created=maps[0].created)
+    CncMap.objects.filter(id=maps[1].id).update(latest_file_created=maps[4].created)
+    without_files = sorted(str(x.id) for x in [maps[2], maps[4]])
+    with_files = sorted(str(x.id) for x in [maps[0], maps[3]]) + [str(maps[1].id)]
+    pages = _walk_pages(client_anonymous, {"limit": 2, "ordering": "latest_file_created"})
+    assert [map_id for page in pages for map_id in page] == with_files + without_files
+    pages = _walk_pages(client_anonymous, {"limit": 2, "ordering": "-latest_file_created"})
+    assert [map_id for page in pages for map_id in page] == list(reversed(with_files + without_files))
+
+
+def test_cursor_pagination__seek_uses_index(seed_cnc_maps, client_anonymous):
+    """Test that a later page starts the index scan at the cursor, instead of filtering out every row before it."""
+    seed_cnc_maps(created="now() - n * interval '1 minute'", is_published="true", is_temporary="false")
+    table = CncMap._meta.db_table
+
+    for ordering, sort_key in [("-created", "created"), ("map_name", "map_name"), ("popular", "download_count")]:
+        response: KirovyResponse[ListResponseData] = client_anonymous.get(f"{BASE_URL}?ordering={ordering}")
+        cursor = response.data["pagination_metadata"]["next_cursor"]
+        with CaptureQueriesContext(connection) as queries:
+            response = client_anonymous.get(f"{BASE_URL}?{urlencode({'ordering': ordering, 'cursor': cursor})}")
+        assert response.status_code == status.HTTP_200_OK
+
+        page_query = next(q["sql"] for q in queries if q["sql"].startswith("SELECT") and f'FROM "{table}"' in q["sql"])
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(f"EXPLAIN {page_query}")
+            plan = "\n".join(row[0] for row in db_cursor.fetchall())
+        assert re.search(rf"Index Cond: .*\b{sort_key}\)?(::\w+)? [<>]=", plan), plan
+
+
+def test_cursor_pagination__count_is_optional(create_cnc_map, client_anonymous):
+    """Test that the count only runs when asked for."""
+    for name in ["Alpha", "Bravo", "Charlie"]:
+        create_cnc_map(name)
+
+    with CaptureQueriesContext(connection) as without_count:
+        response: KirovyResponse[ListResponseData] = client_anonymous.get(f"{BASE_URL}?limit=2")
+    assert "remaining_count" not in response.data["pagination_metadata"]
+    assert not any("COUNT(" in x["sql"] for x in without_count.captured_queries)
+
+    response = client_anonymous.get(f"{BASE_URL}?limit=2&count=true")
+    assert response.data["pagination_metadata"]["remaining_count"] == 3
+
+
+def test_cursor_pagination__invalid_cursor(create_cnc_map, client_anonymous):
+    """Test that garbage cursors, and cursors from a different ordering, are rejected."""
+    create_cnc_map("Alpha")
+    create_cnc_map("Bravo")
+    response: KirovyResponse[ListResponseData] = client_anonymous.get(f"{BASE_URL}?limit=1&ordering=map_name")
+    cursor = response.data["pagination_metadata"]["next_cursor"]
+
+    for query in [{"cursor": "not-a-cursor"}, {"cursor": cursor, "ordering": "-map_name"}]:
+        response = client_anonymous.get(f"{BASE_URL}?{urlencode(query)}")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["additional"] == {"param": "cursor"}
+
+
+def test_cursor_pagination__offset_still_supported(create_cnc_map, client_anonymous):
+    """Test that requests using ``offset`` keep getting limit/offset pagination."""
+    for name in ["Alpha", "Bravo", "Charlie"]:
+        create_cnc_map(name)
+
+    response: KirovyResponse[ListResponseData] = client_anonymous.get(f"{BASE_URL}?offset=1&limit=1")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["results"]) == 1
+    assert response.data["pagination_metadata"] == {"offset": 1, "limit": 1, "remaining_count": 3}
+
+
+def test_cursor_pagination__first_page_shape(create_cnc_map, client_anonymous):
+    """Test the first page's metadata. Without ``?offset=`` it's a cursor page, without ``offset`` or a count."""
+    for name in ["Alpha", "Bravo", "Charlie"]:
+        create_cnc_map(name)
+
+    response: KirovyResponse[ListResponseData] = client_anonymous.get(BASE_URL)
+    assert response.data["pagination_metadata"] == {"limit": 30, "next_cursor": None}
+
+    response = client_anonymous.get(f"{BASE_URL}?limit=2")
+    metadata = response.data["pagination_metadata"]
+    assert set(metadata) == {"limit", "next_cursor"}
+    assert metadata["limit"] == 2 and isinstance(metadata["next_cursor"], str)
+
+    # UIs that still read ``offset`` and ``remaining_count`` have to ask for offset pagination.
+    response = client_anonymous.get(f"{BASE_URL}?offset=0&limit=2")
+    assert response.data["pagination_metadata"] == {"offset": 0, "limit": 2, "remaining_count": 3}
+
+
+def test_pagination__estimated_count(create_cnc_map, client_anonymous, settings):
+    """Test that ``?count=estimate`` counts small results exactly, and estimates big ones without ``COUNT(*)``."""
+    for name in ["Alpha", "Bravo", "Charlie"]:
+        create_cnc_map(name)
+
+    for query in ["limit=2&count=estimate", "offset=0&limit=2&count=estimate"]:
+        response: KirovyResponse[ListResponseData] = client_anonymous.get(f"{BASE_URL}?{query}")
+        assert response.data["pagination_metadata"]["remaining_count"] == 3
+        assert "remaining_count_is_estimated" not in response.data["pagination_metadata"]
+
+    settings.ESTIMATED_COUNT_EXACT_THRESHOLD = 0
+    for query in ["limit=1&count=estimate", "offset=0&limit=1&count=estimate"]:
+        with CaptureQueriesContext(connection) as queries:
+            response = client_anonymous.get(f"{BASE_URL}?{query}")
+        metadata = response.data["pagination_metadata"]
+        assert metadata["remaining_count_is_estimated"] is True
+        assert isinstance(metadata["remaining_count"], int)
+        assert not any("COUNT(" in x["sql"] for x in queries.captured_queries)
@@ -1,9 +1,18 @@
+import re
 from urllib.parse import urlencode
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
+from kirovy import typing as t
+from kirovy.models import CncMap, CncMapFile, CncUser
+from kirovy.models.cnc_map import CncMapImageFile
+from kirovy.objects import CncnetUserInfo
 from kirovy.objects.ui_objects import ListResponseData
 from kirovy.response import KirovyResponse
+from kirovy.serializers.cnc_map_serializers import CncMapBaseSerializer
+from kirovy.views.cnc_map_views import MapListView
 
 BASE_URL = "/maps/search/"
 
@@ -48,3 +57,338 @@ def test_search_map__categories(create_cnc_map, client_anonymous, create_cnc_map
     result_ids = {x["id"] for x in response.data["results"]}
 
     assert result_ids == expected_map_ids
+
+    # Only maps in every category.
+    query = urlencode([("all_categories", str(x.id)) for x in [included_category_1, included_category_2]])
+    with CaptureQueriesContext(connection) as queries:
+        response = client_anonymous.get(f"{BASE_URL}?{query}")
+    assert {x["id"] for x in response.data["results"]} == {str(map_both_categories.id)}
+    assert set(response.data["results"][0]["category_ids"]) == {
+        str(included_category_1.id),
+        str(included_category_2.id),
+    }
+    # The array column is filtered and serialized, so the many-to-many table is never read.
+    through_table = CncMap.categories.through._meta.db_table
+    assert not [q for q in queries if through_table in q["sql"]]
+
+
+def test_search_map__popular_and_trending(create_cnc_map, client_anonymous):
+    """Test that the ordering aliases sort by the precomputed download columns."""
+    most_downloaded = create_cnc_map("Dustbowl")
+    most_trending = create_cnc_map("Tour of Egypt")
+    CncMap.objects.filter(id=most_downloaded.id).update(download_count=500, trending_score=1.5)
+    CncMap.objects.filter(id=most_trending.id).update(download_count=20, trending_score=19.0)
+    most_downloaded.refresh_from_db()
+    most_trending.refresh_from_db()
+
+    for ordering, expected in [
+        ("popular", [most_downloaded, most_trending]),
+        ("-popular", [most_trending, most_downloaded]),
+        ("trending", [most_trending, most_downloaded]),
+    ]:
+        response: KirovyResponse[ListResponseData] = client_anonymous.get(f"{BASE_URL}?ordering={ordering}")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [x["id"] for x in response.data["results"]] == [str(x.id) for x in expected]
+        assert response.data["results"][0]["download_count"] == expected[0].download_count
+
+
+def test_search_map__full_text(create_cnc_map, create_cnc_map_category, client_anonymous, user):
+    """Test that search matches the name, description, categories, and author, and ranks name matches first."""
+    description_match = create_cnc_map(
+        "Streets of gold", description="Islands connected by narrow bridges.", is_published=True
+    )
+    name_match = create_cnc_map("Bridge Too Far", description="Lots of open ground.", is_published=True)
+    category_match = create_cnc_map(
+        "Silver Road", map_categories=[create_cnc_map_category("Naval War")], is_published=True
+    )
+    create_cnc_map("Tour of Egypt", description="Oil derricks in the middle.", is_published=True)
+
+    def _search(term: str) -> t.List[str]:
+        response: KirovyResponse[ListResponseData] = client_anonymous.get(f"{BASE_URL}?{urlencode({'search': term})}")
+        assert response.status_code == status.HTTP_200_OK
+        return [x["id"] for x in response.data["results"]]
+
+    # Stemming matches "bridges" to "bridge", and the map name outranks the description.
+    assert _search("bridge") == [str(name_match.id), str(description_match.id)]
+    assert _search("naval") == [str(category_match.id)]
+    assert _search("bridge -narrow") == [str(name_match.id)]
+    assert len(_search(user.username)) == 4
+
+
+def test_search_map__search_vector_maintained(create_cnc_map, create_cnc_map_category, client_anonymous, user):
+    """Test that the search document follows changes to the map, its categories, and its author."""
+    cnc_map = create_cnc_map("Streets of gold", is_published=True)
+    category = create_cnc_map_category("Mission")
+
+    def _found(term: str) -> bool:
+        response: KirovyResponse[ListResponseData] = client_anonymous.get(f"{BASE_URL}?{urlencode({'search': term})}")
+        return [x["id"] for x in response.data["results"]] == [str(cnc_map.id)]
+
+    cnc_map.map_name = "Frozen Lake"
+    cnc_map.save()
+    assert _found("frozen")
+    assert not _found("gold")
+
+    cnc_map.categories.add(category)
+    assert _found("mission")
+    category.name = "Cooperative"
+    category.save()
+    assert _found("cooperative")
+    cnc_map.categories.remove(category)
+    assert not _found("cooperative")
+
+    user.username = "Bittah"
+    user.save(update_fields=["username"])
+    assert _found("bittah")
+
+    # Logging in saves the user, but only a new username rebuilds the search documents of their maps.
+    def _login(name: str) -> t.List[str]:
+        user_dto = CncnetUserInfo(id=user.cncnet_id, name=name, email_verified=True, group=user.group)
+        with CaptureQueriesContext(connection) as queries:
+            CncUser.create_or_update_from_cncnet(user_dto)
+        return [q["sql"] for q in queries if q["sql"].startswith(f'UPDATE "{CncMap._meta.db_table}"')]
+
+    cnc_map.cnc_user = user
+    cnc_map.save()
+    assert not _login("Bittah")
+    assert _login("Jebediah")
+    assert _found("jebediah")
+
+
+def test_search_map__trigram_fallback(create_cnc_map, client_anonymous):
+    """Test that misspelled map names fall back to similarity matching, most similar first."""
+    exact = create_cnc_map("Tour of Egypt", is_published=True)
+    close = create_cnc_map("Tour of Europe", is_published=True)
+    create_cnc_map("Streets of gold", is_published=True)
+
+    response: KirovyResponse[ListResponseData] = client_anonymous.get(
+        f"{BASE_URL}?{urlencode({'search': 'tour of egipt'})}"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [x["id"] for x in response.data["results"]] == [str(exact.id), str(close.id)]
+
+    response = client_anonymous.get(f"{BASE_URL}?{urlencode({'search': 'tour of egipt', 'similarity': 0.6})}")
+    assert [x["id"] for x in response.data["results"]] == [str(exact.id)]
+
+    response = client_anonymous.get(f"{BASE_URL}?{urlencode({'search': 'tour of egipt', 'similarity': 'fuzzy'})}")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["additional"] == {"param": "similarity"}
+
+    # The fallback pages with cursors like any other search.
+    response = client_anonymous.get(f"{BASE_URL}?{urlencode({'search': 'tour of egipt', 'limit': 1})}")
+    assert [x["id"] for x in response.data["results"]] == [str(exact.id)]
+    cursor = response.data["pagination_metadata"]["next_cursor"]
+    response = client_anonymous.get(
+        f"{BASE_URL}?{urlencode({'search': 'tour of egipt', 'limit': 1, 'cursor': cursor})}"
+    )
+    assert [x["id"] for x in response.data["results"]] == [str(close.id)]
+    assert response.data["pagination_metadata"]["next_cursor"] is None
+
+    # Offset pages can't tell an empty search from a page past the end, so they still check for full-text matches.
+    response = client_anonymous.get(f"{BASE_URL}?{urlencode({'search': 'tour of egipt', 'offset': 0})}")
+    assert [x["id"] for x in response.data["results"]] == [str(exact.id), str(close.id)]
+
+
+def test_search_map__full_text_hits_query_once(create_cnc_map, client_anonymous):
+    """Test that searches with full-text matches don't check for matches separately, and still validate params."""
+    expected = create_cnc_map("Tour of Egypt", is_published=True)
+
+    with CaptureQueriesContext(connection) as queries:
+        response: KirovyResponse[ListResponseData] = client_anonymous.get(
+            f"{BASE_URL}?{urlencode({'search': 'egypt'})}"
+        )
+    assert [x["id"] for x in response.data["results"]] == [str(expected.id)]
+    assert len([q for q in queries if "plainto_tsquery" in q["sql"] or "websearch_to_tsquery" in q["sql"]]) == 1
+    assert not [q for q in queries if "similarity" in q["sql"] or "set_limit" in q["sql"]]
+
+    response = client_anonymous.get(f"{BASE_URL}?{urlencode({'search': 'egypt', 'similarity': 'fuzzy'})}")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["additional"] == {"param": "similarity"}
+
+
+def test_search_map__latest_file_query_count(create_cnc_map, create_cnc_map_file, file_map_desert, client_anonymous):
+    """Test that the latest file is annotated, rather than queried once per map by the serializer."""
+
+    def _list_query_count() -> t.Tuple[int, ListResponseData]:
+        with CaptureQueriesContext(connection) as queries:
+            response: KirovyResponse[ListResponseData] = client_anonymous.get(BASE_URL)
+        assert response.status_code == status.HTTP_200_OK
+        return len(queries), response.data
+
+    def _add_maps(count: int) -> None:
+        for i in range(count):
+            cnc_map = create_cnc_map(f"Latest File {i}")
+            create_cnc_map_file(file_map_desert, cnc_map)
+            create_cnc_map_file(file_map_desert, cnc_map)
+
+    _add_maps(2)
+    two_maps_queries, _ = _list_query_count()
+    _add_maps(3)
+    five_maps_queries, data = _list_query_count()
+
+    assert len(data["results"]) == 5
+    assert five_maps_queries == two_maps_queries
+
+    latest_file = CncMapFile.objects.filter(cnc_map_id=data["results"][0]["id"]).order_by("-version").first()
+    assert latest_file.version == 2
+    assert data["results"][0]["latest_map_file_hash"] == latest_file.hash_sha1
+    assert data["results"][0]["latest_map_file_url"].endswith(latest_file.file.url)
+
+
+def test_search_map__order_by_file_stats(create_cnc_map, create_cnc_map_file, file_map_desert, client_anonymous):
+    """Test that maps sort on the columns copied from their latest file."""
+    older = create_cnc_map("Older Upload")
+    create_cnc_map_file(file_map_desert, older)
+    newer = create_cnc_map("Newer Upload")
+    create_cnc_map_file(file_map_desert, newer)
+    create_cnc_map_file(file_map_desert, newer)
+
+    for ordering, expected in [("-latest_file_created", newer), ("file_count", older), ("-file_count", newer)]:
+        response: KirovyResponse[ListResponseData] = client_anonymous.get(f"{BASE_URL}?ordering={ordering}")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["results"][0]["id"] == str(expected.id), ordering
+
+    assert response.data["results"][0]["file_count"] == 2
+
+
+def test_search_map__default_plan_uses_index(seed_cnc_maps, client_anonymous):
+    """Test that the default map list query doesn't sequentially scan a realistically sized map table.
+
+    Most seeded maps are unpublished, like client uploads for lobbies.
+    """
+    seed_cnc_maps(created="now() - n * interval '1 minute'", is_published="n %% 10 = 0", is_temporary="n %% 10 <> 0")
+    table = CncMap._meta.db_table
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client_anonymous.get(BASE_URL)
+    assert response.status_code == status.HTTP_200_OK
+
+    list_query = next(q["sql"] for q in queries if q["sql"].startswith("SELECT") and f'FROM "{table}"' in q["sql"])
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN {list_query}")
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+
+    assert not re.search(rf"Seq Scan on {table}\b", plan), plan
+
+
+def test_search_map__sparse_fields(
+    create_cnc_map, create_cnc_map_file, create_cnc_map_image_file, file_map_desert, file_map_image, client_anonymous
+):
+    """Test that ``?fields=card`` returns a small projection without prefetching map files or images."""
+    cnc_map = create_cnc_map("Card Map")
+    map_file = create_cnc_map_file(file_map_desert, cnc_map)
+    image = create_cnc_map_image_file(file_map_image, cnc_map)
+
+    with CaptureQueriesContext(connection) as queries:
+        response: KirovyResponse[ListResponseData] = client_anonymous.get(f"{BASE_URL}?fields=card")
+
+    assert response.status_code == status.HTTP_200_OK
+    card = response.data["results"][0]
+    assert set(card.keys()) == CncMapBaseSerializer.Meta.field_sets["card"]
+    assert card["latest_map_file_hash"] == map_file.hash_sha1
+    assert card["primary_image_url"].endswith(image.file.url)
+    # The image and file come from subqueries in the map query, not from separate prefetch queries.
+    assert not [q for q in queries if q["sql"].startswith(f'SELECT "{CncMapImageFile._meta.db_table}"')]
+    assert not [q for q in queries if q["sql"].startswith(f'SELECT "{CncMapFile._meta.db_table}"')]
+
+    response = client_anonymous.get(f"{BASE_URL}?fields=id,map_name&expand=files")
+    assert set(response.data["results"][0].keys()) == {"id", "map_name", "files"}
+    assert response.data["results"][0]["files"][0]["hash_sha1"] == map_file.hash_sha1
+
+    response = client_anonymous.get(f"{BASE_URL}?fields=id,ip_address")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.data["additional"] == {"param": "fields", "unknown": ["ip_address"]}
+
+
+def test_search_map__projection_matches_serializer(
+    create_cnc_map,
+    create_cnc_map_category,
+    create_cnc_map_file,
+    create_cnc_map_image_file,
+    file_map_desert,
+    file_map_snow,
+    file_map_image,
+    client_user,
+    client_admin,
+    monkeypatch,
+):
+    """Test that the ``.values()`` projection renders exactly the same JSON as the serializer."""
+    naval = create_cnc_map_category("Naval War")
+    land = create_cnc_map_category("Land Rush")
+    for name in ["Coral Sea", "Frozen Lakes", "Island Hopping"]:
+        cnc_map = create_cnc_map(name, map_categories=[naval, land])
+        create_cnc_map_file(file_map_desert, cnc_map)
+        create_cnc_map_file(file_map_snow, cnc_map)
+        for _ in range(2):
+            file_map_image.seek(0)
+            create_cnc_map_image_file(file_map_image, cnc_map)
+    create_cnc_map("No Files Yet")
+
+    urls = [
+        BASE_URL,
+        f"{BASE_URL}?fields=card",
+        f"{BASE_URL}?fields=card&expand=files,images,category_ids",
+        f"{BASE_URL}?ordering=popular&limit=2",
+        f"{BASE_URL}?offset=1&limit=2",
+        f"{BASE_URL}?search=coral or island",
+    ]
+    for client in [client_user, client_admin]:
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                projected = client.get(url)
+            assert projected.status_code == status.HTTP_200_OK
+            # One query for all files and one for all images, rather than one per map.
+            for model in [CncMapFile, CncMapImageFile]:
+                assert len([q for q in queries if q["sql"].startswith(f'SELECT "{model._meta.db_table}"')]) <= 1
+
+            monkeypatch.setattr(MapListView, "projection_class", None)
+            serialized = client.get(url)
+            monkeypatch.undo()
+
+            assert projected.content == serialized.content, url
+
+    admin_map = client_admin.get(f"{BASE_URL}?search=coral").json()["results"][0]
+    assert "ip_address" in admin_map["files"][0]
+    assert [x["version"] for x in admin_map["files"]] == [2, 1]
+    assert "ip_address" not in client_user.get(f"{BASE_URL}?search=coral").json()["results"][0]["files"][0]
+
+
+def test_search_map__game_hierarchy(create_cnc_map, create_cnc_game, game_yuri, client_anonymous):
+    """Test expanding a game filter to its sub games, or to parent games whose maps are compatible."""
+    red_alert_2 = game_yuri.parent_game
+    yuri_mod = create_cnc_game(slug="yrmod", parent_game=game_yuri, is_mod=True)
+    ra2_map = create_cnc_map("Golden State Fwy", cnc_game=red_alert_2)
+    yr_map = create_cnc_map("Little Big Lake", cnc_game=game_yuri)
+    mod_map = create_cnc_map("Mod Map", cnc_game=yuri_mod)
+
+    def _search(**params) -> t.Set[str]:
+        response = client_anonymous.get(f"{BASE_URL}?{urlencode(params)}")
+        assert response.status_code == status.HTTP_200_OK
+        return {x["id"] for x in response.data["results"]}
+
+    assert _search(game_slug=game_yuri.slug) == {str(yr_map.id)}
+    assert _search(game_slug=game_yuri.slug, include_compatible_maps=True) == {str(yr_map.id), str(ra2_map.id)}
+    assert _search(cnc_game=str(red_alert_2.id), include_maps_from_sub_games=True) == {
+        str(ra2_map.id),
+        str(yr_map.id),
+        str(mod_map.id),
+    }
+    assert _search(game_slug="nope") == set()
+
+
+def test_search_map__user_permissions_query_count(
+    create_cnc_map, create_cnc_map_file, file_map_desert, client_admin, client_user
+):
+    """Test that the user's permissions are loaded once per request, not once per serializer."""
+    for i in range(5):
+        create_cnc_map_file(file_map_desert, create_cnc_map(f"Permission Check {i}"))
+    user_table = CncUser._meta.db_table
+
+    for client, sees_staff_fields in [(client_admin, True), (client_user, False)]:
+        with CaptureQueriesContext(connection) as queries:
+            response: KirovyResponse[ListResponseData] = client.get(f"{BASE_URL}?expand=files")
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) == 5
+        assert ("ip_address" in response.data["results"][0]["files"][0]) == sees_staff_fields
+        assert len([q for q in queries if f'FROM "{user_table}"' in q["sql"]]) == 1